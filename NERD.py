@@ -12,289 +12,165 @@
 ########## MODULE IMPORT ############################################## 
 
 #alphabet
-import argparse
-import codecs
-from datetime import datetime,tzinfo,date
-from dateutil.relativedelta import relativedelta
-import fileinput
-import math
-import numpy as np
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import PatternFill, Font, Fill, Alignment, Border, Side
-from openpyxl.utils import column_index_from_string, get_column_letter
-from openpyxl.worksheet.properties import WorksheetProperties, PageSetupProperties
-import os.path
+from datetime import datetime
 import re
-import requests
-import statistics
-import sys
 
-class NERD():
-
-	serial_numbers = []
+#statistics is imported by the method that uses it, so importing NERD stays cheap (see benchmarks/startup.py)
+
+#datetime.strptime imports _strptime on first use, which races when serials are parsed on worker threads
+import _strptime
+
+#overview tag -> overview record field
+OVERVIEW_TAGS = {
+	"asup_id" 				: "asup_id",
+	"asup_received_date" 	: "asup_received_date",
+	"biz_key" 				: "biz_key",
+	"cluster_name" 			: "cluster_name",
+	"hostname" 				: "host_name",
+	"site_name" 			: "location",
+	"sys_version" 			: "system_version",
+	"system_id" 			: "system_id",
+	"sys_model" 			: "system_model",
+	"sys_serial_no" 		: "serial_number",
+	"warranty_end_date" 	: "warranty_status",
+}
+OVERVIEW_PATTERN 	= re.compile("<(?:\w+:)?(" + "|".join(OVERVIEW_TAGS) + ")>([^<]*)")
+
+#patterns that can be scanned chunk by chunk (see NERD._scan): every match ends on a terminator
+AGGREGATE_PATTERN 	= re.compile("<(?:\w+:)?(aggr_name|aggr_allocated_kb|aggr_used_pct|aggr_raid_type)>([^<]*)<")
+DFA_PATTERN 		= re.compile("CDATA\[(.*?)\]\]>", re.DOTALL)
+VOLUME_PATTERN 		= re.compile("(instance_name|counter_stat_value)>([^<\n]*)<")
 
-	def __init__(self, serial_numbers_list):
-		"""initialize Environment by adding serial #'s' to list. Serial #'s are accepted as argument or file"""
-		for num in serial_numbers_list:
-			self.serial_numbers.append(num)
+class NERD():
+	"""Stateless ASUP parser. Every method takes a response body and returns the extracted values, so one instance can be shared across threads"""
 
 	def _aggr_capacity(self, asup_url_output):
 		"""Returns aggregate capacity"""
-		line 			= asup_url_output
-		match 			= re.findall("aggr_allocated_kb>(.*?)</aggr_allocated_kb>", line, re.DOTALL)
-		match_name 		= re.findall("aggr_name>(.*?)</aggr_name>", line, re.DOTALL)
-		match_return 	= {} #dictionary -> Key: aggr name; Value: aggr capacity
+		return self._aggregate_info(asup_url_output)["capacity"]
 
-		if match:
-			length = len(match)
-			
-			for i in range(0, length):
-				capacity_TB = (float(match[i]) / (pow(1024, 3)))
-				capacity_TB_rounded = round(capacity_TB, 2)
-				match_return[str(match_name[i])] = capacity_TB_rounded
-			
-			return match_return
+	def _aggr_name(self, raid_tree):
+		"""Returns aggregate names. Takes output of _raid_tree"""
+		if raid_tree:
+			return [aggregate["name"] for aggregate in raid_tree]
 
-	def _aggr_name(self, asup_url_output):
-		"""Returns aggregate names"""
-		line 	= asup_url_output
-		match 	= re.findall("(?<=Aggregate )(.*?)(?= \()", line)
+	def _aggr_util(self, asup_url_output):
+		"""Returns percent of aggr utilized"""
+		return self._aggregate_info(asup_url_output)["util"]
 
-		if match:
-			match_list = []
+	def _aggregate_info(self, asup_url_output):
+		"""Returns dictionary -> Key: 'capacity', 'util', 'raid_type'; Value: dictionary keyed by aggr name. Reads the AGGREGATE payload once"""
+		match_lists = {"aggr_name": [], "aggr_allocated_kb": [], "aggr_used_pct": [], "aggr_raid_type": []}
 
-			for name in match:
-				if name not in match_list:
-					match_list.append(str(name))
-				elif name in match_list:
-					break
+		for match in self._scan(AGGREGATE_PATTERN, asup_url_output):
+			match_lists[match.group(1)].append(match.group(2))
 
-			return match_list
+		match_name 		= match_lists["aggr_name"]
+		match_return 	= {"capacity": None, "util": None, "raid_type": None}
 
-	def _aggr_util(self, asup_url_output):
-		"""Returns percent of aggr utilized"""
-		line 			= asup_url_output
-		match 			= re.findall("aggr_used_pct>(.*?)</aggr_used_pct>", line, re.DOTALL)
-		match_name 		= re.findall("aggr_name>(.*?)</aggr_name>", line, re.DOTALL)
-		match_return 	= {} #dictionary -> Key: aggr name; Value: aggr percent util
+		if match_lists["aggr_allocated_kb"]:
+			match_return["capacity"] = {} #dictionary -> Key: aggr name; Value: aggr capacity
+			for i in range(0, len(match_lists["aggr_allocated_kb"])):
+				capacity_TB = (float(match_lists["aggr_allocated_kb"][i]) / (pow(1024, 3)))
+				match_return["capacity"][str(match_name[i])] = round(capacity_TB, 2)
 
-		if match:
-			length = len(match)
-			
-			for i in range(0, length):
-				match_return[str(match_name[i])] = int(match[i])
-			
-			return match_return
+		if match_lists["aggr_used_pct"]:
+			match_return["util"] = {} #dictionary -> Key: aggr name; Value: aggr percent util
+			for i in range(0, len(match_lists["aggr_used_pct"])):
+				match_return["util"][str(match_name[i])] = int(match_lists["aggr_used_pct"][i])
+
+		if match_lists["aggr_raid_type"]:
+			match_return["raid_type"] = {} #dictionary -> Key: aggr name; Value: raid type
+			for i in range(0, len(match_lists["aggr_raid_type"])):
+				match_return["raid_type"][str(match_name[i])] = str(match_lists["aggr_raid_type"][i])
+
+		return match_return
 
 	def _asup_id(self, asup_url_output):
 		"""Returns asup id for rest API use"""
-		line 	= asup_url_output
-		match 	= re.search("asup_id>(.*?)</asup_id", line, re.DOTALL)
+		return self._overview(asup_url_output)["asup_id"]
 
-		if match:
-			return str(match.group(1))
-	
 	def _asup_received_date(self, asup_url_output):
 		"""Return date of last recieved ASUP data"""
-		line 	= asup_url_output
-		match 	= re.search("asup_received_date>(.*?)</asup_received_date>", line, re.DOTALL)
-
-		if match:
-			return str(match.group(1))
+		return self._overview(asup_url_output)["asup_received_date"]
 
 	def _biz_key(self, asup_url_output):
 		"""Returns biz_key for rest api use"""
-		line 	= asup_url_output
-		match 	= re.search("biz_key>(.*?)</biz_key>", line, re.DOTALL)
-
-		if match:
-			return str(match.group(1))
-
-	def _capacity_forecast(self, asup_url_output):
-		"""Returns growth rate of each aggregate (TB/month)"""
-		line 		= asup_url_output
-		match 		= re.findall("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-		match_name 	= re.search("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-
-		if match:
-
-			match_return 			= {}
-			capacity_dictionary 	= {}
-			current_capacity 		= {}
-			ninty_percent_capacity 	= {}
-			match_name_buffer 		= []
-			match_name_buffer 		= re.findall("(\S+)", str(match_name.group(1)))
-
-			#filling dictionary with aggr names as keys
-			for i in range(5, len(match_name_buffer),10):
-				match_return[match_name_buffer[i]] 			= 0
-				capacity_dictionary[match_name_buffer[i]] 	= []
-
-			aggr_count = len(match_return)
-
-			data_group_flag = 0
-			#fill lists with capacity values from last 24 weeks
-			for data_group in match:
-				data_group_buffer = []
-				data_group_buffer = re.findall("(\S+)", str(data_group))
-
-				for i in range(0,aggr_count):
-					if (7+(i*10)) <= len(data_group_buffer) and data_group_buffer[5+(i*10)] in match_name_buffer:
-						if data_group_flag == 0:
-							ninty_percent_capacity[data_group_buffer[5+(i*10)]] = (float(data_group_buffer[6+(i*10)]) * 0.9)/(pow(1024,3))
-							current_capacity[data_group_buffer[5+(i*10)]] = (float(data_group_buffer[7+(i*10)])/(pow(1024,3)))
-						capacity_dictionary[data_group_buffer[5+(i*10)]].append(float(data_group_buffer[7+(i*10)]))
-				data_group_flag = 1
-
-			#Calculate growth rate (AAGR)
-			for name in capacity_dictionary:
-				growth_rate_list = []
-
-				for i in range(len(capacity_dictionary[name])-1):
-					growth_rate_list.append(((capacity_dictionary[name][i]-capacity_dictionary[name][i+1])/capacity_dictionary[name][i+1])*100)
-				
-				average_growth_rate = np.average(growth_rate_list)
-				over_ninty = ninty_percent_capacity[name] - current_capacity[name]
-
-				if average_growth_rate != 0:
-					capacity_forecast = (ninty_percent_capacity[name]-current_capacity[name])/average_growth_rate
-				else: 
-					match_return[name] = "More than one year"
-					continue
-				
-				if over_ninty <= 0:
-					match_return[name] = "Already > 90"
-				elif capacity_forecast < 0:
-					match_return[name] = "On decreasing trend"
-				elif capacity_forecast <= 12:
-					match_return[name] = "This year"
-				elif capacity_forecast <= 3:
-					match_return[name] = "This quarter"
-				elif capacity_forecast <= 2:
-					match_return[name] = "Next month"
-				elif capacity_forecast > 12:
-					match_return[name] = "More than one year"
-
-			return match_return
+		return self._overview(asup_url_output)["biz_key"]
 
 	def _cluster_name(self, asup_url_output):
 		"""Returns client-defined cluster name"""
-		line 	= asup_url_output
-		match 	= re.search("cluster_name>(.*?)<", line)
-
-		if match:
+		return self._overview(asup_url_output)["cluster_name"]
+
+	def _dfa_capacity(self, asup_url_output):
+		"""Returns DF-A capacity history of each aggregate (KB), newest week first, with the week # of each value.
+		Parsed once and shared by the growth/forecast methods and NERD_Forecast"""
+		aggregates 	= []
+		total 		= {} #dictionary -> Key: aggr name; Value: list of total KB per week
+		used 		= {} #dictionary -> Key: aggr name; Value: list of used KB per week
+		week 		= {} #dictionary -> Key: aggr name; Value: list of week # (0 = newest) of each value
+		weeks 		= 0
+
+		for match in self._scan(DFA_PATTERN, asup_url_output):
+			data_group_buffer = match.group(1).split()
+
+			#each aggregate takes 10 tokens in a DF-A block: its own row plus its .snapshot row
+			for i in range(5, len(data_group_buffer)-2, 10):
+				name = data_group_buffer[i]
+				if name not in used:
+					aggregates.append(name)
+					total[name] = []
+					used[name] 	= []
+					week[name] 	= []
+				total[name].append(float(data_group_buffer[i+1]))
+				used[name].append(float(data_group_buffer[i+2]))
+				week[name].append(weeks)
+
+			weeks += 1
+
+		if weeks:
+
+			match_return 				= {}
+			match_return["aggregates"] 	= aggregates
+			match_return["total"] 		= total
+			match_return["used"] 		= used
+			match_return["week"] 		= week
+			match_return["weeks"] 		= weeks
 
-			return str(match.group(1))
+			return match_return
 
-	def _disk_count(self, asup_url_output):
+	def _disk_count(self, raid_tree):
+		"""Returns number of data disks in the first RAID group of each aggregate. Takes output of _raid_tree"""
+		if raid_tree:
 
-		line 		= asup_url_output
-		match 		= re.search("<data>(.*?)</data>", line, re.DOTALL)
-		match_name 	= re.findall("(?<=Aggregate )(.*?)(?= \()", line)
+			match_return = {} #dictionary -> Key: aggr name; Value: data disk count
 
-		if match:
+			for aggregate in raid_tree:
+				raid_groups = self._raid_groups(aggregate)
+				if raid_groups:
+					match_return[aggregate["name"]] = str(raid_groups[0]["roles"].get("data", 0)) + " disks"
+				else:
+					match_return[aggregate["name"]] = 0
 
-			match_buffer 	= []
-			match_buffer 	= re.findall("(\S+)", str(match.group(1)))
-			match_return 	= {} #dictionary -> Key: aggr name; Value: plex names
-
-			disk_counter	= 0
-			raid_group_flag = 0
-			name_value 		= -1
-			name_list 		= []
-
- 			#add unique aggr name keys and create name list
-			for agg_name in match_name:
-				if agg_name not in name_list:
-					name_list.append(str(agg_name))
-					match_return[str(agg_name)] = 0
-				elif agg_name in match_buffer:
-					break
-			
-			#find disk count for each aggr
-			for word in match_buffer:
-				if "parity" in word and raid_group_flag == 1 and name_value < len(name_list):
-					match_return[name_list[name_value]] = str(disk_counter) + " disks"
-					raid_group_flag = 2
-					disk_counter = 0
-
-				elif "data" in  word and raid_group_flag != 2:
-					raid_group_flag = 1
-					disk_counter += 1
-
-				elif "Aggregate" in word:
-					if raid_group_flag == 1:
-						raid_group_flag = 0
-						match_return[name_list[name_value]] = str(disk_counter) + " disks"
-						disk_counter = 0
-						name_value += 1
-						
-					else:
-						name_value += 1
-						raid_group_flag = 0
-					
-
-				elif "spare" in word and raid_group_flag != 2:
-					match_return[name_list[name_value]] = str(disk_counter) + " disks"
-					break
-			
 			return match_return
 
-	def _disk_type_count(self, asup_url_output):
-		"""Returns number of each disk type"""
-		line 		= asup_url_output
-		match 		= re.search("<data>(.*?)</data>", line, re.DOTALL)
-		match_name 	= re.findall("(?<=Aggregate )(.*?)(?= \()", line)
+	def _disk_type_count(self, raid_tree):
+		"""Returns number of RAID groups of each disk type. Takes output of _raid_tree"""
+		if raid_tree:
 
-		if match:
+			match_return = {} #dictionary -> Key: aggr name; Value: RAID groups per disk type
 
-			match_buffer 	= []
-			match_buffer 	= re.findall("(\S+)", str(match.group(1)))
-			match_return 	= {} #dictionary -> Key: aggr name; Value: RAID Group count
-
-			name_value 		= 0
-			name_list 		= []
-			ssd_counter 	= 0
-			sas_counter 	= 0
-			new_aggr_flag 	= 0
-			start_flag 		= 0
-			i 				= 0
-
- 			#add unique aggr name keys and create name list
-			for agg_name in match_name:
-				if agg_name not in name_list:
-					name_list.append(str(agg_name))
-					match_return[str(agg_name)] = 0
-				elif agg_name in match_buffer:
-					break
+			for aggregate in raid_tree:
+				sas_counter = 0
+				ssd_counter = 0
 
-			#Count number of each type of RAID layout
-			for word in match_buffer:
-
-				i+=1
-
-				if "Aggregate" in word or "spare" in word:
-					if start_flag != 0:
-						new_aggr_flag = 0
-						match_return[name_list[name_value]] = "({} SAS; {} SSD)".format(sas_counter, ssd_counter)
-						name_value += 1
-						if "spare" in word:
-							break
-					else:
-						start_flag = 1
-
-				elif "Type" in word:
-					if new_aggr_flag == 0:
-						sas_counter = 0
-						ssd_counter = 0
-						new_aggr_flag = 1
-
-					raid_type = match_buffer[i + 32]
-					if "SSD" in raid_type:
+				for raid_group in self._raid_groups(aggregate):
+					if "SSD" in raid_group["type"]:
 						ssd_counter += 1
-					elif "SAS" in raid_type:
+					elif "SAS" in raid_group["type"]:
 						sas_counter += 1
 
+				match_return[aggregate["name"]] = "({} SAS; {} SSD)".format(sas_counter, ssd_counter)
+
 			return match_return
 
 	def _fiscal_end(self):
@@ -317,113 +193,37 @@ class NERD():
 
 		return fiscal_end
 
-	def _growth_rate_monthly(self, asup_url_output):
-		"""Returns growth rate of each aggregate (%/month)"""
-		line 		= asup_url_output
-		match 		= re.findall("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-		match_name 	= re.search("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-
-		if match:
-
-			match_return 		= {}
-			capacity_dictionary = {}
-			match_name_buffer 	= []
-			match_name_buffer 	= re.findall("(\S+)", str(match_name.group(1)))
-
-			#filling dictionary with aggr names as keys
-			for i in range(5, len(match_name_buffer),10):
-				match_return[match_name_buffer[i]] 			= 0
-				capacity_dictionary[match_name_buffer[i]] 	= []
-
-			aggr_count = len(match_return)
-
-			#fill lists with capacity values from last x weeks
-			for data_group in match:
-				data_group_buffer = []
-				data_group_buffer = re.findall("(\S+)", str(data_group))
-
-				for i in range(0,aggr_count):
-					if (7+(i*10)) <= len(data_group_buffer) and data_group_buffer[5+(i*10)] in match_name_buffer:
-						capacity_dictionary[data_group_buffer[5+(i*10)]].append(float(data_group_buffer[7+(i*10)]))
-			
-			for name in capacity_dictionary:
-				n = len(capacity_dictionary[name])
-
-				#Calculate growth rate (CAGR)
-				x = capacity_dictionary[name][0]/(capacity_dictionary[name][n-1])
-				cagr_growth_rate = round((pow(x,(1/float(n)))-1)*100,2)
-				
-				#Calculate growth rate (AAGR)
-				growth_rate_list = []
-				for i in range(n-1):
-					growth_rate_list.append(((capacity_dictionary[name][i]-capacity_dictionary[name][i+1]) /capacity_dictionary[name][i+1])*100)
-				
-				average_growth_rate = round(np.average(growth_rate_list), 2) #growth rate per week
-				if average_growth_rate >= 100:
-					match_return[name] = "Over 100%. Check ASUP for details."
-				else:
-					match_return[name] = (average_growth_rate*4) #growth rate per month
-
-			return match_return
-
-	def _growth_tb_monthly(self, asup_url_output):
-		"""Returns growth rate of each aggregate (TB/month)"""
-		line 		= asup_url_output
-		match 		= re.findall("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-		match_name 	= re.search("CDATA\[(.*?)\]\]>", line, re.DOTALL)
-
-		if match:
-
-			match_return 		= {}
-			capacity_dictionary = {}
-			match_name_buffer 	= []
-			match_name_buffer 	= re.findall("(\S+)", str(match_name.group(1)))
-
-			#filling dictionary with aggr names as keys
-			for i in range(5, len(match_name_buffer),10):
-				match_return[match_name_buffer[i]] 			= 0
-				capacity_dictionary[match_name_buffer[i]] 	= []
-
-			aggr_count = len(match_return)
-
-			#fill lists with capacity values from last 24 weeks
-			for data_group in match:
-				data_group_buffer = []
-				data_group_buffer = re.findall("(\S+)", str(data_group))
-
-				for i in range(0, aggr_count):
-					if (7+(i*10)) <= len(data_group_buffer) and data_group_buffer[5+(i*10)] in match_name_buffer:
-						capacity_dictionary[data_group_buffer[5+(i*10)]].append(float(data_group_buffer[7+(i*10)]))
-
-			#calculate average growth in TB per month
-			growth_tb = []
-			for name in capacity_dictionary:
-				for i in range(len(capacity_dictionary[name])-1):
-					growth_tb.append(capacity_dictionary[name][i]-capacity_dictionary[name][i+1])
-				average_difference = round((np.average(growth_tb)/(pow(1024, 3))), 2) #average growth per week
-				match_return[name] = (average_difference * 4) #average growth per month
-			return match_return
-
 	def _host_name(self, asup_url_output):
 		"""Returns product host name"""
-		line 	= asup_url_output
-		match 	= re.search("hostname>(.*?)<", line)
-
-		if match:
-
-			return str(match.group(1))
+		return self._overview(asup_url_output)["host_name"]
 
 	def _location(self, asup_url_output):
 		"""Returns customer location. Location defines different pages"""
-		line 	= asup_url_output
-		match 	= re.search("site_name>(.*?)<", line)
+		return self._overview(asup_url_output)["location"]
+
+	def _overview(self, asup_url_output):
+		"""Returns dictionary -> Key: field name; Value: field value, for every overview field. Reads the overview payload once"""
+		match_return = dict.fromkeys(OVERVIEW_TAGS.values())
+		found_count = 0
+
+		for match in OVERVIEW_PATTERN.finditer(asup_url_output):
+			field = OVERVIEW_TAGS[match.group(1)]
+			if match_return[field] == None:
+				match_return[field] = str(match.group(2))
+				found_count += 1
+				if found_count == len(match_return):
+					break
 
-		if match:
+		if match_return["warranty_status"] != None:
+			string_date 					= match_return["warranty_status"].replace("-","")
+			match_return["warranty_status"] = datetime.strptime(string_date, '%Y%m%d').date()
 
-			return str(match.group(1))
+		return match_return
 
 	def _performance_iops(self, asup_url_output):
 		"""Returns iops and cpu busy % (std_dev + avg) for previous week"""
+		import statistics
+
 		line 			= asup_url_output
 		fcp_ops_match 	= re.findall("fcp_ops.*?<counterValue>(.*?)</counterValue>", line, re.DOTALL)
 		iscsi_ops_match = re.findall("iscsi_ops.*?<counterValue>(.*?)</counterValue>", line, re.DOTALL)
@@ -476,96 +276,148 @@ class NERD():
 		no_match_list = ['No Data Available', 'No Data Available', 'No Data Available', 'No Data Available', 'No Data Available']
 		return no_match_list
 
-	def _raid_group_count(self, asup_url_output):
-		"""Returns RAID group set-up"""
-		line 		= asup_url_output
-		match_name 	= re.findall("(?<=Aggregate )(.*?)(?= \()", line)
-		match_raid	= re.findall("(?<=RAID group)(.*?)(?=\()", line)
-
-		if match_name and match_raid:
-
-			match_buffer = {} #dictionary -> Key: aggr name; Value: raid group names
-			for agg_name in match_name:
-				if agg_name not in match_buffer: #add unique aggr name keys
-					match_buffer[str(agg_name)] = [] 
-					for raid in match_raid:
-						if agg_name in raid and raid not in match_buffer[str(agg_name)]: #add plex names to corresponding aggr names
-							match_buffer[str(agg_name)].append(str(raid))
-				elif agg_name in match_buffer:
-					break
-			
-			return match_buffer
-	
-	def _raid_type(self, asup_url_output):
-		"""Returns percent of aggr utilized"""
-		line 		= asup_url_output
-		match 		= re.findall("aggr_raid_type>(.*?)</aggr_raid_type>", line, re.DOTALL)
-		match_name 	= re.findall("aggr_name>(.*?)</aggr_name>", line, re.DOTALL)
-		
-		if match:
+	def _raid_group_count(self, raid_tree):
+		"""Returns RAID group names of each aggregate. Takes output of _raid_tree"""
+		if raid_tree:
+
+			match_return = {} #dictionary -> Key: aggr name; Value: raid group names
+			for aggregate in raid_tree:
+				match_return[aggregate["name"]] = [raid_group["name"] for raid_group in self._raid_groups(aggregate)]
 
-			match_return = {} #dictionary -> Key: aggr name; Value: raid type
-			length = len(match)
-			
-			for i in range(0, length):
-				match_return[str(match_name[i])] = str(match[i])
-			
 			return match_return
 
-	def _system_id(self, asup_url_output):
-		"""Returns system id number"""
-		line 	= asup_url_output
-		match 	= re.search("system_id>(.*?)<", line)
+	def _raid_groups(self, aggregate):
+		"""Returns RAID groups of every plex of one aggregate of _raid_tree"""
+		raid_groups = []
+		for plex in aggregate["plexes"]:
+			raid_groups.extend(plex["raid_groups"])
+		return raid_groups
+
+	def _raid_tree(self, asup_url_output):
+		"""Returns SYSCONFIG-R as a list of aggregates, each an aggregate -> plex -> RAID group -> disk tree.
+		Walks the <data> block once; the Type column is located from each disk table header"""
+		match = re.search("<data>(.*?)</data>", asup_url_output, re.DOTALL)
 
 		if match:
 
-			return str(match.group(1))
+			match_return 	= [] #aggregates in report order
+			aggr_names 		= set()
+			aggregate 		= None
+			plex 			= None
+			raid_group 		= None
+			type_column 	= None
+
+			for line in match.group(1).splitlines():
+				line = line.strip()
+
+				if line.startswith("Aggregate "):
+					name = line[len("Aggregate "):].split(" (")[0]
+					if name in aggr_names: #report repeats itself from here on
+						break
+					aggr_names.add(name)
+					aggregate 	= {"name": name, "plexes": []}
+					plex 		= None
+					raid_group 	= None
+					match_return.append(aggregate)
+
+				elif line.startswith("Plex ") and aggregate:
+					plex 		= {"name": line[len("Plex "):].split(" (")[0], "raid_groups": []}
+					raid_group 	= None
+					aggregate["plexes"].append(plex)
+
+				elif line.startswith("RAID group ") and aggregate:
+					if plex == None:
+						plex = {"name": None, "raid_groups": []}
+						aggregate["plexes"].append(plex)
+					raid_group = {"name": line[len("RAID group "):].split(" (")[0].strip(), "type": "", "disks": [], "roles": {}, "types": {}}
+					plex["raid_groups"].append(raid_group)
+
+				elif line.endswith("disks"): #spare/broken/partner disk tables are not part of any aggregate
+					aggregate 	= None
+					plex 		= None
+					raid_group 	= None
+
+				elif "Type" in line.split() and (line.startswith("RAID") or line.startswith("Position")):
+					#"RAID Disk" heads a single column
+					header 		= line.replace("RAID Disk", "RAID_Disk").split()
+					type_column = header.index("Type")
+
+				elif raid_group != None and type_column != None and not line.startswith("-"):
+					tokens = line.split()
+					if len(tokens) <= type_column:
+						continue
+
+					role 		= tokens[0]
+					disk_type 	= tokens[type_column]
+					raid_group["disks"].append({"role": role, "device": tokens[1], "type": disk_type})
+					raid_group["roles"][role] 		= raid_group["roles"].get(role, 0) + 1
+					raid_group["types"][disk_type] 	= raid_group["types"].get(disk_type, 0) + 1
+
+					#RAID group type is that of its data disks
+					if not raid_group["type"] or (role == "data" and raid_group["roles"]["data"] == 1):
+						raid_group["type"] = disk_type
 
-	def _system_model(self, asup_url_output):
-		"""Returns system model/controller"""
-		line 	= asup_url_output
-		match 	= re.search("sys_model>(.*?)<", line)
+			return match_return
 
-		if match:
+	def _raid_type(self, asup_url_output):
+		"""Returns RAID type of each aggregate"""
+		return self._aggregate_info(asup_url_output)["raid_type"]
+
+	def _scan(self, pattern, asup_url_output):
+		"""Yields matches of pattern over a payload given whole or as an iterable of text chunks (streaming).
+		Only the unmatched tail after the last '<' is carried between chunks, so memory stays bounded by one element"""
+		if hasattr(asup_url_output, "find"):
+			asup_url_output = [asup_url_output]
+
+		leftover = ""
+		for chunk in asup_url_output:
+			buffer 	= leftover + chunk
+			end 	= 0
+
+			for match in pattern.finditer(buffer):
+				yield match
+				end = match.end()
+
+			#an unfinished match can only start at or after the last '<'
+			leftover 	= buffer[end:]
+			cut 		= leftover.rfind("<")
+			if cut > 0:
+				leftover = leftover[cut:]
+
+	def _system_id(self, asup_url_output):
+		"""Returns system id number"""
+		return self._overview(asup_url_output)["system_id"]
 
-			return str(match.group(1))
+	def _system_model(self, asup_url_output):
+		"""Returns system model/controller"""
+		return self._overview(asup_url_output)["system_model"]
 
 	def _serial_number(self, asup_url_output):
 		"""Returns product serial number"""
-		line 	= asup_url_output
-		match 	= re.search("sys_serial_no>(.*?)<", line)
-
-		if match:
-
-			return str(match.group(1))
+		return self._overview(asup_url_output)["serial_number"]
 
 	def _system_version(self, asup_url_output):
 		"""Returns OS version"""
-		line 	= asup_url_output
-		match 	= re.search("sys_version>(.*?)<", line)
-
-		if match:
-
-			return str(match.group(1))
+		return self._overview(asup_url_output)["system_version"]
 
 	def _volume_iops(self, asup_url_output):
 		"""Returns volume IOPs (mean)"""
-		line 			= asup_url_output
-		name_match 		= re.findall("instance_name>(.*?)<", line)
-		counter_match 	= re.findall("counter_stat_value>(.*?)<", line)
+		match_name_buffer 	= []
+		iops_count_buffer 	= []
+		counter_match 		= False
+
+		for match in self._scan(VOLUME_PATTERN, asup_url_output):
+			if match.group(1) == "counter_stat_value":
+				counter_match = True
+			if " " not in match.group(2):
+				if match.group(1) == "instance_name":
+					match_name_buffer.append(str(match.group(2)))
+				else:
+					iops_count_buffer.append(str(match.group(2)))
 
 		if counter_match:
 
-			volume_iops_dic 	= {}
-			match_name_buffer 	= []
-			iops_count_buffer 	= []
-
-			for name in name_match:
-				if " " not in name:
-					match_name_buffer.append(str(name))
-			for iops in counter_match:
-				if " " not in iops:
-					iops_count_buffer.append(str(iops))
+			volume_iops_dic = {}
 
 			for i in range(0, len(match_name_buffer)-1, 2):
 				volume_iops_dic[str(match_name_buffer[i])] = abs(round(float(iops_count_buffer[i]), 2))
@@ -574,14 +426,7 @@ class NERD():
 
 	def _warranty_status(self, asup_url_output):
 		"""Returns warranty expiration date"""
-		line 	= asup_url_output
-		match 	= re.search("warranty_end_date>(.*?)</warranty_end_date>", line)
-
-		if match:
-
-			string_date = str(match.group(1)).replace("-","")
-			date 		= datetime.strptime(string_date, '%Y%m%d').date()
-			return date
+		return self._overview(asup_url_output)["warranty_status"]
 
 	
 		
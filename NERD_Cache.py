@@ -0,0 +1,143 @@
+# FILE: 	NERD_Cache.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Persistent on-disk cache of ASUP REST responses. Entries are keyed on the
+# 			full endpoint url (dates and asup id included), expire per endpoint and
+# 			are evicted least-recently-used once the cache grows past its byte budget,
+# 			down to LOW_WATER of the budget so the next puts do not evict again.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+#Seconds each endpoint stays fresh. AGGREGATE is keyed on asup_id so it never changes.
+DEFAULT_TTLS = {
+	"overview" 			: 6*60*60,
+	"sysconfigR" 		: 24*60*60,
+	"DFA" 				: 24*60*60,
+	"iops" 				: 6*60*60,
+	"aggregate_info" 	: 30*24*60*60,
+	"volume_iops" 		: 24*60*60,
+}
+
+DEFAULT_CACHE_DIR 	= os.path.join(os.path.expanduser("~"), ".nerd_cache")
+DEFAULT_MAX_BYTES 	= 2*pow(1024, 3)
+LOW_WATER 			= 0.9 #fraction of max_bytes the cache is evicted down to
+
+
+
+class NERD_Cache():
+
+	def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None, refresh=False):
+		"""initialize cache in 'cache_dir'. 'refresh' ignores existing entries but still stores new ones"""
+		self.cache_dir 	= cache_dir
+		self.max_bytes 	= int(max_bytes)
+		self.ttls 		= dict(DEFAULT_TTLS)
+		self.refresh 	= refresh
+		self.lock 		= threading.Lock()
+		self.hits 		= 0
+		self.misses 	= 0
+
+		if ttls:
+			self.ttls.update(ttls)
+
+		if not os.path.isdir(self.cache_dir):
+			os.makedirs(self.cache_dir)
+
+		#entry file name -> entry size (bytes), least recently used first; entries of earlier runs are ordered by mtime once here
+		entries = []
+		for file_name in os.listdir(self.cache_dir):
+			if file_name.endswith(".nerd"):
+				path = os.path.join(self.cache_dir, file_name)
+				entries.append((os.path.getmtime(path), file_name, os.path.getsize(path)))
+		entries.sort()
+		self.entry_sizes = collections.OrderedDict([(file_name, size) for mtime, file_name, size in entries])
+		self.total_bytes = sum(self.entry_sizes.values())
+
+	def _entry_path(self, url):
+		"""Returns file path of the entry for url"""
+		file_name = hashlib.sha1(url.encode("utf-8")).hexdigest() + ".nerd"
+		return os.path.join(self.cache_dir, file_name)
+
+	def _get(self, url, endpoint):
+		"""Returns cached body of url, or None if missing/expired"""
+		path = self._entry_path(url)
+
+		if self.refresh or not os.path.exists(path):
+			return self._miss()
+
+		try:
+			with open(path, "rb") as f:
+				entry = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+		except (IOError, OSError, ValueError, zlib.error):
+			return self._miss()
+
+		if entry["url"] != url or time.time() - entry["fetched"] > self.ttls.get(endpoint, 0):
+			return self._miss()
+
+		#touch entry so eviction (in this run and the next ones) sees it as recently used
+		file_name = os.path.basename(path)
+		try:
+			os.utime(path, None)
+		except OSError:
+			pass
+
+		with self.lock:
+			if file_name in self.entry_sizes:
+				self.entry_sizes[file_name] = self.entry_sizes.pop(file_name)
+			self.hits += 1
+		return entry["body"]
+
+	def _miss(self):
+		"""Counts a miss. Returns None"""
+		with self.lock:
+			self.misses += 1
+		return None
+
+	def _put(self, url, endpoint, body, cacheable=True):
+		"""Stores body of url, unless it is empty or the caller found it not 'cacheable' (an ASUP error page)"""
+		if not body or not cacheable:
+			return
+
+		path 		= self._entry_path(url)
+		file_name 	= os.path.basename(path)
+		entry 		= {"url": url, "endpoint": endpoint, "fetched": time.time(), "body": body}
+		data 		= zlib.compress(json.dumps(entry).encode("utf-8"))
+
+		with self.lock:
+			temp_path = path + ".tmp{0}".format(threading.current_thread().ident)
+			with open(temp_path, "wb") as f:
+				f.write(data)
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(temp_path, path)
+
+			self.total_bytes 				-= self.entry_sizes.pop(file_name, 0)
+			self.entry_sizes[file_name] 	= len(data)
+			self.total_bytes 				+= len(data)
+
+			if self.total_bytes > self.max_bytes:
+				self._evict()
+
+	def _evict(self):
+		"""Removes least recently used entries until the cache is down to LOW_WATER of its byte budget. Called with the lock held"""
+		low_water = int(self.max_bytes*LOW_WATER)
+		while self.entry_sizes and self.total_bytes > low_water:
+			file_name, size = self.entry_sizes.popitem(last=False)
+			try:
+				os.remove(os.path.join(self.cache_dir, file_name))
+			except OSError:
+				pass
+			self.total_bytes -= size
@@ -0,0 +1,255 @@
+# FILE: 	NERD_Fetch.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Concurrent fetch engine for the ASUP REST calls made by NERD_Modeler.py.
+# 			Serials are fetched in parallel, and the endpoints of each serial are
+# 			fetched in parallel once its overview is known. Identical urls requested by
+# 			several serials at about the same time are fetched once (see NERD_Flight).
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import collections
+from multiprocessing.pool import ThreadPool
+import re
+import threading
+import time
+
+#NERD class file
+from NERD import *
+from NERD_Flight import NERD_Single_Flight
+from NERD_Retry import NERD_Error_Page, NERD_Request_Failed, NERD_Retry_Policy
+from NERD_Transport import NERD_Transport
+
+#default ASUP REST base url; any other one (a local stand-in such as benchmarks/asup_server.py) is given to NERD_Fetcher
+ASUP_BASE_URL = "http://restprd.corp.netapp.com/asup-rest-interface/ASUP_DATA/client_id/test"
+
+#endpoints that answer with an "Error" page instead of an HTTP error while restprd is busy
+ERROR_BODY_ENDPOINTS = ["aggregate_info"]
+
+#endpoint -> NERD parser that can read it chunk by chunk in streaming mode
+STREAM_PARSERS = {
+	"DFA" 				: "_dfa_capacity",
+	"aggregate_info" 	: "_aggregate_info",
+	"volume_iops" 		: "_volume_iops",
+}
+
+
+
+#################### ASUP URLS ####################
+
+def _asup_overview_url(serial_number, asup_url=ASUP_BASE_URL):
+	"""API url with storage environment overview"""
+	return asup_url + "/sys_serial_no/" + str(serial_number)
+
+def _asup_sysconfigR_url(serial_number, asup_url=ASUP_BASE_URL):
+	"""API url with storage environment configuration info (SYSCONFIG-R)"""
+	return asup_url + "/sys_serial_no/" + str(serial_number) + "/section_view/SYSCONFIG-R"
+
+def _asup_DFA_url(serial_number, start_date, end_date, asup_url=ASUP_BASE_URL):
+	"""API url with growth rate info for the requested weeks (DF-A)"""
+	return asup_url + "/sys_serial_no/" + str(serial_number) + "/start_date/" + str(start_date) + "/end_date/" + str(end_date) + "/section_view/DF-A"
+
+def _asup_iops_url(serial_number, asup_url=ASUP_BASE_URL):
+	"""API url to get system IOP info"""
+	return asup_url + "/sys_serial_no/" + str(serial_number) + "/object/system/counter_name/cifs_ops,nfs_ops,fcp_ops,iscsi_ops,cpu_busy/cvc"
+
+def _asup_aggregate_info_url(asup_id, asup_url=ASUP_BASE_URL):
+	"""API url with aggregate and raid info"""
+	return asup_url + "/asup_id/" + str(asup_id) + "/object_view/AGGREGATE"
+
+def _asup_volume_iops_url(system_id, serial_number, start_date, end_date, asup_url=ASUP_BASE_URL):
+	"""API url to get volume IOPS"""
+	return asup_url + "/system_id/" + str(system_id) + "/sys_serial_no/" + str(serial_number) + "/start_date/" + str(start_date) + "/end_date/" + str(end_date) + "/object/volume/counter_name/total_ops/stat/mean/csc/"
+
+
+
+#################### FETCH ENGINE ####################
+
+class NERD_Fetcher():
+
+	def __init__(self, start_date, end_date, volumes_info_active=True, workers=8, transport=None, cache=None, retry_policy=None, stream=False, snapshots=None, flight=None, asup_url=None, metrics=None):
+		"""initialize fetch engine. 'workers' bounds the number of ASUP requests in flight at once.
+		With 'stream' the DF-A, AGGREGATE and volume bodies are parsed as they download (not cached) and pages hold the parsed records.
+		With 'snapshots' a serial whose asup_id is unchanged only gets its overview fetched, always fresh from ASUP (see NERD_Snapshot).
+		'flight' is the single-flight registry requests go through (default: one of its own).
+		'asup_url' is the ASUP REST base url (default = ASUP_BASE_URL). Request and serial timings go to 'metrics' (NERD_Metrics) if given"""
+		self.start_date 			= start_date
+		self.end_date 				= end_date
+		self.volumes_info_active 	= volumes_info_active
+		self.workers 				= max(1, int(workers))
+		self.transport 				= transport
+		self.cache 					= cache
+		self.retry_policy 			= retry_policy
+		self.snapshots 				= snapshots
+		self.flight 				= flight
+		self.asup_url 				= asup_url or ASUP_BASE_URL
+		self.metrics 				= metrics
+		self.streamed 				= []
+		self.fresh 					= [] #endpoints never answered from the cache
+		self.in_flight 				= threading.BoundedSemaphore(self.workers) #shared by the serial and endpoint threads
+
+		if stream:
+			self.streamed = list(STREAM_PARSERS)
+
+		#the overview decides whether a snapshot is still current, so a cached one (up to its TTL old) would hide a new ASUP
+		if snapshots != None:
+			self.fresh = ["overview"]
+
+		if self.transport == None:
+			self.transport = NERD_Transport(pool_size=2*self.workers)
+		if self.retry_policy == None:
+			self.retry_policy = NERD_Retry_Policy()
+		if self.flight == None:
+			self.flight = NERD_Single_Flight(8*self.workers)
+
+	def _get(self, url, endpoint=None, fresh=False):
+		"""Returns body of ASUP url. Cached when the endpoint name is given; 'fresh' skips the cached copy but still stores the new one"""
+		if self.cache != None and endpoint != None and not fresh:
+			body = self.cache._get(url, endpoint)
+			if body != None:
+				return body
+
+		t0 		= time.time()
+		body 	= self.retry_policy._call(url, self._send, endpoint in ERROR_BODY_ENDPOINTS)
+		if self.metrics != None:
+			self.metrics._add("endpoints", endpoint or "other", time.time() - t0, len(body))
+
+		if self.cache != None and endpoint != None:
+			#other endpoints may have 'Error' in a normal body (a volume name, a status column)
+			error_page = endpoint in ERROR_BODY_ENDPOINTS and re.search("(Error)", body)
+			self.cache._put(url, endpoint, body, cacheable=not error_page)
+
+		return body
+
+	def _get_streamed(self, url, endpoint):
+		"""Returns parsed record of ASUP url, parsing the body while it downloads"""
+		parser 	= getattr(NERD(), STREAM_PARSERS[endpoint])
+		size 	= [0] #bytes of the attempt that succeeded
+
+		def _request(url):
+			size[0] = 0
+			with self.in_flight:
+				return parser(self._checked_chunks(self.transport._stream(url), endpoint in ERROR_BODY_ENDPOINTS, size))
+
+		#the parse happens while the body downloads, so its time counts as request latency
+		t0 		= time.time()
+		record 	= self.retry_policy._call(url, _request, False)
+		if self.metrics != None:
+			self.metrics._add("endpoints", endpoint, time.time() - t0, size[0])
+		return record
+
+	def _send(self, url):
+		"""Returns body of url from the transport, taking one of the 'workers' request slots while it is in flight"""
+		with self.in_flight:
+			return self.transport._get(url)
+
+	def _checked_chunks(self, chunks, error_body, size=None):
+		"""Yields chunks, raising NERD_Error_Page if ASUP sent an 'Error' page. Adds their length to size[0] if given"""
+		tail = ""
+		for chunk in chunks:
+			if error_body and re.search("(Error)", tail + chunk):
+				raise NERD_Error_Page("ASUP returned an error page")
+			tail = chunk[-4:]
+			if size != None:
+				size[0] += len(chunk)
+			yield chunk
+
+	def _request_endpoint(self, endpoint):
+		"""Returns body (or streamed record) of (endpoint name, url) pair"""
+		if endpoint[0] in self.streamed:
+			return self._get_streamed(endpoint[1], endpoint[0])
+		return self._get(endpoint[1], endpoint[0], endpoint[0] in self.fresh)
+
+	def _get_endpoint(self, endpoint):
+		"""Returns body (or streamed record) of (endpoint name, url) pair, or the NERD_Request_Failed if ASUP never answered.
+		A streamed body its parser could not read is returned as the parser's exception, so only that serial is skipped.
+		Shared with other serials asking for the same url"""
+		try:
+			return self.flight._do(endpoint[1], self._request_endpoint, endpoint)
+		except NERD_Request_Failed as e:
+			print "---- WARNING: Giving up on " + str(e) + " ----"
+			return e
+		except Exception as e:
+			if endpoint[0] not in self.streamed:
+				raise
+			return e
+
+	def _fetch_serial(self, serial_number):
+		"""Returns pages of one serial # (see _fetch_pages), timing the fetch"""
+		t0 		= time.time()
+		pages 	= self._fetch_pages(serial_number)
+		if self.metrics != None:
+			self.metrics._serial(serial_number, "fetch_seconds", time.time() - t0)
+			self.metrics._serial(serial_number, "bytes", sum([len(page) for page in pages.values() if isinstance(page, basestring)]))
+		return pages
+
+	def _fetch_pages(self, serial_number):
+		"""Returns dictionary -> Key: endpoint name; Value: response body (or streamed record) for one serial #.
+		Holds the saved NERD_System under "snapshot" instead of the remaining endpoints if the asup_id is unchanged"""
+		pages 				= {}
+		pages["failed"] 	= [] #endpoints ASUP never answered
+		pages["overview"] 	= self._get_endpoint(("overview", _asup_overview_url(serial_number, self.asup_url)))
+		if isinstance(pages["overview"], NERD_Request_Failed):
+			pages["failed"].append("overview")
+			return pages
+
+		overview 		= NERD()._overview(pages["overview"])
+		asup_id 		= overview["asup_id"]
+		system_id 		= overview["system_id"]
+
+		#no ASUP for serial #; the parse stage skips it
+		if overview["system_model"] == None or overview["location"] == None:
+			return pages
+
+		#no new ASUP since the snapshot was saved
+		if self.snapshots != None:
+			snapshot = self.snapshots._get(serial_number, asup_id, (self.end_date - self.start_date).days, self.volumes_info_active)
+			if snapshot != None:
+				pages["snapshot"] = snapshot
+				return pages
+
+		#remaining endpoints only depend on the overview, so fetch them side by side
+		endpoints = []
+		endpoints.append(("sysconfigR", _asup_sysconfigR_url(serial_number, self.asup_url)))
+		endpoints.append(("DFA", _asup_DFA_url(serial_number, self.start_date, self.end_date, self.asup_url)))
+		endpoints.append(("iops", _asup_iops_url(serial_number, self.asup_url)))
+		endpoints.append(("aggregate_info", _asup_aggregate_info_url(asup_id, self.asup_url)))
+		if self.volumes_info_active == True:
+			endpoints.append(("volume_iops", _asup_volume_iops_url(system_id, serial_number, self.start_date, self.end_date, self.asup_url)))
+
+		outputs = self.endpoint_pool.map(self._get_endpoint, endpoints)
+		for i in range(0, len(endpoints)):
+			if isinstance(outputs[i], NERD_Request_Failed):
+				pages["failed"].append(endpoints[i][0])
+			pages[endpoints[i][0]] = outputs[i]
+
+		return pages
+
+	def fetch(self, serial_numbers_list, window=None):
+		"""Yields (serial #, pages) in the order of serial_numbers_list while later serials are still being fetched.
+		At most 'window' serials (default = 2 x workers) are fetched ahead of the one last taken, so a slow consumer holds the fetch back
+		instead of piling up responses"""
+		self.serial_pool 	= ThreadPool(self.workers)
+		self.endpoint_pool 	= ThreadPool(self.workers)
+		window 				= max(1, int(window or 2*self.workers))
+
+		try:
+			pending = collections.deque() #(serial #, pending result), oldest first
+			for serial_number in serial_numbers_list:
+				pending.append((serial_number, self.serial_pool.apply_async(self._fetch_serial, (serial_number,))))
+				if len(pending) >= window:
+					serial_number, result = pending.popleft()
+					yield serial_number, result.get()
+
+			while pending:
+				serial_number, result = pending.popleft()
+				yield serial_number, result.get()
+		finally:
+			self.serial_pool.terminate()
+			self.endpoint_pool.terminate()
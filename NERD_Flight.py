@@ -0,0 +1,84 @@
+# FILE: 	NERD_Flight.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Single-flight registry. Concurrent calls for the same key (an ASUP url, or a
+# 			parser and the payload it reads) run once and every caller gets the result.
+# 			The most recent results stay shared for a while after their call finishes, so
+# 			HA partners and nodes of one cluster listed next to each other share them too.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import collections
+import threading
+
+
+
+class NERD_Flight_Call(object):
+
+	__slots__ = ("event", "result", "error")
+
+	def __init__(self):
+		"""initialize call in flight"""
+		self.event 	= threading.Event()
+		self.result = None
+		self.error 	= None
+
+
+
+class NERD_Single_Flight():
+
+	def __init__(self, keep=64):
+		"""initialize registry. The last 'keep' results stay shared after their call finishes"""
+		self.keep 		= keep
+		self.lock 		= threading.Lock()
+		self.in_flight 	= {} #dictionary -> Key: call key; Value: NERD_Flight_Call
+		self.recent 	= collections.OrderedDict() #call key -> result, oldest first
+		self.calls 		= 0 #calls actually made
+		self.saved 		= 0 #calls answered by a call in flight or a recent result
+
+	def _do(self, key, function, *args):
+		"""Returns function(*args), shared with every caller of the same key while it is in flight or recent"""
+		with self.lock:
+			if key in self.recent:
+				self.saved 			+= 1
+				result 				= self.recent.pop(key)
+				self.recent[key] 	= result
+				return result
+
+			call = self.in_flight.get(key)
+			if call == None:
+				leader 				= True
+				call 				= NERD_Flight_Call()
+				self.in_flight[key] = call
+				self.calls 			+= 1
+			else:
+				leader 		= False
+				self.saved 	+= 1
+
+		if not leader:
+			call.event.wait()
+			if call.error != None:
+				raise call.error
+			return call.result
+
+		try:
+			call.result = function(*args)
+		except Exception as e:
+			call.error = e
+			raise
+		finally:
+			with self.lock:
+				del self.in_flight[key]
+				if call.error == None and self.keep > 0:
+					self.recent[key] = call.result
+					if len(self.recent) > self.keep:
+						self.recent.popitem(last=False)
+			call.event.set()
+
+		return call.result
@@ -0,0 +1,107 @@
+# FILE: 	NERD_Forecast.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Fleet-wide growth and capacity forecast engine. Every aggregate of every serial
+# 			is stacked into one aggregates x weeks array and the growth metrics of the
+# 			Capacity Trending sheet are computed in one vectorized pass.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import itertools
+import numpy as np
+
+KB_PER_TB = float(pow(1024, 3))
+
+
+
+class NERD_Forecast():
+
+	def __init__(self):
+		"""initialize empty fleet"""
+		self.aggregates = [] #NERD_Aggregate records, one row each
+		self.weeks 		= [] #week # (0 = newest) of each value, per row
+		self.used 		= [] #used KB of each value, per row
+		self.total 		= [] #total KB of each value, per row
+
+	def _add(self, aggregate, dfa_capacity):
+		"""Adds the DF-A history of one aggregate record (see NERD._dfa_capacity). Ignored if DF-A never reported it"""
+		if aggregate.name not in dfa_capacity["used"]:
+			return
+
+		self.aggregates.append(aggregate)
+		self.weeks.append(dfa_capacity["week"][aggregate.name])
+		self.used.append(dfa_capacity["used"][aggregate.name])
+		self.total.append(dfa_capacity["total"][aggregate.name])
+
+	def _compute(self):
+		"""Fills growth_tb, growth_rate, growth_cagr and capacity_forecast of every added aggregate"""
+		if not self.aggregates:
+			return
+
+		#aggregates x weeks; weeks an aggregate did not report stay masked (NaN)
+		lengths 	= [len(weeks) for weeks in self.weeks]
+		count 		= sum(lengths)
+		rows 		= np.repeat(np.arange(len(self.aggregates)), lengths)
+		cols 		= np.fromiter(itertools.chain.from_iterable(self.weeks), dtype=int, count=count)
+		shape 		= (len(self.aggregates), cols.max() + 1)
+
+		used 				= np.full(shape, np.nan)
+		total 				= np.full(shape, np.nan)
+		used[rows, cols] 	= np.fromiter(itertools.chain.from_iterable(self.used), dtype=float, count=count)
+		total[rows, cols] 	= np.fromiter(itertools.chain.from_iterable(self.total), dtype=float, count=count)
+		reported 			= ~np.isnan(used)
+
+		with np.errstate(divide='ignore', invalid='ignore'):
+
+			#week over week growth, only where both weeks reported
+			newer 		= used[:, :-1]
+			older 		= used[:, 1:]
+			paired 		= reported[:, :-1] & reported[:, 1:]
+			pair_count 	= paired.sum(axis=1)
+
+			growth_rate_weekly 	= np.where(paired, (newer - older) / older * 100, 0).sum(axis=1) / pair_count 	#AAGR (%/week)
+			growth_kb_weekly 	= np.where(paired, newer - older, 0).sum(axis=1) / pair_count 					#KB/week
+
+			#newest and oldest reported week of each aggregate
+			row_index 	= np.arange(shape[0])
+			newest 		= reported.argmax(axis=1)
+			oldest 		= shape[1] - 1 - reported[:, ::-1].argmax(axis=1)
+			n 			= reported.sum(axis=1)
+
+			growth_cagr = (np.power(used[row_index, newest] / used[row_index, oldest], 1 / n.astype(float)) - 1) * 100
+
+			#time to 90% full
+			current_capacity 		= used[row_index, newest] / KB_PER_TB
+			ninty_percent_capacity 	= total[row_index, newest] * 0.9 / KB_PER_TB
+			capacity_forecast 		= (ninty_percent_capacity - current_capacity) / growth_rate_weekly
+
+		#forecast category; the first condition that holds wins
+		over_ninty 		= ninty_percent_capacity - current_capacity
+		category 		= np.select(
+			[growth_rate_weekly == 0, over_ninty <= 0, capacity_forecast < 0, capacity_forecast <= 12],
+			[0, 1, 2, 3], 0)
+		categories 		= ["More than one year", "Already > 90", "On decreasing trend", "This year"]
+
+		growth_tb_weekly 	= (growth_kb_weekly / KB_PER_TB).tolist()
+		growth_rate_weekly 	= growth_rate_weekly.tolist()
+		growth_cagr 		= growth_cagr.tolist()
+		category 			= category.tolist()
+
+		for i in range(0, shape[0]):
+			aggregate = self.aggregates[i]
+
+			aggregate.growth_tb 			= round(growth_tb_weekly[i], 2) * 4 #TB/month
+			aggregate.growth_cagr 			= round(growth_cagr[i], 2)
+			aggregate.capacity_forecast 	= categories[category[i]]
+
+			growth_rate = round(growth_rate_weekly[i], 2)
+			if growth_rate >= 100:
+				aggregate.growth_rate = "Over 100%. Check ASUP for details."
+			else:
+				aggregate.growth_rate = growth_rate * 4 #%/month
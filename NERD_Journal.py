@@ -0,0 +1,92 @@
+# FILE: 	NERD_Journal.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Checkpoint journal of a report run. The time span of the run is written
+# 			first, then one record per serial as soon as it is parsed (the NERD_System
+# 			and the DF-A history its forecast needs) or skipped (the reason). A run
+# 			that stops part way is resumed from the serials already in the journal.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import cPickle as pickle
+import os
+
+DEFAULT_JOURNAL_PATH = "NERD.journal"
+
+
+
+class NERD_Journal():
+
+	def __init__(self, path=DEFAULT_JOURNAL_PATH):
+		"""initialize journal kept at 'path'"""
+		self.path 	= path
+		self.file 	= None
+
+	def _write(self, record):
+		"""Appends one record and makes sure it reached the disk"""
+		if self.file == None:
+			self.file = open(self.path, "ab")
+		pickle.dump(record, self.file, pickle.HIGHEST_PROTOCOL)
+		self.file.flush()
+		os.fsync(self.file.fileno())
+
+	def _start(self, start_date, end_date, volumes_info_active):
+		"""Starts a new journal for a run, replacing any earlier one"""
+		self._close()
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		self._write({"start_date": start_date, "end_date": end_date, "volumes": volumes_info_active})
+
+	def _load(self):
+		"""Returns (run, completed) of the journal: run is the dictionary written by _start;
+		completed is dictionary -> Key: serial #; Value: (NERD_System, DF-A history or None). Returns (None, {}) if there is no journal"""
+		run 		= None
+		completed 	= {}
+
+		if not os.path.exists(self.path):
+			return run, completed
+
+		with open(self.path, "rb") as f:
+			while True:
+				try:
+					record = pickle.load(f)
+				except EOFError:
+					break
+				#a record cut short by the crash that stopped the run
+				except (pickle.UnpicklingError, ValueError, KeyError, IndexError, AttributeError, ImportError):
+					break
+
+				if run == None:
+					run = record
+				elif "system" in record:
+					completed[record["serial_number"]] = (record["system"], record["dfa_capacity"])
+				else:
+					completed.pop(record["serial_number"], None)
+
+		return run, completed
+
+	def _done(self, serial_number, system, dfa_capacity):
+		"""Records a parsed serial. 'dfa_capacity' is None if growth is already filled in (snapshot)"""
+		self._write({"serial_number": serial_number, "system": system, "dfa_capacity": dfa_capacity})
+
+	def _error(self, serial_number, reason):
+		"""Records a skipped serial"""
+		self._write({"serial_number": serial_number, "error": reason})
+
+	def _close(self):
+		"""Closes the journal file"""
+		if self.file != None:
+			self.file.close()
+			self.file = None
+
+	def _remove(self):
+		"""Deletes the journal once its run has nothing left to resume"""
+		self._close()
+		if os.path.exists(self.path):
+			os.remove(self.path)
@@ -0,0 +1,176 @@
+# FILE: 	NERD_Metrics.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Timings of one report run: time per stage, request latency and bytes per
+# 			ASUP endpoint, parse time and bytes per NERD parser, render time per sheet
+# 			and fetch/parse time per serial. Written as a JSON run report and as a
+# 			Prometheus textfile (node_exporter textfile collector), and shown while the
+# 			run goes as serials/min and ETA.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+
+#stages in the order a report runs them
+STAGES = ["fetch_wait", "parse", "forecast", "model", "render", "save"]
+
+
+
+class NERD_Metrics():
+
+	def __init__(self, serial_count=0):
+		"""initialize metrics of one run of 'serial_count' serials to fetch"""
+		self.lock 			= threading.Lock()
+		self.started 		= time.time()
+		self.finished 		= None
+		self.success 		= None
+		self.serial_count 	= serial_count
+		self.done 			= 0 #serials fetched and parsed (or skipped) so far
+		self.ready 			= 0 #serials taken from memory or the journal, done without a fetch
+		self.stages 		= dict([(stage, 0.0) for stage in STAGES])
+		self.endpoints 		= {} #dictionary -> Key: endpoint name; Value: [requests, seconds, max seconds, bytes]
+		self.parsers 		= {} #dictionary -> Key: NERD parser name; Value: [calls, seconds, max seconds, bytes]
+		self.sheets 		= {} #dictionary -> Key: sheet name; Value: render seconds
+		self.serials 		= {} #dictionary -> Key: serial #; Value: dictionary of its timings and status
+
+	def _add(self, table_name, name, seconds, size=0):
+		"""Adds one timed call to the 'endpoints' or 'parsers' table"""
+		with self.lock:
+			row = getattr(self, table_name).setdefault(name, [0, 0.0, 0.0, 0])
+			row[0] += 1
+			row[1] += seconds
+			row[2] = max(row[2], seconds)
+			row[3] += size
+
+	def _stage(self, stage, seconds):
+		"""Adds seconds to a stage"""
+		with self.lock:
+			self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+	def _sheet(self, sheet_name, seconds):
+		"""Records render time of a sheet"""
+		with self.lock:
+			self.sheets[sheet_name] = self.sheets.get(sheet_name, 0.0) + seconds
+
+	def _serial(self, serial_number, key, value):
+		"""Records a timing (added up) or status of a serial #"""
+		with self.lock:
+			serial = self.serials.setdefault(str(serial_number), {})
+			if isinstance(value, float) or isinstance(value, int):
+				serial[key] = serial.get(key, 0) + value
+			else:
+				serial[key] = value
+
+	def _ready(self, count):
+		"""Counts serials that are done without a fetch (in memory or in the journal)"""
+		with self.lock:
+			self.ready += count
+
+	def _progress(self):
+		"""Counts one more serial done. Returns progress line: done/total, serials/min and ETA.
+		Serials done without a fetch count towards done/total but not towards the rate"""
+		with self.lock:
+			self.done += 1
+			fetched = self.done
+			done 	= self.done + self.ready
+			total 	= max(self.serial_count, done)
+
+		elapsed = max(time.time() - self.started, 0.001)
+		rate 	= fetched * 60.0 / elapsed
+		eta 	= timedelta(seconds=int(round((total - done) * 60.0 / rate)))
+		return "[{0}/{1} | {2:.1f} serials/min | ETA {3}]".format(done, total, rate, eta)
+
+	def _finish(self, success):
+		"""Marks the end of the run"""
+		self.finished 	= time.time()
+		self.success 	= success
+
+	def _seconds(self):
+		"""Returns seconds since the run started (until it finished)"""
+		return (self.finished or time.time()) - self.started
+
+	def _summary(self):
+		"""Returns one line of seconds per stage"""
+		return ", ".join(["{0} {1:.2f}s".format(stage.replace("_", " "), self.stages[stage]) for stage in STAGES])
+
+	def _table(self, table):
+		"""Returns dictionary of a timing table as JSON records"""
+		records = {}
+		for name, row in table.items():
+			records[name] = {"count": row[0], "seconds": round(row[1], 4), "mean_seconds": round(row[1] / row[0], 4), "max_seconds": round(row[2], 4), "bytes": row[3]}
+		return records
+
+	def _report(self, stats={}):
+		"""Returns the run report (dictionary). 'stats' are the pipeline counts (see NERD_Pipeline._stats)"""
+		seconds 	= self._seconds()
+		reported 	= len([serial for serial in self.serials.values() if serial.get("status") == "reported"])
+		skipped 	= len([serial for serial in self.serials.values() if serial.get("status") == "skipped"])
+		return {
+			"started": 				datetime.fromtimestamp(self.started).isoformat(),
+			"seconds": 				round(seconds, 3),
+			"success": 				self.success,
+			"serials": 				{"total": self.serial_count, "reported": reported, "skipped": skipped},
+			"serials_per_minute": 	round(self.done * 60.0 / max(seconds, 0.001), 2),
+			"stages": 				dict([(stage, round(value, 4)) for stage, value in self.stages.items()]),
+			"endpoints": 			self._table(self.endpoints),
+			"parsers": 				self._table(self.parsers),
+			"sheets": 				dict([(sheet, round(value, 4)) for sheet, value in self.sheets.items()]),
+			"serial_numbers": 		self.serials,
+			"pipeline": 			stats,
+		}
+
+	def _write_json(self, path, stats={}):
+		"""Writes the run report to path as JSON"""
+		with open(path, "w") as f:
+			json.dump(self._report(stats), f, indent=1, sort_keys=True)
+
+	def _prometheus(self, stats={}):
+		"""Returns the run in the Prometheus text format (gauges of the last report)"""
+		report 	= self._report(stats)
+		lines 	= []
+
+		def metric(name, help_text, samples):
+			lines.append("# HELP {0} {1}".format(name, help_text))
+			lines.append("# TYPE {0} gauge".format(name))
+			for labels, value in samples:
+				label_text = ",".join(['{0}="{1}"'.format(key, str(label).replace("\\", "\\\\").replace('"', '\\"')) for key, label in labels])
+				lines.append("{0}{1} {2}".format(name, "{" + label_text + "}" if label_text else "", repr(float(value))))
+
+		metric("nerd_report_success", "1 if the last report was saved", [([], 1 if report["success"] else 0)])
+		metric("nerd_report_finished_timestamp_seconds", "Unix time the last report finished", [([], self.finished or time.time())])
+		metric("nerd_report_duration_seconds", "Run time of the last report", [([], report["seconds"])])
+		metric("nerd_report_serials", "Serial numbers in the last report by status",
+			[([("status", status)], report["serials"][status]) for status in ("total", "reported", "skipped")])
+		metric("nerd_report_serials_per_minute", "Serial numbers fetched and parsed per minute", [([], report["serials_per_minute"])])
+		metric("nerd_stage_seconds", "Seconds spent in each stage", [([("stage", stage)], self.stages[stage]) for stage in STAGES])
+
+		for table_name, label in (("endpoints", "endpoint"), ("parsers", "parser")):
+			table = report[table_name]
+			names = sorted(table)
+			metric("nerd_{0}_calls".format(label), "Calls per {0}".format(label), [([(label, name)], table[name]["count"]) for name in names])
+			metric("nerd_{0}_seconds".format(label), "Total seconds per {0}".format(label), [([(label, name)], table[name]["seconds"]) for name in names])
+			metric("nerd_{0}_max_seconds".format(label), "Slowest call per {0}".format(label), [([(label, name)], table[name]["max_seconds"]) for name in names])
+			metric("nerd_{0}_bytes".format(label), "Payload bytes per {0}".format(label), [([(label, name)], table[name]["bytes"]) for name in names])
+
+		metric("nerd_sheet_render_seconds", "Seconds to render each sheet", [([("sheet", sheet)], report["sheets"][sheet]) for sheet in sorted(report["sheets"])])
+		metric("nerd_pipeline", "Pipeline counts (requests, connections, retries, cache and snapshot hits)",
+			[([("stat", name)], value) for name, value in sorted(stats.items()) if isinstance(value, (int, long, float))])
+
+		return "\n".join(lines) + "\n"
+
+	def _write_prometheus(self, path, stats={}):
+		"""Writes the run as a Prometheus textfile. Replaced atomically, so the collector never reads half a file"""
+		temp_path = path + ".tmp"
+		with open(temp_path, "w") as f:
+			f.write(self._prometheus(stats))
+		os.rename(temp_path, path)
@@ -0,0 +1,768 @@
+# FILE: 	NERD_Pipeline.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Library API of NERD. A report runs in separate stages that can be called
+# 			with a list of serials: fetch (ASUP responses), parse (one NERD_System per
+# 			serial), model (growth forecast and sheet dictionaries) and render (workbook).
+# 			In a report the stages stream into each other through bounded queues, so the
+# 			sheet dictionaries fill while later serials are still being fetched; the
+# 			render merges them into sorted sheet order once the last serial is in.
+# 			A pipeline keeps its connection pool, response cache and parsed systems
+# 			from one report to the next (see NERD_Service).
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import collections
+from datetime import date, timedelta
+import Queue
+import signal
+import sys
+import threading
+import time
+
+#NERD class file
+from NERD import *
+from NERD_Flight import NERD_Single_Flight
+from NERD_Metrics import NERD_Metrics
+from NERD_Records import NERD_Aggregate, NERD_Raid_Group, NERD_System, NERD_Volume
+
+MERGE_QUEUE_SIZE 	= 64 #parsed serials waiting for the model-merge stage
+FORECAST_BATCH 		= 64 #serials whose growth is computed at once while the fetch goes on
+
+#Stage modules (requests, numpy, openpyxl) are imported when their stage first runs, so
+#'--help', a bad argument or importing this module skips them (see benchmarks/startup.py)
+
+
+
+#################### SHEET HEADERS ####################
+
+def _location_sheet_column_headers():
+	location_sheet_column_headers = []
+
+	location_sheet_column_headers.append("Location")
+	location_sheet_column_headers.append("Cluster Name")
+	location_sheet_column_headers.append("Host Name")
+	location_sheet_column_headers.append("Controller")
+	location_sheet_column_headers.append("Serial Number")
+	location_sheet_column_headers.append("OS Version")
+	location_sheet_column_headers.append("Application")
+	location_sheet_column_headers.append("Warranty End Date")
+
+	return location_sheet_column_headers
+
+def _raid_info_sheet_column_headers():
+	raid_info_sheet_column_headers = []
+
+	raid_info_sheet_column_headers.append("Cluster Name")
+	raid_info_sheet_column_headers.append("Host Name")
+	raid_info_sheet_column_headers.append("Controller")
+	raid_info_sheet_column_headers.append("Serial Number")
+	raid_info_sheet_column_headers.append("OS Version")
+	raid_info_sheet_column_headers.append("Aggr Name")
+	raid_info_sheet_column_headers.append("RAID Type")
+	raid_info_sheet_column_headers.append("RAID Layout")
+	raid_info_sheet_column_headers.append("Data Disks Per RAID Group")
+	raid_info_sheet_column_headers.append("Aggr Capacity (TB)")
+	raid_info_sheet_column_headers.append("Aggr Util (%)")
+
+	return raid_info_sheet_column_headers
+
+def _capacity_trending_sheet_column_headers():
+	capacity_trending_sheet_column_headers = []
+
+	capacity_trending_sheet_column_headers.append("Cluster Name")
+	capacity_trending_sheet_column_headers.append("Host Name")
+	capacity_trending_sheet_column_headers.append("Controller")
+	capacity_trending_sheet_column_headers.append("Serial Number")
+	capacity_trending_sheet_column_headers.append("Aggr Name")
+	capacity_trending_sheet_column_headers.append("Average Growth (TB/month)")
+	capacity_trending_sheet_column_headers.append("Average Growth Rate (%/month)")
+	capacity_trending_sheet_column_headers.append("90% Capacity")
+
+	return capacity_trending_sheet_column_headers
+
+def _performance_sheet_column_headers_1():
+	performance_sheet_column_headers_1 = []
+
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("st_dev + avg")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("")
+	performance_sheet_column_headers_1.append("Max")
+
+	return performance_sheet_column_headers_1
+
+def _performance_sheet_column_headers_2():
+	performance_sheet_column_headers_2 = []
+
+	performance_sheet_column_headers_2.append("Cluster Name")
+	performance_sheet_column_headers_2.append("Host Name")
+	performance_sheet_column_headers_2.append("Controller")
+	performance_sheet_column_headers_2.append("Serial Number")
+	performance_sheet_column_headers_2.append("CPU%")
+	performance_sheet_column_headers_2.append("CIFS (IOPS)")
+	performance_sheet_column_headers_2.append("FCP (IOPS)")
+	performance_sheet_column_headers_2.append("iSCI (IOPS)")
+	performance_sheet_column_headers_2.append("NFS (IOPS)")
+	performance_sheet_column_headers_2.append("Latency (ms)")
+
+	return performance_sheet_column_headers_2
+
+def _volumes_sheet_column_headers():
+	volumes_sheet_column_headers = []
+
+	volumes_sheet_column_headers.append("Cluster Name")
+	volumes_sheet_column_headers.append("Host Name")
+	volumes_sheet_column_headers.append("Controller")
+	volumes_sheet_column_headers.append("Serial Number")
+	volumes_sheet_column_headers.append("Volume Name")
+	volumes_sheet_column_headers.append("IOPS (avg)")
+
+	return volumes_sheet_column_headers
+
+
+
+class NERD_Report_Error(Exception):
+	"""Raised when a serial # cannot be reported on. The message says what to do before running again"""
+	pass
+
+
+
+#################### PARSE STAGE ####################
+
+def _parse_pages(serial_number, pages, volumes_info_active, parse, shared_parse):
+	"""Returns (NERD_System, DF-A history for its forecast) of one serial # from its fetched pages. Pages already parsed while streaming are used as they are.
+	parse(parser name, body) runs a NERD parser; shared_parse does the same for payloads other serials may share. Raises NERD_Report_Error"""
+	#a streamed body that could not be parsed is held as the parser's exception (see NERD_Fetcher._get_endpoint)
+	for name, page in sorted(pages.items()):
+		if isinstance(page, Exception):
+			raise NERD_Report_Error("Could not read " + name + " info for serial number: " + str(serial_number) + " (" + str(page) + "). Check ASUP and remove SN# " + str(serial_number))
+
+	#storage environment overview
+	overview 			= parse("_overview", pages["overview"])
+	asup_id 			= overview["asup_id"]
+	asup_received_date 	= overview["asup_received_date"]
+	biz_key 			= overview["biz_key"]
+	cluster_name 		= overview["cluster_name"]
+	host_name 			= overview["host_name"]
+	location 			= overview["location"]
+	os_version 			= overview["system_version"]
+	system_id			= overview["system_id"]
+	system_model		= overview["system_model"]
+	asup_serial_number 	= overview["serial_number"]
+	warranty_status 	= overview["warranty_status"]
+
+	if system_model == None or location == None:
+		raise NERD_Report_Error("No ASUP information for SN# " + str(serial_number))
+
+	#storage environment configuration info (SYSCONFIG-R)
+	raid_tree 			= shared_parse("_raid_tree", pages["sysconfigR"])
+	if not raid_tree:
+		raise NERD_Report_Error("No SYSCONFIG-R info for serial number: " + str(serial_number) + ". Check ASUP and remove SN# " + str(serial_number))
+
+	aggr_name 			= parse("_aggr_name", raid_tree)
+	disk_count 			= parse("_disk_count", raid_tree)
+	disk_type_count 	= parse("_disk_type_count", raid_tree)
+	raid_group_count 	= parse("_raid_group_count", raid_tree)
+
+	#growth rate info for past 24 weeks (DF-A)
+	dfa_capacity = pages["DFA"]
+	if isinstance(dfa_capacity, basestring):
+		dfa_capacity = shared_parse("_dfa_capacity", dfa_capacity)
+
+	if dfa_capacity == None:
+		raise NERD_Report_Error("No ASUP report recieved during specified time span for SN# " + str(serial_number) + ". See ASUP to find last report and increase 'weeks' argument")
+
+	#system IOP info
+	performance_iops = parse("_performance_iops", pages["iops"])
+
+	#aggregate and raid info
+	aggregate_info = pages["aggregate_info"]
+	if isinstance(aggregate_info, basestring):
+		aggregate_info = shared_parse("_aggregate_info", aggregate_info)
+
+	aggr_capacity 	= aggregate_info["capacity"]
+	aggr_util 		= aggregate_info["util"]
+	raid_type 		= aggregate_info["raid_type"]
+
+	if aggr_capacity == None or aggr_util == None or raid_type == None:
+		raise NERD_Report_Error("No AGGREGATE info for serial number: " + str(serial_number) + ". Check ASUP and remove SN# " + str(serial_number))
+
+	for name in aggr_name:
+		if name not in aggr_capacity or name not in aggr_util or name not in raid_type:
+			raise NERD_Report_Error("Aggregate " + name + " of serial number: " + str(serial_number) + " is missing from its AGGREGATE info. Check ASUP and remove SN# " + str(serial_number))
+
+	#volume IOPS
+	if volumes_info_active == True:
+		volume_iops = pages["volume_iops"]
+		if isinstance(volume_iops, basestring):
+			volume_iops = shared_parse("_volume_iops", volume_iops)
+
+		if volume_iops == None:
+			raise NERD_Report_Error("No volume IOPS info for serial number: " + str(serial_number) + ". Check ASUP and remove SN# " + str(serial_number))
+
+	#Keep a compact record of the system; the raw responses are not kept past this serial
+	system = NERD_System(asup_serial_number, asup_id, asup_received_date, biz_key, cluster_name, host_name, location, os_version, system_id, system_model, warranty_status, performance_iops)
+
+	for name in aggr_name:
+		raid_groups = [NERD_Raid_Group(raid_group) for raid_group in raid_group_count[name]]
+		aggregate 	= NERD_Aggregate(name, raid_type[name], raid_groups, disk_type_count[name], disk_count[name], aggr_capacity[name], aggr_util[name])
+		system.aggregates.append(aggregate)
+
+	if volumes_info_active == True:
+		for name in volume_iops:
+			system.volumes.append(NERD_Volume(name, volume_iops[name]))
+
+	return system, dfa_capacity
+
+def _parse_worker_init():
+	"""Parse workers leave Ctrl-C to the parent process. Under -profile they start with the parent's method counters, at zero"""
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+	profile = sys.modules.get("NERD_Profile")
+	if profile != None:
+		profile._take_counts()
+
+def _parse_in_worker(serial_number, pages, volumes_info_active):
+	"""Parse stage run in a worker process. Returns (NERD_System, DF-A history, list of (parser name, seconds, bytes),
+	NERD method counts for -profile or None). Raises NERD_Report_Error"""
+	nerd 	= NERD()
+	timings = []
+
+	def parse(parser_name, body):
+		t0 		= time.time()
+		result 	= getattr(nerd, parser_name)(body)
+		timings.append((parser_name, time.time() - t0, len(body) if isinstance(body, basestring) else 0))
+		return result
+
+	system, dfa_capacity = _parse_pages(serial_number, pages, volumes_info_active, parse, parse)
+
+	counts 	= None
+	profile = sys.modules.get("NERD_Profile")
+	if profile != None:
+		counts = profile._take_counts()
+	return system, dfa_capacity, timings, counts
+
+
+
+#################### MODEL STAGE ####################
+
+class NERD_Sheet_Model():
+
+	def __init__(self, volumes_info_active=True):
+		"""initialize empty sheet dictionaries. Systems are added one at a time, in report order, as soon as their growth is known"""
+		self.volumes_info_active 			= volumes_info_active
+		self.location_dictionary 			= {}
+		self.cluster_dictionary 			= {}
+		self.capacity_trending_dictionary 	= {}
+		self.performance_dictionary 		= {}
+		self.volumes_dictionary 			= {}
+		self.no_cluster_count 				= 0
+
+	def _add(self, system):
+		"""Adds the rows of one NERD_System (growth filled in) to every sheet dictionary"""
+		cluster_name 	= system.cluster_name
+		host_name 		= system.host_name
+		location 		= system.location
+
+		if location not in self.location_dictionary:
+			self.location_dictionary[location] = {}
+
+		if cluster_name == None:
+			cluster_name = "No_Cluster_Name_{0}".format(self.no_cluster_count)
+			self.no_cluster_count+=1
+
+		#if cluster_name not in location_dictionary:
+		if cluster_name not in self.cluster_dictionary or "No_Cluster" in cluster_name:
+			self.cluster_dictionary[cluster_name] 			= {}
+			self.capacity_trending_dictionary[cluster_name] = {}
+			self.performance_dictionary[cluster_name] 		= {}
+			self.location_dictionary[location][cluster_name] = []
+			self.volumes_dictionary[cluster_name] 			= {}
+
+		if host_name not in self.cluster_dictionary[cluster_name]:
+			self.cluster_dictionary[cluster_name][host_name] 			= []
+			self.capacity_trending_dictionary[cluster_name][host_name] 	= []
+			self.performance_dictionary[cluster_name][host_name] 		= []
+			self.volumes_dictionary[cluster_name][host_name] 			= []
+
+		for aggregate in system.aggregates:
+			self.cluster_dictionary[cluster_name][host_name].append([system.system_model, system.serial_number, system.os_version, aggregate.name, aggregate.raid_type, aggregate._raid_layout(), aggregate.disks, aggregate.capacity, aggregate.util])
+			self.capacity_trending_dictionary[cluster_name][host_name].append([system.system_model, system.serial_number, aggregate.name, aggregate.growth_tb, aggregate.growth_rate, aggregate.capacity_forecast])
+
+		for volume in system.volumes:
+			self.volumes_dictionary[cluster_name][host_name].append([system.system_model, system.serial_number, volume.name, volume.iops])
+
+		self.performance_dictionary[cluster_name][host_name].append(system.system_model)
+		self.performance_dictionary[cluster_name][host_name].append(system.serial_number)
+		self.performance_dictionary[cluster_name][host_name].extend(system.performance)
+		self.location_dictionary[location][cluster_name].append([host_name, system.system_model, system.serial_number, system.os_version, "", system.warranty_status])
+
+	def _sheets(self):
+		"""Returns dictionary -> Key: sheet name; Value: sheet dictionary (None for Volumes if inactive). The renderer merges each one into sorted sheet order"""
+		sheets = {}
+		sheets["Locations"] 			= self.location_dictionary
+		sheets["Raid Info"] 			= self.cluster_dictionary
+		sheets["Capacity Trending"] 	= self.capacity_trending_dictionary
+		sheets["Performance"] 			= self.performance_dictionary
+		sheets["Volumes"] 				= self.volumes_dictionary if self.volumes_info_active == True else None
+
+		return sheets
+
+
+
+class NERD_Merge_Stage():
+
+	def __init__(self, pipeline, keys, days, volumes_info_active, parsed, forecast, model=None, journal=None):
+		"""initialize model-merge stage of one report ('days' time span), run in its own thread while serials are still fetched and parsed.
+		It takes parsed serials from a bounded queue, checkpoints them in 'journal', computes their growth in batches ('forecast' holds
+		the serials not computed yet) and adds the systems to 'model' (NERD_Sheet_Model) in the order of keys"""
+		self.pipeline 				= pipeline
+		self.keys 					= keys
+		self.days 					= days
+		self.volumes_info_active 	= volumes_info_active
+		self.parsed 	= parsed #dictionary -> Key: serial #; Value: NERD_System
+		self.forecast 	= forecast
+		self.model 		= model
+		self.journal 	= journal
+		self.queue 		= Queue.Queue(MERGE_QUEUE_SIZE)
+		self.pending 	= [] #serial #s parsed from fresh responses whose growth is not computed yet
+		self.skipped 	= set()
+		self.next_key 	= 0 #position in keys of the next system the model takes
+		self.error 		= None #sys.exc_info() of an exception in the stage thread
+		self.thread 	= None
+
+	def _start(self):
+		"""Starts the stage thread"""
+		self.thread 		= threading.Thread(target=self._run, name="NERD-merge")
+		self.thread.daemon 	= True
+		self.thread.start()
+
+	def _send(self, item):
+		"""Puts item on the queue, waiting while it is full (unless the stage thread is gone)"""
+		while self.thread.is_alive():
+			try:
+				self.queue.put(item, timeout=0.1)
+				return
+			except Queue.Full:
+				pass
+
+	def _put(self, serial_number, outcome):
+		"""Hands over one parsed serial: (NERD_System, DF-A history) or the NERD_Report_Error that skips it"""
+		self._check()
+		self._send((serial_number, outcome))
+
+	def _stop(self):
+		"""Waits for the stage to merge everything handed over"""
+		self._send(None)
+		while self.thread.is_alive():
+			self.thread.join(0.1)
+
+	def _check(self):
+		"""Raises the exception that ended the stage thread, if any"""
+		if self.error != None:
+			raise self.error[0], self.error[1], self.error[2]
+
+	def _run(self):
+		"""Stage thread. Merges serials until the end of the report"""
+		try:
+			while True:
+				item = self.queue.get()
+				if item == None:
+					break
+				self._merge(*item)
+
+				#growth is computed in batches; a batch also ends whenever the queue runs dry, so the model never waits on the forecast
+				if len(self.pending) >= FORECAST_BATCH or (self.pending and self.queue.empty()):
+					self._compute()
+			self._compute()
+		except Exception:
+			self.error = sys.exc_info()
+
+	def _merge(self, serial_number, outcome):
+		"""Checkpoints one parsed serial and queues it for the forecast"""
+		if isinstance(outcome, NERD_Report_Error):
+			self.skipped.add(serial_number)
+			if self.journal != None:
+				self.journal._error(serial_number, str(outcome))
+			self._advance()
+			return
+
+		system, dfa_capacity = outcome
+		self.parsed[serial_number] = system
+		if dfa_capacity != None:
+			self.pending.append(serial_number)
+			for aggregate in system.aggregates:
+				self.forecast._add(aggregate, dfa_capacity)
+		if self.journal != None:
+			self.journal._done(serial_number, system, dfa_capacity)
+		self._advance()
+
+	def _compute(self):
+		"""Computes growth of the pending serials, snapshots them and adds every system now complete to the model"""
+		from NERD_Forecast import NERD_Forecast
+
+		t0 = time.time()
+		self.forecast._compute()
+		self.forecast = NERD_Forecast()
+		self.pipeline.metrics._stage("forecast", time.time() - t0)
+
+		if self.pipeline.snapshots != None:
+			for serial_number in self.pending:
+				self.pipeline.snapshots._put(serial_number, self.parsed[serial_number], self.days, self.volumes_info_active)
+		self.pending = []
+
+		self._advance()
+
+	def _advance(self):
+		"""Adds systems to the model in the order of keys, up to the first one not parsed or still waiting for its growth"""
+		waiting = set(self.pending)
+		t0 		= time.time()
+		while self.next_key < len(self.keys):
+			key = self.keys[self.next_key]
+			if key in self.pipeline.systems:
+				system = self.pipeline.systems[key]
+			elif key[0] in self.parsed and key[0] not in waiting:
+				system = self.parsed[key[0]]
+			elif key[0] in self.skipped:
+				self.next_key += 1
+				continue
+			else:
+				break
+
+			if self.model != None:
+				self.model._add(system)
+			self.next_key += 1
+		self.pipeline.metrics._stage("model", time.time() - t0)
+
+
+
+#################### PIPELINE ####################
+
+class NERD_Pipeline():
+
+	def __init__(self, workers=8, pool_size=None, connect_timeout=10, read_timeout=300, retries=8, retry_budget=500, cache=None, stream=False, snapshots=None, asup_url=None, parse_workers=0):
+		"""initialize pipeline. Connection pool, retry policy (circuit breakers), response cache and snapshots are shared by every report it runs.
+		'asup_url' is the ASUP REST base url (default = the production one in NERD_Fetch).
+		'workers' bounds the ASUP requests in flight; 'parse_workers' processes parse the payloads while later serials are fetched (0 = parse in this process)"""
+		from NERD_Retry import NERD_Retry_Policy
+		from NERD_Transport import NERD_Transport
+
+		self.workers 		= max(1, int(workers))
+		self.parse_workers 	= max(0, int(parse_workers))
+		self.parse_pool 	= None #multiprocessing pool, started by the first report that needs it
+		self.transport 		= NERD_Transport(pool_size or 2*self.workers, connect_timeout, read_timeout)
+		self.retry_policy 	= NERD_Retry_Policy(retries, retry_budget=retry_budget)
+		self.cache 			= cache
+		self.stream 		= stream
+		self.snapshots 		= snapshots
+		self.asup_url 		= asup_url
+		self.nerd 			= NERD()
+		self.lock 			= threading.Lock() #one report at a time
+		self.systems 		= {} #dictionary -> Key: (serial #, start date, end date, volumes); Value: parsed NERD_System (growth filled in)
+		self.parse_flight 	= NERD_Single_Flight(2*self.workers)
+		self.requests_saved = 0 #requests answered by an identical one (see NERD_Flight)
+		self.parses_saved 	= 0 #payloads parsed once for several serials
+		self.metrics 		= NERD_Metrics() #timings of the last report
+
+	def _fetch(self, serial_numbers_list, start_date, end_date, volumes_info_active=True, flight=None):
+		"""Fetch stage. Yields (serial #, pages) in the order of serial_numbers_list (see NERD_Fetcher.fetch). Requests go through 'flight' if given"""
+		from NERD_Fetch import NERD_Fetcher
+
+		fetcher = NERD_Fetcher(start_date, end_date, volumes_info_active, self.workers, self.transport, self.cache, self.retry_policy, self.stream, self.snapshots, flight, self.asup_url, self.metrics)
+		return fetcher.fetch(serial_numbers_list)
+
+	def _run_parser(self, parser_name, body):
+		"""Returns NERD parser 'parser_name' applied to body, timed"""
+		t0 		= time.time()
+		result 	= getattr(self.nerd, parser_name)(body)
+		self.metrics._add("parsers", parser_name, time.time() - t0, len(body) if isinstance(body, basestring) else 0)
+		return result
+
+	def _shared_parse(self, parser_name, body):
+		"""Returns NERD parser 'parser_name' applied to body. Identical payloads (HA partners, views shared by a cluster) are parsed once"""
+		return self.parse_flight._do((parser_name, body), self._run_parser, parser_name, body)
+
+	def _parse(self, serial_number, pages, volumes_info_active=True):
+		"""Parse stage. Returns (NERD_System, DF-A history for its forecast) of one serial #.
+		Pages already parsed while streaming are used as they are, and so is a snapshot of an unchanged serial (growth already filled in; no DF-A history).
+		Raises NERD_Report_Error"""
+		if pages["failed"]:
+			raise NERD_Report_Error("Server not responding for serial number: " + str(serial_number) + ". Check ASUP and remove SN# " + str(serial_number))
+
+		if "snapshot" in pages:
+			return pages["snapshot"], None
+
+		return _parse_pages(serial_number, pages, volumes_info_active, self._run_parser, self._shared_parse)
+
+	def _collect(self, serial_number, pages, volumes_info_active, parse_result=None):
+		"""Returns (NERD_System, DF-A history) of one fetched serial #, or the NERD_Report_Error that skips it.
+		'parse_result' is the pending result of a parse worker, if one was given the pages"""
+		t0 = time.time()
+		try:
+			if parse_result == None:
+				outcome = self._parse(serial_number, pages, volumes_info_active)
+			else:
+				system, dfa_capacity, timings, counts = parse_result.get()
+				for parser_name, seconds, size in timings:
+					self.metrics._add("parsers", parser_name, seconds, size)
+				if counts != None:
+					sys.modules["NERD_Profile"]._merge_counts(counts)
+				outcome = (system, dfa_capacity)
+		except NERD_Report_Error as e:
+			outcome = e
+		except Exception as e:
+			#a payload no parser expected skips this serial, not the run
+			outcome = NERD_Report_Error("Could not parse ASUP info for serial number: " + str(serial_number) + " (" + type(e).__name__ + ": " + str(e) + "). Check ASUP and remove SN# " + str(serial_number))
+		seconds = time.time() - t0
+
+		self.metrics._stage("parse", seconds)
+		if parse_result != None and not isinstance(outcome, NERD_Report_Error):
+			seconds = sum([timing[1] for timing in timings]) #time in the worker, not the wait for it
+		self.metrics._serial(serial_number, "parse_seconds", seconds)
+		return outcome
+
+	def _parsed(self, results, volumes_info_active=True):
+		"""Parse stage over fetched (serial #, pages). Yields (serial #, (NERD_System, DF-A history) or NERD_Report_Error) in fetch order.
+		With parse workers up to 2 x parse_workers serials are parsed in other processes while the next ones are fetched"""
+		pending = collections.deque() #(serial #, pages, pending parse result or None), oldest first
+		while True:
+			#time this loop spends waiting on ASUP rather than parsing
+			t0 = time.time()
+			try:
+				serial_number, pages = next(results)
+			except StopIteration:
+				break
+			self.metrics._stage("fetch_wait", time.time() - t0)
+
+			parse_result = None
+			if self.parse_pool != None and not pages["failed"] and "snapshot" not in pages:
+				parse_result = self.parse_pool.apply_async(_parse_in_worker, (serial_number, pages, volumes_info_active))
+			pending.append((serial_number, pages, parse_result))
+
+			while pending and (len(pending) > 2*self.parse_workers or pending[0][2] == None or pending[0][2].ready()):
+				serial_number, pages, parse_result = pending.popleft()
+				yield serial_number, self._collect(serial_number, pages, volumes_info_active, parse_result)
+
+		while pending:
+			serial_number, pages, parse_result = pending.popleft()
+			yield serial_number, self._collect(serial_number, pages, volumes_info_active, parse_result)
+
+	def _systems(self, serial_numbers_list, start_date, end_date, volumes_info_active=True, journal=None, completed={}, model=None):
+		"""Fetch, parse and model-merge stages. Returns (NERD_System of every serial # that could be reported, in order, growth filled in;
+		list of (serial #, reason) of the serials skipped). Serials that fail are skipped and the rest carry on.
+		Systems this pipeline already parsed for the same time span and serials 'completed' by an earlier run (see NERD_Journal._load)
+		are not fetched again. Every serial is recorded in 'journal' as soon as it is parsed or skipped.
+		The stages overlap: fetched serials wait in a bounded window, parsed ones in a bounded queue to the merge stage, which fills
+		'model' (NERD_Sheet_Model) in report order while later serials are still being fetched"""
+		from NERD_Forecast import NERD_Forecast
+
+		keys = [(serial_number, start_date, end_date, volumes_info_active) for serial_number in serial_numbers_list]
+
+		#systems of earlier days are out of date
+		for key in self.systems.keys():
+			if key[2] != end_date:
+				del self.systems[key]
+
+		parsed 		= {}
+		errors 		= []
+		forecast 	= NERD_Forecast()
+
+		for key in keys:
+			if key in self.systems:
+				self.metrics._serial(key[0], "status", "reported")
+				self.metrics._serial(key[0], "source", "memory")
+
+		for key in keys:
+			if key not in self.systems and key[0] in completed and key[0] not in parsed:
+				system, dfa_capacity 	= completed[key[0]]
+				parsed[key[0]] 			= system
+				self.metrics._serial(key[0], "status", "reported")
+				self.metrics._serial(key[0], "source", "journal")
+				if dfa_capacity != None:
+					for aggregate in system.aggregates:
+						forecast._add(aggregate, dfa_capacity)
+
+		missing = []
+		for key in keys:
+			if key not in self.systems and key[0] not in parsed and key[0] not in missing:
+				missing.append(key[0])
+
+		#the total stays every serial of the report; the ones in memory or the journal are done already
+		self.metrics._ready(len(set([key[0] for key in keys if key in self.systems])) + len(parsed))
+
+		#started before the fetch threads, so the workers are forked from a process with no requests in flight
+		if self.parse_workers > 0 and self.parse_pool == None and missing:
+			import multiprocessing
+			self.parse_pool = multiprocessing.Pool(self.parse_workers, _parse_worker_init)
+
+		#serials completed by an earlier run get their growth first, so the model can take them straight away
+		merge = NERD_Merge_Stage(self, keys, (end_date - start_date).days, volumes_info_active, parsed, forecast, model, journal)
+		merge._compute()
+		merge._start()
+
+		flight 	= NERD_Single_Flight(2*self.workers)
+		results = self._fetch(missing, start_date, end_date, volumes_info_active, flight)
+		parsed_results = self._parsed(results, volumes_info_active)
+		try:
+			for serial_number, outcome in parsed_results:
+				print "GETTING INFO FOR SERIAL NUM: " + str(serial_number) + " " + self.metrics._progress()
+				if isinstance(outcome, NERD_Report_Error):
+					self.metrics._serial(serial_number, "status", "skipped")
+					print "---- WARNING: " + str(outcome) + " ----"
+					print "Skipping SN# " + str(serial_number) + ". Continuing with the remaining serial numbers."
+					errors.append((serial_number, str(outcome)))
+				else:
+					self.metrics._serial(serial_number, "status", "reported")
+					self.metrics._serial(serial_number, "source", "asup" if outcome[1] != None else "snapshot")
+
+				#journal, growth, snapshot and model are done by the merge stage while the next serials are parsed
+				merge._put(serial_number, outcome)
+		finally:
+			parsed_results.close()
+			results.close()
+
+			#everything handed over is merged (and checkpointed) even if the fetch stopped
+			merge._stop()
+
+			#payloads are only shared within one report
+			self.requests_saved 	+= flight.saved
+			self.parses_saved 		+= self.parse_flight.saved
+			self.parse_flight 		= NERD_Single_Flight(2*self.workers)
+		merge._check()
+
+		for serial_number in parsed:
+			self.systems[(serial_number, start_date, end_date, volumes_info_active)] = parsed[serial_number]
+
+		return [self.systems[key] for key in keys if key in self.systems], errors
+
+	def _model(self, systems, volumes_info_active=True):
+		"""Model stage. Returns dictionary -> Key: sheet name; Value: sheet dictionary filled from the systems (None for Volumes if inactive)"""
+		model = NERD_Sheet_Model(volumes_info_active)
+		for system in systems:
+			model._add(system)
+
+		return model._sheets()
+
+	def _workbook(self, sheets, asup_received_date, write_only=False, excel_tables=False):
+		"""Returns a workbook (not yet saved) with the sheets returned by _model"""
+		from openpyxl import Workbook
+		from NERD_Render import NERD_Renderer
+
+		wb = Workbook(write_only=write_only)
+
+		#Every sheet is written in one pass over its sorted dictionary (streamed to disk in write-only mode, as native tables in table mode)
+		renderer 	= NERD_Renderer(wb, self.nerd._fiscal_end(), excel_tables)
+		calls 		= [
+			("Overview", 			renderer._overview_sheet, (asup_received_date,)),
+			("Locations", 			renderer._location_sheet, (sheets["Locations"], _location_sheet_column_headers())),
+			("Raid Info", 			renderer._raid_info_sheet, (sheets["Raid Info"], _raid_info_sheet_column_headers())),
+			("Capacity Trending", 	renderer._capacity_trending_sheet, (sheets["Capacity Trending"], _capacity_trending_sheet_column_headers())),
+			("Performance", 		renderer._performance_sheet, (sheets["Performance"], _performance_sheet_column_headers_1(), _performance_sheet_column_headers_2())),
+		]
+		if sheets["Volumes"] != None:
+			calls.append(("Volumes", renderer._volumes_sheet, (sheets["Volumes"], _volumes_sheet_column_headers())))
+
+		for sheet_name, render, args in calls:
+			t0 = time.time()
+			render(*args)
+			self.metrics._sheet(sheet_name, time.time() - t0)
+
+		return wb
+
+	def _render(self, sheets, asup_received_date, path, write_only=False, excel_tables=False):
+		"""Render stage. Writes the sheets returned by _model to a workbook saved at path"""
+		t0 = time.time()
+		wb = self._workbook(sheets, asup_received_date, write_only, excel_tables)
+		t1 = time.time()
+		self.metrics._stage("render", t1 - t0)
+
+		wb.save(path)
+		self.metrics._stage("save", time.time() - t1)
+
+	def _report(self, serial_numbers_list, path=None, weeks=12, volumes_info_active=True, write_only=False, excel_tables=False, journal=None, resume=False):
+		"""Runs every stage for a list of serial #s. Returns (path of the saved workbook (default NERD_<today>.xlsx), list of (serial #, reason) of the serials left out).
+		With a NERD_Journal every serial is checkpointed as it finishes; 'resume' carries on with the run recorded in it (its time span and volume setting).
+		The journal is removed once a run leaves no serial out. Raises NERD_Report_Error if no serial could be reported"""
+		with self.lock:
+			today 		= date.today()
+			start_date 	= today - timedelta(weeks=weeks)
+			end_date 	= today
+			completed 	= {}
+			if path == None:
+				path = 'NERD_{0}.xlsx'.format(today)
+
+			if journal != None and resume:
+				run, completed = journal._load()
+				if run == None:
+					raise NERD_Report_Error("No run to resume in journal " + journal.path)
+				start_date 			= run["start_date"]
+				end_date 			= run["end_date"]
+				volumes_info_active = run["volumes"]
+				print "Resuming run of " + str(start_date) + " - " + str(end_date) + ": " + str(len(completed)) + " serial numbers already completed"
+			elif journal != None:
+				journal._start(start_date, end_date, volumes_info_active)
+
+			#the retry budget and the timings are per report
+			self.retry_policy.retries 	= 0
+			self.metrics 				= NERD_Metrics(len(serial_numbers_list))
+
+			model = NERD_Sheet_Model(volumes_info_active)
+			try:
+				try:
+					systems, errors = self._systems(serial_numbers_list, start_date, end_date, volumes_info_active, journal, completed, model)
+				finally:
+					if journal != None:
+						journal._close()
+
+				if not systems:
+					raise NERD_Report_Error("No serial numbers could be reported (" + "; ".join([str(serial_number) + ": " + reason for serial_number, reason in errors]) + ")")
+
+				#the model is complete once the last serial is merged; the renderer merges each sheet into sorted order
+				self._render(model._sheets(), systems[-1].asup_received_date, path, write_only, excel_tables)
+			except Exception:
+				self.metrics._finish(False)
+				raise
+			self.metrics._finish(True)
+
+			if journal != None and not errors:
+				journal._remove()
+
+			return path, errors
+
+	def _stats(self):
+		"""Returns dictionary -> Key: stat name; Value: connection, retry and cache counts so far"""
+		stats = self.transport._connection_stats()
+		stats["retries"] 		= self.retry_policy.retries
+		stats["retry_budget"] 	= self.retry_policy.retry_budget
+		stats["breaker_trips"] 	= self.retry_policy._trips()
+		stats["systems"] 		= len(self.systems)
+		stats["parse_workers"] 	= self.parse_workers
+		stats["requests_saved"] = self.requests_saved
+		stats["parses_saved"] 	= self.parses_saved
+		if self.cache != None:
+			stats["cache_hits"] 	= self.cache.hits
+			stats["cache_misses"] 	= self.cache.misses
+		if self.snapshots != None:
+			stats["snapshot_hits"] 		= self.snapshots.hits
+			stats["snapshot_misses"] 	= self.snapshots.misses
+		return stats
+
+	def close(self):
+		"""Closes all pooled connections and stops the parse workers"""
+		self.transport.close()
+		if self.parse_pool != None:
+			self.parse_pool.terminate()
+			self.parse_pool.join()
+			self.parse_pool = None
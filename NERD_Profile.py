@@ -0,0 +1,273 @@
+# FILE: 	NERD_Profile.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Profiling mode of NERD_Modeler.py (-profile). While a report runs:
+# 			- cProfile follows the main thread (parse, model and render) -> <prefix>.pstats
+# 			- a sampler thread records the stack of every thread (fetch workers too)
+# 			  every few milliseconds -> <prefix>.collapsed, the folded format read by
+# 			  flamegraph.pl and speedscope
+# 			- every NERD._* method counts its calls, bytes scanned and cumulative time
+# 			  -> <prefix>.methods.json; parse workers (-parse-workers) are forked with the
+# 			  counters in place and send their counts back with every parsed serial
+# 			Nothing is wrapped or sampled unless profiling is on.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import collections
+import cProfile
+import inspect
+import json
+import os.path
+import re
+import sys
+import threading
+import time
+
+from NERD import NERD
+
+DEFAULT_PROFILE_PREFIX 	= "NERD_profile"
+SAMPLE_INTERVAL 		= 0.005 #seconds between stack samples
+
+WRAPPER_CODES = set() #code of the counter wrappers; left out of sampled stacks (the method itself is the next frame)
+ACTIVE_COUNTERS = [] #NERD_Method_Counters installed in this process (a forked parse worker inherits them)
+
+
+
+class NERD_Method_Counters():
+
+	def __init__(self, cls=NERD):
+		"""initialize counters for the _* methods of cls (NERD)"""
+		self.cls 		= cls
+		self.lock 		= threading.Lock()
+		self.originals 	= {} #dictionary -> Key: method name; Value: unwrapped function
+		self.counts 	= {} #dictionary -> Key: method name; Value: [calls, bytes scanned, cumulative seconds]
+
+	def _install(self):
+		"""Wraps every _* method of the class with a counter"""
+		for name, function in vars(self.cls).items():
+			if name.startswith("_") and not name.startswith("__") and inspect.isfunction(function):
+				self.originals[name] = function
+				setattr(self.cls, name, self._wrap(name, function))
+		ACTIVE_COUNTERS.append(self)
+
+	def _remove(self):
+		"""Puts the unwrapped methods back"""
+		for name, function in self.originals.items():
+			setattr(self.cls, name, function)
+		self.originals = {}
+		if self in ACTIVE_COUNTERS:
+			ACTIVE_COUNTERS.remove(self)
+
+	def _count(self, name, size, seconds):
+		"""Adds one call of method 'name'"""
+		with self.lock:
+			count = self.counts.setdefault(name, [0, 0, 0.0])
+			count[0] += 1
+			count[1] += size
+			count[2] += seconds
+
+	def _chunks(self, chunks, size):
+		"""Yields streamed chunks, adding their length to size[0]"""
+		for chunk in chunks:
+			size[0] += len(chunk)
+			yield chunk
+
+	def _counted(self, args):
+		"""Returns (arguments, [bytes]): text arguments are measured now, streamed chunks as the method reads them"""
+		size 	= [0]
+		counted = []
+		for arg in args:
+			if isinstance(arg, basestring):
+				size[0] += len(arg)
+			elif hasattr(arg, "next"):
+				arg = self._chunks(arg, size)
+			counted.append(arg)
+		return tuple(counted), size
+
+	def _wrap(self, name, function):
+		"""Returns function counting its calls, bytes and cumulative time. Generator methods (_scan) are timed while they run, not when created"""
+		counters = self
+
+		if inspect.isgeneratorfunction(function):
+			def wrapper(*args, **kwargs):
+				args, size 	= counters._counted(args)
+				generator 	= function(*args, **kwargs)
+				seconds 	= 0.0
+				try:
+					while True:
+						t0 = time.time()
+						try:
+							item = next(generator)
+						except StopIteration:
+							break
+						finally:
+							seconds += time.time() - t0
+						yield item
+				finally:
+					counters._count(name, size[0], seconds)
+		else:
+			def wrapper(*args, **kwargs):
+				args, size 	= counters._counted(args)
+				t0 			= time.time()
+				try:
+					return function(*args, **kwargs)
+				finally:
+					counters._count(name, size[0], time.time() - t0)
+
+		wrapper.__name__ 	= function.__name__
+		wrapper.__doc__ 	= function.__doc__
+		WRAPPER_CODES.add(wrapper.func_code)
+		return wrapper
+
+	def _take(self):
+		"""Returns the counts so far and starts again from zero"""
+		with self.lock:
+			counts 		= self.counts
+			self.counts = {}
+		return counts
+
+	def _merge(self, counts):
+		"""Adds counts taken in another process (see _take)"""
+		with self.lock:
+			for name, (calls, size, seconds) in counts.items():
+				count = self.counts.setdefault(name, [0, 0, 0.0])
+				count[0] += calls
+				count[1] += size
+				count[2] += seconds
+
+	def _rows(self):
+		"""Returns list of (method name, calls, bytes scanned, cumulative seconds), most time first"""
+		with self.lock:
+			rows = [(name, count[0], count[1], count[2]) for name, count in self.counts.items()]
+		return sorted(rows, key=lambda row: -row[3])
+
+
+
+def _take_counts():
+	"""Returns the method counts of this process since the last call and clears them, or None if no counters are installed.
+	Called in parse workers (see NERD_Pipeline._parse_in_worker)"""
+	if not ACTIVE_COUNTERS:
+		return None
+	return ACTIVE_COUNTERS[-1]._take()
+
+def _merge_counts(counts):
+	"""Adds method counts of a parse worker to the counters of this process"""
+	if ACTIVE_COUNTERS:
+		ACTIVE_COUNTERS[-1]._merge(counts)
+
+
+
+class NERD_Stack_Sampler():
+
+	def __init__(self, interval=SAMPLE_INTERVAL):
+		"""initialize sampler taking the stack of every thread each 'interval' seconds"""
+		self.interval 	= interval
+		self.stacks 	= collections.Counter() #folded stack -> samples
+		self.samples 	= 0
+		self.running 	= False
+		self.thread 	= None
+
+	def _frame_name(self, frame):
+		"""Returns 'function (file:line)' of a frame"""
+		code = frame.f_code
+		return "{0} ({1}:{2})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+	def _sample(self):
+		"""Adds the current stack of every other thread"""
+		me 		= threading.current_thread().ident
+		names 	= dict([(thread.ident, thread.name) for thread in threading.enumerate()])
+		for ident, frame in sys._current_frames().items():
+			if ident == me:
+				continue
+			stack = []
+			while frame != None:
+				if frame.f_code not in WRAPPER_CODES:
+					stack.append(self._frame_name(frame))
+				frame = frame.f_back
+			#pool workers are 'Thread-<n>'; one root for all of them
+			root = re.sub(r"-\d+$", "", names.get(ident, "Thread"))
+			self.stacks[";".join([root] + stack[::-1])] += 1
+		self.samples += 1
+
+	def _run(self):
+		"""Samples until stopped"""
+		while self.running:
+			self._sample()
+			time.sleep(self.interval)
+
+	def _start(self):
+		"""Starts sampling in a daemon thread"""
+		self.running 		= True
+		self.thread 		= threading.Thread(target=self._run, name="NERD-profile-sampler")
+		self.thread.daemon 	= True
+		self.thread.start()
+
+	def _stop(self):
+		"""Stops sampling"""
+		self.running = False
+		if self.thread != None:
+			self.thread.join()
+
+	def _write(self, path):
+		"""Writes the samples in folded stack format ('root;caller;callee count' per line)"""
+		with open(path, "w") as f:
+			for stack, count in sorted(self.stacks.items()):
+				f.write("{0} {1}\n".format(stack, count))
+
+
+
+class NERD_Profiler():
+
+	def __init__(self, prefix=DEFAULT_PROFILE_PREFIX, interval=SAMPLE_INTERVAL):
+		"""initialize profiler writing <prefix>.pstats, <prefix>.collapsed and <prefix>.methods.json"""
+		self.prefix 	= prefix
+		self.profile 	= cProfile.Profile()
+		self.sampler 	= NERD_Stack_Sampler(interval)
+		self.counters 	= NERD_Method_Counters()
+		self.seconds 	= 0.0
+		self.t0 		= None
+
+	def _start(self):
+		"""Starts the counters, the sampler and cProfile"""
+		self.counters._install()
+		self.sampler._start()
+		self.t0 = time.time()
+		self.profile.enable()
+
+	def _stop(self):
+		"""Stops profiling and removes the counters"""
+		self.profile.disable()
+		self.seconds = time.time() - self.t0
+		self.sampler._stop()
+		self.counters._remove()
+
+	def _write(self):
+		"""Writes the profile files. Returns their paths"""
+		paths = [self.prefix + ".pstats", self.prefix + ".collapsed", self.prefix + ".methods.json"]
+
+		self.profile.dump_stats(paths[0])
+		self.sampler._write(paths[1])
+
+		methods = {}
+		for name, calls, size, seconds in self.counters._rows():
+			methods[name] = {"calls": calls, "bytes": size, "seconds": round(seconds, 4)}
+		with open(paths[2], "w") as f:
+			json.dump({"seconds": round(self.seconds, 3), "samples": self.sampler.samples, "methods": methods}, f, indent=1, sort_keys=True)
+
+		return paths
+
+	def _summary(self, limit=15):
+		"""Returns lines of a table of the NERD methods with the most cumulative time"""
+		lines = ["{0:<24}{1:>10}{2:>14}{3:>12}{4:>10}".format("NERD METHOD", "CALLS", "MB SCANNED", "CUM(s)", "MB/s")]
+		for name, calls, size, seconds in self.counters._rows()[:limit]:
+			rate = "-"
+			if size and seconds > 0:
+				rate = "{0:.1f}".format(size / seconds / 1000000.0)
+			lines.append("{0:<24}{1:>10}{2:>14.2f}{3:>12.3f}{4:>10}".format(name, calls, size / 1000000.0, seconds, rate))
+		return lines
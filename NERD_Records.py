@@ -0,0 +1,82 @@
+# FILE: 	NERD_Records.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Compact record types for the data NERD extracts from ASUP. One NERD_System is
+# 			kept per serial number once its raw responses have been parsed and dropped.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+
+
+class NERD_System(object):
+
+	__slots__ = ("serial_number", "asup_id", "asup_received_date", "biz_key", "cluster_name", "host_name", "location",
+				"os_version", "system_id", "system_model", "warranty_status", "performance", "aggregates", "volumes")
+
+	def __init__(self, serial_number, asup_id, asup_received_date, biz_key, cluster_name, host_name, location,
+				os_version, system_id, system_model, warranty_status, performance):
+		"""initialize system (controller) record. 'performance' is the list returned by NERD._performance_iops"""
+		self.serial_number 		= serial_number
+		self.asup_id 			= asup_id
+		self.asup_received_date = asup_received_date
+		self.biz_key 			= biz_key
+		self.cluster_name 		= cluster_name
+		self.host_name 			= host_name
+		self.location 			= location
+		self.os_version 		= os_version
+		self.system_id 			= system_id
+		self.system_model 		= system_model
+		self.warranty_status 	= warranty_status
+		self.performance 		= performance
+		self.aggregates 		= []
+		self.volumes 			= []
+
+
+
+class NERD_Aggregate(object):
+
+	__slots__ = ("name", "raid_type", "raid_groups", "disk_type_count", "disks", "capacity", "util",
+				"growth_tb", "growth_rate", "growth_cagr", "capacity_forecast")
+
+	def __init__(self, name, raid_type, raid_groups, disk_type_count, disks, capacity, util, growth_tb=None, growth_rate=None, capacity_forecast=None):
+		"""initialize aggregate record. 'raid_groups' is a list of NERD_Raid_Group. Growth fields are filled in by NERD_Forecast"""
+		self.name 				= name
+		self.raid_type 			= raid_type
+		self.raid_groups 		= raid_groups
+		self.disk_type_count 	= disk_type_count
+		self.disks 				= disks
+		self.capacity 			= capacity
+		self.util 				= util
+		self.growth_tb 			= growth_tb
+		self.growth_rate 		= growth_rate
+		self.growth_cagr 		= None
+		self.capacity_forecast 	= capacity_forecast
+
+	def _raid_layout(self):
+		"""Returns RAID layout as shown on the Raid Info sheet"""
+		return str(len(self.raid_groups)) + " groups" + " " + str(self.disk_type_count)
+
+
+
+class NERD_Raid_Group(object):
+
+	__slots__ = ("name",)
+
+	def __init__(self, name):
+		"""initialize RAID group record"""
+		self.name = name
+
+
+
+class NERD_Volume(object):
+
+	__slots__ = ("name", "iops")
+
+	def __init__(self, name, iops):
+		"""initialize volume record"""
+		self.name = name
+		self.iops = iops
@@ -0,0 +1,305 @@
+# FILE: 	NERD_Render.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Workbook renderer shared by every sheet. Rows come from the sorted sheet
+# 			dictionaries and are styled once, as they are written, with banding and
+# 			group borders worked out in the same pass. Works on a normal or a
+# 			write-only (streaming) workbook. Cell styles come from NERD_Styles.
+# 			In table mode each data sheet is a native Excel table instead: the table
+# 			style does the banding and thresholds are conditional formatting rules.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import datetime
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableStyleInfo
+
+from NERD_Styles import ALERT_FONT, RULE_FILLS, NERD_Styles
+
+#color_flag 0 -> blue, 1 -> white
+BAND_COLORS = ["add8e6", "ffffff"]
+
+HIGH_PRIORITY_FORECASTS = ["Already > 90", "This year", "This quarter", "Next month"]
+
+TABLE_STYLE = "TableStyleMedium2"
+
+
+
+class NERD_Renderer():
+
+	def __init__(self, workbook, fiscal_year_end, tables=False):
+		"""initialize renderer for a normal or write-only workbook. 'tables' writes data sheets as native Excel tables (normal workbooks only)"""
+		if tables and workbook.write_only:
+			raise ValueError("Excel tables cannot be written to a write-only workbook")
+
+		self.workbook 			= workbook
+		self.write_only 		= workbook.write_only
+		self.tables 			= tables
+		self.fiscal_year_end 	= fiscal_year_end
+		self.styles 			= NERD_Styles(workbook)
+		self.dimensions 		= {} #dictionary -> Key: column letter; Value: width (grows from sheet to sheet)
+		self.sheet_count 		= 0
+
+	def _create_sheet(self, title):
+		"""Returns a new sheet. The first one takes the place of the default sheet of a normal workbook"""
+		self.sheet_count += 1
+		if self.sheet_count == 1 and not self.write_only:
+			sheet 		= self.workbook.active
+			sheet.title = title
+			return sheet
+		return self.workbook.create_sheet(title)
+
+	def _column_widths(self, sheet, headers, padding):
+		"""Sets column widths from header lengths. Has to run before the first row is written"""
+		for i in range(0, len(headers)):
+			if headers[i]:
+				column 					= get_column_letter(i + 1)
+				self.dimensions[column] = max((self.dimensions.get(column, 0), len(str(headers[i])) + padding))
+		for column, value in self.dimensions.items():
+			sheet.column_dimensions[column].width = value
+
+	def _header_cells(self, sheet, headers, white=False, spans=[], wrap=False):
+		"""Returns a header row of cells. 'spans' are (first, last) column #s shown as one cell: merged (see _append), or centered across on write-only sheets"""
+		row = []
+
+		for i in range(0, len(headers)):
+			cell = WriteOnlyCell(sheet, headers[i] or None)
+			name = self.styles._header(white, wrap=wrap)
+
+			if self.write_only:
+				for first, last in spans:
+					if first <= i + 1 <= last:
+						name = self.styles._header(white, i + 1 == first, i + 1 == last, True)
+
+			self.styles._apply(cell, name)
+			row.append(cell)
+
+		return row
+
+	def _append(self, sheet, row, spans=[]):
+		"""Appends a row of cells, merging 'spans' on normal sheets"""
+		sheet.append(row)
+		if not self.write_only:
+			for first, last in spans:
+				sheet.merge_cells(start_row=sheet.max_row, start_column=first, end_row=sheet.max_row, end_column=last)
+
+	def _data_row(self, sheet, values, width, fill_color, group_end, highlight):
+		"""Writes one banded row padded to 'width'. The last column has a thick right edge and the last row of a group a thick bottom edge.
+		'highlight' may swap the fill or set the alert font of single cells"""
+		values 	= list(values) + [None] * (width - len(values))
+		row 	= [WriteOnlyCell(sheet, value) for value in values]
+		fills 	= [fill_color] * width
+		alerts 	= [False] * width
+
+		if highlight:
+			highlight(row, fills, alerts)
+
+		for i in range(0, width):
+			self.styles._apply(row[i], self.styles._data(fills[i], i == width - 1, group_end, alerts[i]))
+
+		sheet.append(row)
+
+	def _table(self, sheet, title, header_row, width, row_count, rules):
+		"""Turns the header row and the rows under it into a banded Excel table and adds the conditional formatting 'rules' give for the data rows"""
+		if row_count == 0:
+			return
+
+		last_row 	= header_row + row_count
+		table 		= Table(displayName=title.replace(" ", ""), ref="A{0}:{1}{2}".format(header_row, get_column_letter(width), last_row))
+		table.tableStyleInfo = TableStyleInfo(name=TABLE_STYLE, showRowStripes=True)
+		sheet.add_table(table)
+
+		if rules:
+			for cells, rule in rules(header_row + 1, last_row):
+				sheet.conditional_formatting.add(cells, rule)
+
+	def _data_sheet(self, title, header_rows, padding, rows, highlight=None, rules=None, white_headers=False, spans=[]):
+		"""Writes one data sheet in a single pass. 'rows' yields (group key, band key, values) in sheet order:
+		bands alternate whenever the band key changes and the last row of each group gets a thick bottom edge.
+		In table mode rows are written unstyled and 'rules' replaces 'highlight'"""
+		sheet 		= self._create_sheet(title)
+		width 		= len(header_rows[-1])
+		header_row 	= len(header_rows)
+
+		self._column_widths(sheet, header_rows[0], padding)
+		sheet.freeze_panes = "A" + str(header_row + 1)
+		for i in range(0, len(header_rows)):
+			row_spans = spans if i == 0 else []
+			self._append(sheet, self._header_cells(sheet, header_rows[i], white_headers, row_spans), row_spans)
+
+		if self.tables:
+			row_count = 0
+			for group, key, values in rows:
+				sheet.append(list(values) + [None] * (width - len(values)))
+				row_count += 1
+			self._table(sheet, title, header_row, width, row_count, rules)
+			return
+
+		#a row is written once the next one shows whether it closes its group
+		color_flag 	= 1
+		band_key 	= None
+		pending 	= None
+		row_count 	= 0
+
+		for group, key, values in rows:
+			if pending == None or key != band_key:
+				color_flag 	= 1 - color_flag
+				band_key 	= key
+			if pending != None:
+				self._data_row(sheet, pending[1], width, pending[2], pending[0] != group, highlight)
+			pending 	= (group, values, BAND_COLORS[color_flag])
+			row_count 	+= 1
+
+		if pending != None:
+			self._data_row(sheet, pending[1], width, pending[2], True, highlight)
+
+		sheet.auto_filter.ref = "A{0}:{1}{2}".format(header_row, get_column_letter(width), header_row + row_count)
+
+	def _column_rules(self, column, first_row, last_row, rules):
+		"""Returns (cell range, rule) of each rule over one column of the data rows"""
+		cells = "{0}{1}:{0}{2}".format(column, first_row, last_row)
+		return [(cells, rule) for rule in rules]
+
+	def _host_names(self, cluster):
+		"""Returns sorted host names of one cluster of a sheet dictionary"""
+		return sorted([host_name for host_name in cluster if host_name != None])
+
+	def _overview_sheet(self, asup_received_date):
+		"""Writes the Document Overview sheet"""
+		sheet = self._create_sheet("Document Overview")
+
+		rows = []
+		rows.append(["Locations", "General location information. Includes cluster names, host names, controller type, OS version, etc.", "Allows user to filter and examine general storage environment set-up at particular locations."])
+		rows.append(["RAID Info", "Details of RAID set-up and aggregate utilization.", "Sheet is organized by cluster name and gives details on RAID set-up on each aggregate, including RAID type, disk count, aggregate capacity, etc."])
+		rows.append(["Capacity Trending", "Growth rate information for each cluster.", "View growth rates to predict upsell opportunities for clients"])
+		rows.append(["Performance", "Overall performance of environment. Includes IOPS, max latency, etc.", "View overall health of client storage system to proactively make recommendations on upgrades and improvements."])
+		rows.append(["Volumes", "IOPS for each volume in cluster.", "View performance of specific volumes within client environment."])
+
+		for column in ["A", "B", "C"]:
+			self.dimensions[column] = 50
+		for column, value in self.dimensions.items():
+			sheet.column_dimensions[column].width = value
+
+		#column D carries the right edge of the table
+		row = self._header_cells(sheet, ["NetApp Environment Review Document (NERD)", "", "ASUP Received Date: {}".format(asup_received_date)], True, [(1, 2)])
+		row.append(WriteOnlyCell(sheet))
+		self.styles._apply(row[3], self.styles._table_edge(left=True))
+		self._append(sheet, row, [(1, 2)])
+
+		row = self._header_cells(sheet, ["Sheet", "Contents", "Usage"], True, wrap=True)
+		row.append(WriteOnlyCell(sheet))
+		self.styles._apply(row[3], self.styles._table_edge(left=True))
+		sheet.append(row)
+
+		for values in rows:
+			row = [WriteOnlyCell(sheet, value) for value in values] + [WriteOnlyCell(sheet)]
+			self.styles._apply(row[0], self.styles._table_edge(left=True, wrap=True))
+			self.styles._apply(row[1], self.styles._table_edge(wrap=True))
+			self.styles._apply(row[2], self.styles._table_edge(wrap=True))
+			self.styles._apply(row[3], self.styles._table_edge(left=True))
+			sheet.append(row)
+
+		row = [WriteOnlyCell(sheet) for i in range(0, 3)]
+		for cell in row:
+			self.styles._apply(cell, self.styles._table_edge(top=True))
+		sheet.append(row)
+
+	def _location_sheet(self, location_dictionary, headers):
+		"""Writes the Locations sheet. Banded by cluster, grouped by location"""
+		self._data_sheet("Locations", [headers], 12, self._location_rows(location_dictionary), self._warranty_highlight, self._warranty_rules)
+
+	def _location_rows(self, location_dictionary):
+		"""Yields (location, cluster, row) of the Locations sheet"""
+		for location in sorted(location_dictionary):
+			for cluster in sorted([cluster for cluster in location_dictionary[location] if cluster != None]):
+				for item in sorted(location_dictionary[location][cluster]):
+					yield location, cluster, [location, cluster] + item
+
+	def _warranty_highlight(self, row, fills, alerts):
+		"""Colors the warranty end date (compared as stored, dates become datetimes)"""
+		if row[7].value <= self.fiscal_year_end:
+			fills[7] = "ffff00"
+		elif row[7].value <= datetime.now():
+			fills[7] = "ff0000"
+
+	def _warranty_rules(self, first_row, last_row):
+		"""Conditional formatting version of _warranty_highlight"""
+		fiscal_year_end = "DATE({0},{1},{2})".format(self.fiscal_year_end.year, self.fiscal_year_end.month, self.fiscal_year_end.day)
+		return self._column_rules("H", first_row, last_row, [
+			CellIsRule(operator="lessThanOrEqual", formula=[fiscal_year_end], stopIfTrue=True, fill=RULE_FILLS["ffff00"]),
+			CellIsRule(operator="lessThanOrEqual", formula=["NOW()"], stopIfTrue=True, fill=RULE_FILLS["ff0000"])])
+
+	def _raid_info_sheet(self, cluster_dictionary, headers):
+		"""Writes the Raid Info sheet. Banded and grouped by cluster"""
+		self._data_sheet("Raid Info", [headers], 12, self._cluster_rows(cluster_dictionary), self._util_highlight, self._util_rules)
+
+	def _cluster_rows(self, dictionary, sort_key=None, band_by_host=False):
+		"""Yields (cluster, band key, row) of a cluster -> host name -> rows dictionary. Rows of a host are sorted, by 'sort_key' (descending) if given"""
+		for cluster in sorted(dictionary):
+			for host_name in self._host_names(dictionary[cluster]):
+				if sort_key:
+					items = sorted(dictionary[cluster][host_name], key=sort_key, reverse=True)
+				else:
+					items = sorted(dictionary[cluster][host_name])
+				for item in items:
+					yield cluster, host_name if band_by_host else cluster, [cluster, host_name] + item
+
+	def _util_highlight(self, row, fills, alerts):
+		"""Colors aggregate utilization over 80% / 90%"""
+		if row[10].value >= 90:
+			fills[10] = "ff0000"
+		elif row[10].value >= 80:
+			fills[10] = "ffff00"
+
+	def _util_rules(self, first_row, last_row):
+		"""Conditional formatting version of _util_highlight"""
+		return self._column_rules("K", first_row, last_row, [
+			CellIsRule(operator="greaterThanOrEqual", formula=["90"], stopIfTrue=True, fill=RULE_FILLS["ff0000"]),
+			CellIsRule(operator="greaterThanOrEqual", formula=["80"], stopIfTrue=True, fill=RULE_FILLS["ffff00"])])
+
+	def _capacity_trending_sheet(self, capacity_trending_dictionary, headers):
+		"""Writes the Capacity Trending sheet. Banded and grouped by cluster"""
+		self._data_sheet("Capacity Trending", [headers], 12, self._cluster_rows(capacity_trending_dictionary), self._forecast_highlight, self._forecast_rules)
+
+	def _forecast_highlight(self, row, fills, alerts):
+		"""Marks aggregates reaching 90% within the year"""
+		if row[7].value in HIGH_PRIORITY_FORECASTS:
+			alerts[7] = True
+
+	def _forecast_rules(self, first_row, last_row):
+		"""Conditional formatting version of _forecast_highlight"""
+		formula = "OR(" + ",".join(['H{0}="{1}"'.format(first_row, forecast) for forecast in HIGH_PRIORITY_FORECASTS]) + ")"
+		return self._column_rules("H", first_row, last_row, [FormulaRule(formula=[formula], font=ALERT_FONT)])
+
+	def _performance_sheet(self, performance_dictionary, headers_1, headers_2):
+		"""Writes the Performance sheet (two header rows). Banded and grouped by cluster"""
+		self._data_sheet("Performance", [headers_1, headers_2], 8, self._performance_rows(performance_dictionary), self._cpu_highlight, self._cpu_rules, True, [(1, 4), (5, 9)])
+
+	def _performance_rows(self, performance_dictionary):
+		"""Yields (cluster, cluster, row) of the Performance sheet; one row per host name"""
+		for cluster in sorted(performance_dictionary):
+			for host_name in self._host_names(performance_dictionary[cluster]):
+				yield cluster, cluster, [cluster, host_name] + performance_dictionary[cluster][host_name]
+
+	def _cpu_highlight(self, row, fills, alerts):
+		"""Marks CPU % of 50 and over"""
+		if row[4].value != "No Data Available":
+			if row[4].value >= 50:
+				alerts[4] = True
+
+	def _cpu_rules(self, first_row, last_row):
+		"""Conditional formatting version of _cpu_highlight"""
+		formula = 'AND(E{0}<>"No Data Available",E{0}>=50)'.format(first_row)
+		return self._column_rules("E", first_row, last_row, [FormulaRule(formula=[formula], font=ALERT_FONT)])
+
+	def _volumes_sheet(self, volumes_dictionary, headers):
+		"""Writes the Volumes sheet. Banded by host name, grouped by cluster, busiest volume first"""
+		self._data_sheet("Volumes", [headers], 12, self._cluster_rows(volumes_dictionary, lambda x: float(x[3]), True))
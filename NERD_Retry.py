@@ -0,0 +1,155 @@
+# FILE: 	NERD_Retry.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Retry policy shared by every ASUP endpoint. Failed requests are retried with
+# 			exponential backoff and jitter, retries across the whole run come out of one
+# 			budget, and a per-host circuit breaker holds requests back while restprd is failing.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import random
+import re
+import requests
+import threading
+import time
+try:
+	from urlparse import urlparse
+except ImportError:
+	from urllib.parse import urlparse
+
+
+
+class NERD_Request_Failed(Exception):
+	"""Raised when an ASUP request still fails after all of its retries"""
+	pass
+
+class NERD_Error_Page(Exception):
+	"""Raised by streamed requests when ASUP answers with an 'Error' page"""
+	pass
+
+
+
+class NERD_Circuit_Breaker():
+
+	def __init__(self, failure_threshold=5, cooldown=30):
+		"""initialize breaker. Opens after 'failure_threshold' failures in a row and stays open for 'cooldown' seconds"""
+		self.failure_threshold 	= failure_threshold
+		self.cooldown 			= cooldown
+		self.lock 				= threading.Lock()
+		self.failures 			= 0
+		self.opened_at 			= None
+		self.probing 			= False
+		self.trips 				= 0
+
+	def _wait(self):
+		"""Blocks while the breaker is open. Once the cooldown passes a single probe request is let through"""
+		while True:
+			with self.lock:
+				if self.opened_at == None:
+					return
+				remaining = self.opened_at + self.cooldown - time.time()
+				if remaining <= 0 and not self.probing:
+					self.probing = True
+					return
+			time.sleep(max(0.1, min(remaining, 1)))
+
+	def _success(self):
+		"""Closes the breaker"""
+		with self.lock:
+			self.failures 	= 0
+			self.opened_at 	= None
+			self.probing 	= False
+
+	def _release(self):
+		"""Hands back a probe that ended without a verdict (the request raised something other than a request error), so another request can probe"""
+		with self.lock:
+			self.probing = False
+
+	def _failure(self):
+		"""Counts a failure; opens (or re-opens after a failed probe) the breaker"""
+		with self.lock:
+			self.failures += 1
+			if self.probing or (self.opened_at == None and self.failures >= self.failure_threshold):
+				if not self.probing:
+					self.trips += 1
+				self.opened_at 	= time.time()
+				self.probing 	= False
+
+
+
+class NERD_Retry_Policy():
+
+	def __init__(self, max_attempts=8, base_delay=1, max_delay=30, retry_budget=500, failure_threshold=5, cooldown=30):
+		"""initialize policy. 'retry_budget' caps the retries spent over the whole run"""
+		self.max_attempts 		= max(1, int(max_attempts))
+		self.base_delay 		= float(base_delay)
+		self.max_delay 			= float(max_delay)
+		self.retry_budget 		= int(retry_budget)
+		self.failure_threshold 	= failure_threshold
+		self.cooldown 			= cooldown
+		self.lock 				= threading.Lock()
+		self.breakers 			= {} #dictionary -> Key: host; Value: circuit breaker
+		self.retries 			= 0
+
+	def _breaker(self, url):
+		"""Returns circuit breaker for the host of url"""
+		host = urlparse(url).netloc
+		with self.lock:
+			if host not in self.breakers:
+				self.breakers[host] = NERD_Circuit_Breaker(self.failure_threshold, self.cooldown)
+			return self.breakers[host]
+
+	def _take_retry(self):
+		"""Returns True if the run-wide retry budget allows another retry"""
+		with self.lock:
+			if self.retries >= self.retry_budget:
+				return False
+			self.retries += 1
+			return True
+
+	def _backoff(self, attempt):
+		"""Returns seconds to sleep before retry # 'attempt' (full jitter)"""
+		return random.uniform(0, min(self.max_delay, self.base_delay * pow(2, attempt)))
+
+	def _call(self, url, request, error_body=True):
+		"""Returns request(url), retrying transport errors, 5xx responses and (if error_body) ASUP 'Error' bodies"""
+		breaker = self._breaker(url)
+		reason 	= None
+
+		for attempt in range(0, self.max_attempts):
+			if attempt > 0:
+				if not self._take_retry():
+					break
+				time.sleep(self._backoff(attempt - 1))
+
+			breaker._wait()
+			try:
+				body = request(url)
+			except (requests.exceptions.RequestException, NERD_Error_Page) as e:
+				reason = str(e)
+				breaker._failure()
+				continue
+			except BaseException:
+				#a parser, cache or Ctrl-C error says nothing about the host, but must not leave the breaker waiting on this probe
+				breaker._release()
+				raise
+
+			if error_body and re.search("(Error)", body):
+				reason = "ASUP returned an error page"
+				breaker._failure()
+				continue
+
+			breaker._success()
+			return body
+
+		raise NERD_Request_Failed("{0} ({1})".format(url, reason))
+
+	def _trips(self):
+		"""Returns number of times any circuit breaker opened"""
+		return sum([breaker.trips for breaker in self.breakers.values()])
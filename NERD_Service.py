@@ -0,0 +1,136 @@
+# FILE: 	NERD_Service.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Local report service (NERD_Modeler.py -serve). One NERD_Pipeline stays up
+# 			between report requests, so its keep-alive connections, response cache and
+# 			parsed systems are warm when the next report covers the same serials.
+#
+# 			POST /report 	{"serial_numbers": [...], "weeks": 12, "volumes": true,
+# 							 "write_only": false, "excel_tables": false, "path": "..."}
+# 							"path" is a file name in the service's report directory
+# 			GET /stats 		connection, retry and cache counts
+# 			GET /metrics 	timings of the last report (Prometheus text format)
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import BaseHTTPServer
+from datetime import date
+import json
+import os.path
+import time
+
+from NERD_Pipeline import NERD_Report_Error
+
+DEFAULT_PORT = 8711
+
+
+
+def _flag(request, name, default, words=()):
+	"""Returns boolean field 'name' of a report request: true, false or a word of one of the (true word, false word) pairs in 'words'.
+	Raises ValueError for anything else (0, "maybe")"""
+	value = request.get(name, default)
+	if isinstance(value, bool):
+		return value
+	for true_word, false_word in words:
+		if value == true_word:
+			return True
+		if value == false_word:
+			return False
+	raise ValueError(name + " must be true or false")
+
+
+
+class NERD_Service_Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+	def _respond(self, status, body, content_type="application/json"):
+		"""Sends body as a JSON response (as it is for other content types)"""
+		output = body
+		if content_type == "application/json":
+			output = json.dumps(body)
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(output)))
+		self.end_headers()
+		self.wfile.write(output)
+
+	def do_GET(self):
+		"""GET /stats or /metrics"""
+		pipeline = self.server.pipeline
+		if self.path == "/stats":
+			self._respond(200, pipeline._stats())
+		elif self.path == "/metrics":
+			self._respond(200, pipeline.metrics._prometheus(pipeline._stats()), "text/plain; version=0.0.4")
+		else:
+			self._respond(404, {"error": "Unknown path " + self.path})
+
+	def do_POST(self):
+		"""POST /report. Runs one report and answers with the path of the saved workbook and the serials skipped"""
+		if self.path != "/report":
+			self._respond(404, {"error": "Unknown path " + self.path})
+			return
+
+		try:
+			length 	= int(self.headers.getheader("Content-Length", 0))
+			request = json.loads(self.rfile.read(length) or "{}")
+			if not isinstance(request, dict):
+				raise ValueError("Request body must be a JSON object")
+
+			serial_numbers_list = request.get("serial_numbers", [])
+			if isinstance(serial_numbers_list, basestring):
+				serial_numbers_list = serial_numbers_list.split(",")
+			if not isinstance(serial_numbers_list, list):
+				raise ValueError("serial_numbers must be a list of serial numbers")
+			serial_numbers_list = [str(num).strip() for num in serial_numbers_list if str(num).strip() != ""]
+			if not serial_numbers_list:
+				raise ValueError("serial_numbers must name at least one serial number")
+
+			weeks = request.get("weeks", 12)
+			if not isinstance(weeks, (int, long)) or isinstance(weeks, bool) or weeks < 1:
+				raise ValueError("weeks must be a positive integer")
+
+			#reports are only written to the report directory; 'path' names a file in it
+			file_name = request.get("path")
+			if file_name == None:
+				file_name = "NERD_{0}.xlsx".format(date.today())
+			if not isinstance(file_name, basestring) or file_name != os.path.basename(file_name) or file_name in ("", ".", ".."):
+				raise ValueError("path must be a file name (reports are saved in the service's report directory)")
+			path = os.path.join(self.server.report_dir, file_name)
+
+			volumes 		= _flag(request, "volumes", True, [("y", "n"), ("Y", "N")])
+			write_only 		= _flag(request, "write_only", False)
+			excel_tables 	= _flag(request, "excel_tables", False)
+			if write_only and excel_tables:
+				raise ValueError("excel_tables cannot be combined with write_only")
+		except ValueError as e:
+			self._respond(400, {"error": str(e)})
+			return
+
+		t0 = time.time()
+		try:
+			path, errors = self.server.pipeline._report(serial_numbers_list, path, weeks, volumes, write_only, excel_tables)
+		except NERD_Report_Error as e:
+			self._respond(422, {"error": str(e)})
+			return
+		except Exception as e:
+			#the service carries on with the next request
+			self._respond(500, {"error": type(e).__name__ + ": " + str(e)})
+			return
+
+		self._respond(200, {"path": os.path.abspath(path), "serial_numbers": len(serial_numbers_list), "seconds": round(time.time() - t0, 2),
+			"skipped": [{"serial_number": serial_number, "reason": reason} for serial_number, reason in errors], "stages": self.server.pipeline.metrics._report()["stages"]})
+
+
+
+class NERD_Service(BaseHTTPServer.HTTPServer):
+
+	def __init__(self, pipeline, port=DEFAULT_PORT, host="127.0.0.1", report_dir=None):
+		"""initialize service around a pipeline. Listens on localhost only by default. Reports are saved in 'report_dir' (default = working directory)"""
+		BaseHTTPServer.HTTPServer.__init__(self, (host, port), NERD_Service_Handler)
+		self.pipeline 	= pipeline
+		self.report_dir = os.path.abspath(report_dir or os.getcwd())
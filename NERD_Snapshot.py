@@ -0,0 +1,83 @@
+# FILE: 	NERD_Snapshot.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Per-serial snapshots of the parsed model (NERD_System, growth filled in) saved
+# 			with the asup_id they were built from. When the overview of a serial still
+# 			reports the same asup_id, the snapshot stands in for the SYSCONFIG-R, DF-A,
+# 			cvc, AGGREGATE and volume calls.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import cPickle as pickle
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".nerd_snapshots")
+
+
+
+class NERD_Snapshots():
+
+	def __init__(self, snapshot_dir=DEFAULT_SNAPSHOT_DIR, refresh=False):
+		"""initialize snapshot store in 'snapshot_dir'. 'refresh' ignores existing snapshots but still saves new ones"""
+		self.snapshot_dir 	= snapshot_dir
+		self.refresh 		= refresh
+		self.lock 			= threading.Lock()
+		self.hits 			= 0
+		self.misses 		= 0
+
+		if not os.path.isdir(self.snapshot_dir):
+			os.makedirs(self.snapshot_dir)
+
+	def _snapshot_path(self, serial_number):
+		"""Returns file path of the snapshot of a serial #"""
+		file_name = hashlib.sha1(str(serial_number).encode("utf-8")).hexdigest() + ".snap"
+		return os.path.join(self.snapshot_dir, file_name)
+
+	def _get(self, serial_number, asup_id, span_days, volumes_info_active):
+		"""Returns NERD_System saved for serial # if it was built from the same asup_id, time span (days) and volume setting, else None"""
+		path = self._snapshot_path(serial_number)
+
+		system = None
+		if not self.refresh and asup_id != None and os.path.exists(path):
+			try:
+				with open(path, "rb") as f:
+					entry = pickle.loads(zlib.decompress(f.read()))
+				if (entry["serial_number"], entry["asup_id"], entry["span_days"], entry["volumes"]) == (str(serial_number), asup_id, span_days, volumes_info_active):
+					system = entry["system"]
+			except (IOError, OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError, zlib.error):
+				system = None
+
+		with self.lock:
+			if system == None:
+				self.misses += 1
+			else:
+				self.hits += 1
+
+		return system
+
+	def _put(self, serial_number, system, span_days, volumes_info_active):
+		"""Saves the parsed system of a serial # under the asup_id it was built from"""
+		if system.asup_id == None:
+			return
+
+		path 	= self._snapshot_path(serial_number)
+		entry 	= {"serial_number": str(serial_number), "asup_id": system.asup_id, "span_days": span_days, "volumes": volumes_info_active, "saved": time.time(), "system": system}
+		data 	= zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+
+		with self.lock:
+			temp_path = path + ".tmp{0}".format(threading.current_thread().ident)
+			with open(temp_path, "wb") as f:
+				f.write(data)
+			if os.path.exists(path):
+				os.remove(path)
+			os.rename(temp_path, path)
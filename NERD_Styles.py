@@ -0,0 +1,148 @@
+# FILE: 	NERD_Styles.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Registry of the named cell styles used by every NERD sheet. Fills, fonts,
+# 			borders and alignments are built once; each combination a sheet asks for is
+# 			registered with the workbook the first time and then assigned by name.
+# 			RULE_FILLS and ALERT_FONT are also used by the conditional formatting rules
+# 			of the native table output (see NERD_Render).
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+#fill color -> style name part
+FILL_NAMES = {
+	"000080" 	: "navy",
+	"add8e6" 	: "band-blue",
+	"ffffff" 	: "band-white",
+	"ffff00" 	: "warn-yellow",
+	"ff0000" 	: "alert-red",
+}
+
+FILLS 			= dict([(color, PatternFill(start_color=color, fill_type="solid")) for color in FILL_NAMES])
+RULE_FILLS 		= dict([(color, PatternFill(start_color=color, end_color=color, fill_type="solid")) for color in FILL_NAMES]) #conditional formats take the background color
+HEADER_FONT 	= Font(bold=True, color="ffffff")
+ALERT_FONT 		= Font(bold=True, color="ff0000")
+CENTER 			= Alignment('center')
+CENTER_SPAN 	= Alignment('centerContinuous')
+CENTER_WRAP 	= Alignment(vertical='center', horizontal='center', wrap_text=True)
+NO_SIDE 		= Side()
+THIN 			= Side(style='thin')
+THICK 			= Side(style='thick')
+WHITE_THIN 		= Side(style='thin', color="ffffff")
+
+
+
+class NERD_Styles():
+
+	def __init__(self, workbook):
+		"""initialize registry for one workbook"""
+		self.workbook 	= workbook
+		self.styles 	= {} #dictionary -> Key: style name; Value: NamedStyle registered with the workbook
+
+	def _registered(self, name):
+		"""Returns workbook name of the style, or None if it is not registered yet"""
+		name = "NERD " + name
+		if name in self.styles:
+			return name
+		return None
+
+	def _named(self, name, font=DEFAULT_FONT, fill=None, border=None, alignment=None):
+		"""Returns name of the style, registering it with the workbook on first use"""
+		name = "NERD " + name
+		if name not in self.styles:
+			if fill == None:
+				fill = PatternFill()
+			if border == None:
+				border = Border()
+			if alignment == None:
+				alignment = Alignment()
+			style = NamedStyle(name=name, font=font, fill=fill, border=border, alignment=alignment)
+			self.workbook.add_named_style(style)
+			self.styles[name] = style
+		return name
+
+	def _apply(self, cell, name):
+		"""Assigns a named style to a cell, keeping the date format picked from its value"""
+		if cell.is_date:
+			number_format 		= cell.number_format
+			cell.style 			= name
+			cell.number_format 	= number_format
+		else:
+			cell.style = name
+
+	def _header(self, white=False, span_first=True, span_last=True, span=False, wrap=False):
+		"""Returns header style. Cells inside a centered span only keep the outer edges of the span"""
+		side 	= WHITE_THIN if white else THIN
+		name 	= "header"
+		if white:
+			name += " white"
+		if span:
+			name += " span" + (" first" if span_first else "") + (" last" if span_last else "")
+		if wrap:
+			name += " wrap"
+		registered = self._registered(name)
+		if registered:
+			return registered
+
+		alignment = CENTER
+		if span:
+			alignment = CENTER_SPAN
+		elif wrap:
+			alignment = CENTER_WRAP
+
+		border = Border(
+			left 	= side if span_first else NO_SIDE,
+			right 	= side if span_last else NO_SIDE,
+			top 	= side,
+			bottom 	= side)
+
+		return self._named(name, HEADER_FONT, FILLS["000080"], border, alignment)
+
+	def _data(self, fill_color, right_edge=False, bottom_edge=False, alert=False):
+		"""Returns data cell style: band/threshold fill, thin grid with a thick right (last column) and bottom (last row of a group) edge"""
+		name = FILL_NAMES[fill_color]
+		if right_edge:
+			name += " right-edge"
+		if bottom_edge:
+			name += " group-bottom-edge"
+		if alert:
+			name += " alert"
+		registered = self._registered(name)
+		if registered:
+			return registered
+
+		border = Border(
+			left 	= THIN,
+			right 	= THICK if right_edge else THIN,
+			top 	= THIN,
+			bottom 	= THICK if bottom_edge else THIN)
+
+		return self._named(name, ALERT_FONT if alert else DEFAULT_FONT, FILLS[fill_color], border)
+
+	def _table_edge(self, left=False, top=False, wrap=False):
+		"""Returns style of the Document Overview table body and its thick outer edges"""
+		name = "overview"
+		if left:
+			name += " left-edge"
+		if top:
+			name += " top-edge"
+		if wrap:
+			name += " text"
+		registered = self._registered(name)
+		if registered:
+			return registered
+
+		border = Border(
+			left 	= THICK if left else NO_SIDE,
+			top 	= THICK if top else NO_SIDE)
+
+		return self._named(name, border=border, alignment=CENTER_WRAP if wrap else None)
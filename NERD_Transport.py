@@ -0,0 +1,80 @@
+# FILE: 	NERD_Transport.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Shared HTTP transport for the ASUP REST calls. Keeps a pool of keep-alive
+# 			connections to restprd, negotiates gzip/deflate transfer and applies
+# 			connect/read timeouts to every request.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+
+class NERD_Transport():
+
+	def __init__(self, pool_size=16, connect_timeout=10, read_timeout=300):
+		"""initialize shared session. 'pool_size' bounds the keep-alive connections kept per host"""
+		self.pool_size 	= max(1, int(pool_size))
+		self.timeout 	= (float(connect_timeout), float(read_timeout))
+
+		#block=True makes threads wait for a free connection instead of opening throwaway ones
+		self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=True)
+
+		self.session = requests.Session()
+		self.session.mount("http://", self.adapter)
+		self.session.mount("https://", self.adapter)
+		self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+	def _get(self, url):
+		"""Returns body of url (decompressed). Raises HTTPError on server-side (5xx/429) failures"""
+		response = self.session.get(url, timeout=self.timeout)
+		if response.status_code >= 500 or response.status_code == 429:
+			raise requests.exceptions.HTTPError("{0} response".format(response.status_code), response=response)
+		#no charset in the headers: decode as UTF-8 rather than let requests guess it (chardet) over the whole body
+		if response.encoding == None:
+			response.encoding = "utf-8"
+		return response.text
+
+	def _stream(self, url, chunk_size=64*1024):
+		"""Yields body of url as decompressed text chunks without holding the whole body"""
+		response = self.session.get(url, timeout=self.timeout, stream=True)
+		try:
+			if response.status_code >= 500 or response.status_code == 429:
+				raise requests.exceptions.HTTPError("{0} response".format(response.status_code), response=response)
+			if response.encoding == None:
+				response.encoding = "utf-8"
+			for chunk in response.iter_content(chunk_size, decode_unicode=True):
+				yield chunk
+		finally:
+			response.close()
+
+	def _connection_stats(self):
+		"""Returns dictionary -> Key: stat name; Value: count of requests, new connections and reused connections"""
+		requests_sent 		= 0
+		connections_opened 	= 0
+
+		pools = self.adapter.poolmanager.pools
+		for key in pools.keys():
+			pool = pools.get(key)
+			if pool:
+				requests_sent 		+= pool.num_requests
+				connections_opened 	+= pool.num_connections
+
+		stats = {}
+		stats["requests"] 		= requests_sent
+		stats["connections"] 	= connections_opened
+		stats["reused"] 		= requests_sent - connections_opened
+
+		return stats
+
+	def close(self):
+		"""Closes all pooled connections"""
+		self.session.close()
@@ -0,0 +1,287 @@
+# FILE: 	benchmarks/asup_server.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Local stand-in for the ASUP REST interface, for load, latency and retry
+# 			testing without restprd. Serves every path the modeler calls with the
+# 			synthetic payloads of benchmarks/synthetic.py (serial # 700000000001 and up),
+# 			after a latency drawn from a configurable distribution, and can inject HTTP
+# 			errors, 'Error' bodies and dropped connections. GET /_stats returns the
+# 			request, error and concurrency counts.
+#
+# USAGE:	python benchmarks/asup_server.py [-port 8712] [-latency SPEC] [-endpoint-latency NAME=SPEC]
+# 			[-error-rate P] [-error-body-rate P] [-drop-rate P] [-payload-scale N]
+# 			python NERD_Modeler.py -asup-url http://127.0.0.1:8712/asup-rest-interface/ASUP_DATA/client_id/test
+# 				-serial-numbers 700000000001,700000000002
+#
+# 			Latency SPEC (seconds): fixed:S, uniform:LOW,HIGH, normal:MEAN,SD,
+# 			lognormal:MEDIAN,SIGMA, exponential:MEAN
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import argparse
+import BaseHTTPServer
+import gzip
+import json
+import math
+import os.path
+import random
+import re
+import SocketServer
+import StringIO
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic
+
+DEFAULT_PORT 		= 8712
+BASE_PATH 			= "/asup-rest-interface/ASUP_DATA/client_id/test"
+ERROR_BODY 			= "<results><error>Error: ASUP is busy, try again later</error></results>"
+NO_DATA_BODY 		= "<results></results>"
+
+#endpoint name -> path pattern (first group: serial #, or asup_id for AGGREGATE). Most specific first
+ENDPOINTS = [
+	("volume_iops", 	re.compile(r"/system_id/\w+/sys_serial_no/(\w+)/start_date/[\d-]+/end_date/[\d-]+/object/volume/.*/csc/?$")),
+	("DFA", 			re.compile(r"/sys_serial_no/(\w+)/start_date/[\d-]+/end_date/[\d-]+/section_view/DF-A$")),
+	("sysconfigR", 		re.compile(r"/sys_serial_no/(\w+)/section_view/SYSCONFIG-R$")),
+	("iops", 			re.compile(r"/sys_serial_no/(\w+)/object/system/.*/cvc$")),
+	("aggregate_info", 	re.compile(r"/asup_id/(\w+)/object_view/AGGREGATE$")),
+	("overview", 		re.compile(r"/sys_serial_no/(\w+)$")),
+]
+
+
+
+#################### LATENCY ####################
+
+def _latency(spec):
+	"""Returns function drawing one latency (seconds) from a latency SPEC. Raises ValueError"""
+	name, sep, values = spec.partition(":")
+	try:
+		values = [float(value) for value in values.split(",") if value.strip() != ""]
+	except ValueError:
+		raise ValueError("bad latency values in " + spec)
+
+	distributions = {
+		"fixed": 		(1, lambda v: v[0]),
+		"uniform": 		(2, lambda v: random.uniform(v[0], v[1])),
+		"normal": 		(2, lambda v: random.normalvariate(v[0], v[1])),
+		"lognormal": 	(2, lambda v: random.lognormvariate(math.log(v[0]), v[1])),
+		"exponential": 	(1, lambda v: random.expovariate(1.0 / v[0])),
+	}
+	if name not in distributions:
+		raise ValueError("unknown latency distribution " + name + " (fixed, uniform, normal, lognormal or exponential)")
+	count, draw = distributions[name]
+	if len(values) != count:
+		raise ValueError(name + " latency takes " + str(count) + " value(s)")
+	if name in ("lognormal", "exponential") and values[0] <= 0:
+		raise ValueError(name + " latency needs a positive " + ("median" if name == "lognormal" else "mean"))
+
+	return lambda: max(0.0, draw(values))
+
+
+
+#################### SERVER ####################
+
+class NERD_ASUP_Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+	protocol_version = "HTTP/1.1" #keep-alive, as restprd
+
+	def log_message(self, format, *args):
+		"""Logs requests only with -verbose"""
+		if self.server.verbose:
+			BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+	def _respond(self, status, body, content_type="application/xml"):
+		"""Sends body, gzipped if the client accepts it"""
+		body = body.encode("utf-8") if isinstance(body, unicode) else body
+		encoding = None
+		if self.server.gzip and "gzip" in self.headers.getheader("Accept-Encoding", ""):
+			buffer = StringIO.StringIO()
+			with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as f:
+				f.write(body)
+			body 		= buffer.getvalue()
+			encoding 	= "gzip"
+
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		if encoding != None:
+			self.send_header("Content-Encoding", encoding)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _endpoint(self, path):
+		"""Returns (endpoint name, serial or asup_id) of a request path, or (None, None)"""
+		if not path.startswith(BASE_PATH):
+			return None, None
+		path = path[len(BASE_PATH):].split("?")[0]
+		for name, pattern in ENDPOINTS:
+			match = pattern.search(path)
+			if match:
+				return name, match.group(1)
+		return None, None
+
+	def _body(self, name, key):
+		"""Returns payload of endpoint 'name' for a serial # (asup_id for AGGREGATE); no data for serials the server does not know"""
+		if name == "aggregate_info":
+			index = synthetic._asup_id_index(key)
+		else:
+			index = synthetic._index(key)
+
+		if index == None:
+			return NO_DATA_BODY
+		return synthetic._payload(self.server.fixtures, index, name)
+
+	def do_GET(self):
+		"""GET of an ASUP REST path, or /_stats"""
+		server = self.server
+		if self.path == "/_stats":
+			self._respond(200, json.dumps(server._stats()), "application/json")
+			return
+
+		name, key = self._endpoint(self.path)
+		if name == None:
+			self._respond(404, "<error>Unknown path</error>")
+			return
+
+		server._begin(name)
+		try:
+			time.sleep(server.latency.get(name, server.default_latency)())
+
+			draw = random.random()
+			if draw < server.drop_rate:
+				server._count("dropped")
+				self.close_connection = 1 #no response at all; the client sees the connection reset
+				return
+			draw -= server.drop_rate
+
+			if draw < server.error_rate:
+				server._count("http_errors")
+				self._respond(503, "<error>Service Unavailable</error>")
+				return
+			draw -= server.error_rate
+
+			if name in server.error_body_endpoints and draw < server.error_body_rate:
+				server._count("error_bodies")
+				self._respond(200, ERROR_BODY)
+				return
+
+			self._respond(200, self._body(name, key))
+		finally:
+			server._end()
+
+
+
+class NERD_ASUP_Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+	daemon_threads 		= True
+	request_queue_size 	= 128
+
+	def __init__(self, port=DEFAULT_PORT, host="127.0.0.1", default_latency="fixed:0", latency={}, error_rate=0.0, error_body_rate=0.0,
+			error_body_endpoints=["aggregate_info"], drop_rate=0.0, payload_scale=1, gzip=True, verbose=False):
+		"""initialize stand-in server. 'latency' is dictionary -> Key: endpoint name; Value: latency SPEC (others use 'default_latency')"""
+		BaseHTTPServer.HTTPServer.__init__(self, (host, port), NERD_ASUP_Handler)
+		self.default_latency 		= _latency(default_latency)
+		self.latency 				= dict([(name, _latency(spec)) for name, spec in latency.items()])
+		self.error_rate 			= error_rate
+		self.error_body_rate 		= error_body_rate
+		self.error_body_endpoints 	= error_body_endpoints
+		self.drop_rate 				= drop_rate
+		self.gzip 					= gzip
+		self.verbose 				= verbose
+		self.fixtures 				= synthetic._scaled(synthetic._fixtures(), payload_scale)
+		self.lock 					= threading.Lock()
+		self.requests 				= dict([(name, 0) for name, pattern in ENDPOINTS])
+		self.counts 				= {"dropped": 0, "http_errors": 0, "error_bodies": 0}
+		self.in_flight 				= 0
+		self.max_in_flight 			= 0
+
+	def _begin(self, name):
+		"""Counts a request to endpoint 'name' as in flight"""
+		with self.lock:
+			self.requests[name] += 1
+			self.in_flight 		+= 1
+			self.max_in_flight 	= max(self.max_in_flight, self.in_flight)
+
+	def _end(self):
+		"""Counts a request as answered"""
+		with self.lock:
+			self.in_flight -= 1
+
+	def _count(self, name):
+		"""Counts an injected failure"""
+		with self.lock:
+			self.counts[name] += 1
+
+	def _stats(self):
+		"""Returns request and injected failure counts"""
+		with self.lock:
+			stats = {"requests": dict(self.requests), "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+			stats.update(self.counts)
+		return stats
+
+
+
+def main():
+	endpoint_names = [name for name, pattern in ENDPOINTS]
+
+	parser = argparse.ArgumentParser(description='Local ASUP REST stand-in for NERD load and latency testing')
+	parser.add_argument('-port', '--port', type=int, default=DEFAULT_PORT, help='Enter port to listen on (default = 8712)')
+	parser.add_argument('-host', '--host', default="127.0.0.1", help='Enter address to listen on (default = 127.0.0.1)')
+	parser.add_argument('-latency', '--latency', default="fixed:0", help='Enter latency SPEC of every endpoint, e.g. lognormal:0.2,0.8 (default = fixed:0)')
+	parser.add_argument('-endpoint-latency', '--endpoint-latency', action='append', default=[], metavar='NAME=SPEC',
+		help='Enter latency SPEC of one endpoint ({0}); repeat for several'.format(", ".join(endpoint_names)))
+	parser.add_argument('-error-rate', '--error-rate', type=float, default=0.0, help='Enter fraction of requests answered with HTTP 503 (default = 0)')
+	parser.add_argument('-error-body-rate', '--error-body-rate', type=float, default=0.0, help="Enter fraction of requests answered with a 200 'Error' body (default = 0)")
+	parser.add_argument('-error-body-endpoints', '--error-body-endpoints', default="aggregate_info", help='Enter endpoints that send error bodies, separated by comma (default = aggregate_info, as restprd)')
+	parser.add_argument('-drop-rate', '--drop-rate', type=float, default=0.0, help='Enter fraction of requests whose connection is closed without a response (default = 0)')
+	parser.add_argument('-payload-scale', '--payload-scale', type=int, default=1, help='Enter factor for DF-A weeks, cvc samples and volumes per payload (default = 1)')
+	parser.add_argument('-no-gzip', '--no-gzip', action='store_true', help='Never gzip responses')
+	parser.add_argument('-seed', '--seed', type=int, help='Enter random seed, for repeatable latencies and failures')
+	parser.add_argument('-verbose', '--verbose', action='store_true', help='Log every request')
+	args = parser.parse_args()
+
+	if args.error_rate + args.error_body_rate + args.drop_rate > 1:
+		parser.error("-error-rate, -error-body-rate and -drop-rate add up to more than 1")
+
+	latency = {}
+	for item in args.endpoint_latency:
+		name, sep, spec = item.partition("=")
+		if name not in endpoint_names or spec == "":
+			parser.error("-endpoint-latency must be NAME=SPEC with NAME one of " + ", ".join(endpoint_names))
+		latency[name] = spec
+
+	error_body_endpoints = [name.strip() for name in args.error_body_endpoints.split(",") if name.strip() != ""]
+	for name in error_body_endpoints:
+		if name not in endpoint_names:
+			parser.error("unknown endpoint in -error-body-endpoints: " + name)
+
+	if args.seed != None:
+		random.seed(args.seed)
+
+	try:
+		server = NERD_ASUP_Server(args.port, args.host, args.latency, latency, args.error_rate, args.error_body_rate, error_body_endpoints,
+			args.drop_rate, args.payload_scale, not args.no_gzip, args.verbose)
+	except ValueError as e:
+		parser.error(str(e))
+
+	print "ASUP STAND-IN LISTENING ON: http://{0}:{1}{2}".format(args.host, args.port, BASE_PATH)
+	print "SERIAL NUMBERS: {0} and up".format(synthetic._serial_number(0))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	server.server_close()
+
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,252 @@
+# FILE: 	benchmarks/bench.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Offline benchmark suite built on the synthetic fixtures (benchmarks/synthetic.py),
+# 			so no ASUP access is needed. Measures the throughput of every payload parser
+# 			(MB/s), and for each number of synthetic serials the model build (parse,
+# 			forecast and sheet dictionaries), workbook render and save times and the peak
+# 			memory, in default and write-only mode. Each scale runs in a fresh interpreter
+# 			so its peak memory is its own. Results are compared with a stored baseline.
+#
+# USAGE:	python benchmarks/bench.py [-scales 1,100,1000] [-runs N] [-threshold PCT]
+# 			[-baseline FILE] [-save-baseline] [-output FILE]
+# 			A metric more than -threshold percent worse than the baseline is a regression
+# 			(exit 1). 10000 serials in default mode needs several GB of memory.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import argparse
+from datetime import date, datetime, timedelta
+import json
+import os
+import os.path
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR 		= os.path.dirname(os.path.abspath(__file__))
+REPO_DIR 			= os.path.dirname(BENCHMARK_DIR)
+DEFAULT_BASELINE 	= os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SCALES 		= "1,100,1000"
+MODES 				= ["default", "write_only"]
+NOISE_SECONDS 		= 0.05 #timings closer than this to the baseline are never a regression
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import synthetic
+
+
+
+def _parsers():
+	"""Returns list of (endpoint name, function parsing its payload)"""
+	from NERD import NERD
+	nerd = NERD()
+
+	def sysconfigR(text):
+		raid_tree = nerd._raid_tree(text)
+		return nerd._aggr_name(raid_tree), nerd._disk_count(raid_tree), nerd._disk_type_count(raid_tree), nerd._raid_group_count(raid_tree)
+
+	return [
+		("overview", 		nerd._overview),
+		("sysconfigR", 		sysconfigR),
+		("DFA", 			nerd._dfa_capacity),
+		("iops", 			nerd._performance_iops),
+		("aggregate_info", 	nerd._aggregate_info),
+		("volume_iops", 	nerd._volume_iops),
+	]
+
+def _parser_throughput(min_seconds):
+	"""Returns dictionary -> Key: endpoint name; Value: MB/s of its parser on the fixture (best of repeated passes of at least min_seconds)"""
+	fixtures 	= synthetic._fixtures()
+	results 	= {}
+	for name, parser in _parsers():
+		size 	= len(fixtures[name].encode("utf-8"))
+		best 	= 0.0
+		for attempt in range(0, 3):
+			count 	= 0
+			t0 		= time.time()
+			while True:
+				parser(fixtures[name])
+				count += 1
+				seconds = time.time() - t0
+				if seconds >= min_seconds:
+					break
+			best = max(best, size * count / seconds / 1000000.0)
+		results[name] = round(best, 3)
+	return results
+
+def _peak_memory_mb():
+	"""Returns peak resident memory of this process (MB)"""
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if sys.platform == "darwin":
+		peak = peak / 1024.0 #bytes on macOS, KB elsewhere
+	return round(peak / 1024.0, 1)
+
+def _run_scale(serial_count, mode):
+	"""Returns timings of one synthetic report of 'serial_count' serials. Runs in the child interpreter"""
+	from NERD_Pipeline import NERD_Pipeline, NERD_Sheet_Model
+
+	pipeline 		= NERD_Pipeline(workers=1)
+	pipeline._fetch = lambda serial_numbers_list, start_date, end_date, volumes_info_active=True, flight=None: synthetic._fetch(serial_numbers_list, volumes_info_active)
+
+	serial_numbers_list = synthetic._serial_numbers(serial_count)
+	end_date 			= date.today()
+	start_date 			= end_date - timedelta(weeks=12)
+
+	#the modeler prints a line per serial; keep it out of the timings and the result
+	stdout 		= sys.stdout
+	sys.stdout 	= open(os.devnull, "w")
+	try:
+		t0 				= time.time()
+		model 			= NERD_Sheet_Model()
+		systems, errors = pipeline._systems(serial_numbers_list, start_date, end_date, model=model)
+		sheets 			= model._sheets()
+		t1 				= time.time()
+		wb 				= pipeline._workbook(sheets, systems[-1].asup_received_date, mode == "write_only")
+		t2 				= time.time()
+		handle, path 	= tempfile.mkstemp(suffix=".xlsx")
+		os.close(handle)
+		wb.save(path)
+		t3 				= time.time()
+	finally:
+		sys.stdout.close()
+		sys.stdout = stdout
+
+	if errors:
+		raise RuntimeError("synthetic serials were skipped: " + str(errors[:3]))
+
+	result = {
+		"model_seconds": 		round(t1 - t0, 3),
+		"serials_per_second": 	round(serial_count / (t1 - t0), 1),
+		"render_seconds": 		round(t2 - t1, 3),
+		"save_seconds": 		round(t3 - t2, 3),
+		"workbook_mb": 			round(os.path.getsize(path) / 1000000.0, 2),
+		"peak_memory_mb": 		_peak_memory_mb(),
+	}
+	os.remove(path)
+	pipeline.close()
+	return result
+
+def _scale(serial_count, mode):
+	"""Returns timings of one synthetic report, run in a fresh interpreter"""
+	output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "-child", str(serial_count), mode], cwd=REPO_DIR)
+	return json.loads(output.strip().splitlines()[-1])
+
+def _metrics(results):
+	"""Returns dictionary -> Key: metric name; Value: (value, True if higher is better) of a benchmark run"""
+	metrics = {}
+	for name, value in results["parsers"].items():
+		metrics["parser " + name + " MB/s"] = (value, True)
+	for scale, modes in results["scales"].items():
+		for mode, result in modes.items():
+			prefix = "{0} serials {1} ".format(scale, mode)
+			metrics[prefix + "model s"] 		= (result["model_seconds"], False)
+			metrics[prefix + "render s"] 		= (result["render_seconds"], False)
+			metrics[prefix + "save s"] 			= (result["save_seconds"], False)
+			metrics[prefix + "peak MB"] 		= (result["peak_memory_mb"], False)
+	return metrics
+
+def _compare(results, baseline, threshold):
+	"""Prints every metric next to its baseline. Returns names of the metrics over 'threshold' percent worse"""
+	current 	= _metrics(results)
+	previous 	= _metrics(baseline)
+	regressions = []
+
+	print ""
+	print "{0:<40}{1:>12}{2:>12}{3:>10}".format("METRIC", "BASELINE", "CURRENT", "CHANGE")
+	#parsers first, then scales from smallest to largest
+	for name in sorted(current, key=lambda name: (int(name.split(" ")[0]) if name[0].isdigit() else 0, name)):
+		value, higher_is_better = current[name]
+		if name not in previous or previous[name][0] == 0:
+			print "{0:<40}{1:>12}{2:>12}{3:>10}".format(name, "-", value, "-")
+			continue
+
+		change = (value - previous[name][0]) * 100.0 / previous[name][0]
+		worse = -change if higher_is_better else change
+		flag = ""
+		if worse > threshold and not (name.endswith(" s") and abs(value - previous[name][0]) < NOISE_SECONDS):
+			flag = "  REGRESSION"
+			regressions.append(name)
+		print "{0:<40}{1:>12}{2:>12}{3:>+9.1f}%{4}".format(name, previous[name][0], value, change, flag)
+
+	return regressions
+
+
+
+def main():
+	if len(sys.argv) == 4 and sys.argv[1] == "-child":
+		print json.dumps(_run_scale(int(sys.argv[2]), sys.argv[3]))
+		return
+
+	parser = argparse.ArgumentParser(description='NERD offline benchmark suite (synthetic fixtures and serials)')
+	parser.add_argument('-scales', '--scales', default=DEFAULT_SCALES, help='Enter serial counts separated by comma (default = 1,100,1000; 10000 needs several GB)')
+	parser.add_argument('-runs', '--runs', type=int, default=1, help='Enter runs per scale; the fastest is kept (default = 1)')
+	parser.add_argument('-parser-seconds', '--parser-seconds', type=float, default=0.5, help='Enter seconds each parser pass runs for (default = 0.5)')
+	parser.add_argument('-threshold', '--threshold', type=float, default=25.0, help='Enter percent a metric may be worse than the baseline before it fails (default = 25)')
+	parser.add_argument('-baseline', '--baseline', default=DEFAULT_BASELINE, help='Enter baseline file (default = benchmarks/baseline.json)')
+	parser.add_argument('-save-baseline', '--save-baseline', action='store_true', help='Save this run as the baseline instead of comparing with it')
+	parser.add_argument('-output', '--output', help='Enter file to append the results to (one JSON line per benchmark run)')
+	args = parser.parse_args()
+
+	try:
+		scales = [int(scale) for scale in args.scales.split(",") if scale.strip() != ""]
+	except ValueError:
+		parser.error("-scales must be serial counts separated by comma")
+
+	results = {"date": datetime.now().isoformat(), "python": platform.python_version(), "host": platform.node(), "parsers": {}, "scales": {}}
+
+	print "{0:<28}{1:>10}".format("PARSER", "MB/s")
+	results["parsers"] = _parser_throughput(args.parser_seconds)
+	for name, file_name in synthetic.FIXTURES:
+		print "{0:<28}{1:>10.2f}".format(name, results["parsers"][name])
+
+	print ""
+	print "{0:<10}{1:<12}{2:>10}{3:>12}{4:>10}{5:>10}{6:>10}{7:>10}".format("SERIALS", "MODE", "MODEL(s)", "SERIALS/s", "RENDER(s)", "SAVE(s)", "XLSX(MB)", "PEAK(MB)")
+	for serial_count in scales:
+		results["scales"][str(serial_count)] = {}
+		for mode in MODES:
+			runs 	= [_scale(serial_count, mode) for i in range(0, args.runs)]
+			result 	= min(runs, key=lambda result: result["model_seconds"] + result["render_seconds"] + result["save_seconds"])
+			results["scales"][str(serial_count)][mode] = result
+			print "{0:<10}{1:<12}{2:>10.3f}{3:>12.1f}{4:>10.3f}{5:>10.3f}{6:>10.2f}{7:>10.1f}".format(serial_count, mode, result["model_seconds"],
+				result["serials_per_second"], result["render_seconds"], result["save_seconds"], result["workbook_mb"], result["peak_memory_mb"])
+
+	if args.output:
+		with open(args.output, "a") as f:
+			f.write(json.dumps(results) + "\n")
+
+	if args.save_baseline:
+		with open(args.baseline, "w") as f:
+			json.dump(results, f, indent=1, sort_keys=True)
+		print ""
+		print "BASELINE SAVED TO: " + args.baseline
+		return
+
+	if not os.path.exists(args.baseline):
+		print ""
+		print "No baseline at " + args.baseline + ". Run with -save-baseline to create one."
+		return
+
+	with open(args.baseline) as f:
+		baseline = json.load(f)
+
+	regressions = _compare(results, baseline, args.threshold)
+	if regressions:
+		print ""
+		print "---- FAIL: {0} metric(s) over {1:.0f}% worse than the baseline ----".format(len(regressions), args.threshold)
+		sys.exit(1)
+
+
+
+if __name__ == "__main__":
+	main()
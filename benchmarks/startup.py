@@ -0,0 +1,102 @@
+# FILE: 	benchmarks/startup.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Cold-start benchmark of the NERD CLI. Every case runs in a fresh interpreter
+# 			so nothing is already imported, and the heavy modules each entry point pulls
+# 			in are listed next to its time.
+#
+# USAGE:	python benchmarks/startup.py [-runs N] [-output FILE] [-max-seconds S]
+# 			-output appends the run as one JSON line; -max-seconds fails (exit 1) when
+# 			'--help' takes longer, for wrapper scripts and cron jobs.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import argparse
+from datetime import datetime
+import json
+import os.path
+import platform
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#name -> interpreter arguments
+CASES = [
+	("python (baseline)", 		["-c", "pass"]),
+	("NERD_Modeler.py --help", 	["NERD_Modeler.py", "--help"]),
+	("NERD_Modeler.py bad arg", ["NERD_Modeler.py", "-no-such-argument"]),
+	("import NERD_Modeler", 	["-c", "import NERD_Modeler"]),
+	("import NERD_Pipeline", 	["-c", "import NERD_Pipeline"]),
+	("import NERD", 			["-c", "import NERD"]),
+]
+
+HEAVY_MODULES = ["numpy", "openpyxl", "requests", "statistics", "dateutil", "BaseHTTPServer"]
+
+
+
+def _time_case(arguments, runs):
+	"""Returns seconds of each run of the interpreter with 'arguments'"""
+	seconds = []
+	with open(os.devnull, "w") as devnull:
+		for i in range(0, runs):
+			t0 = time.time()
+			subprocess.call([sys.executable] + arguments, cwd=REPO_DIR, stdout=devnull, stderr=devnull)
+			seconds.append(time.time() - t0)
+	return seconds
+
+def _heavy_modules(arguments):
+	"""Returns heavy modules loaded by an import case (empty for script cases)"""
+	if arguments[0] != "-c" or "import" not in arguments[1]:
+		return []
+	code 	= arguments[1] + "; import sys; print(','.join([m for m in {0} if m in sys.modules]))".format(HEAVY_MODULES)
+	output 	= subprocess.check_output([sys.executable, "-c", code], cwd=REPO_DIR)
+	return [module for module in output.strip().split(",") if module]
+
+def _median(values):
+	"""Returns median of a list of numbers"""
+	values = sorted(values)
+	middle = len(values) // 2
+	if len(values) % 2:
+		return values[middle]
+	return (values[middle - 1] + values[middle]) / 2.0
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description='NERD CLI cold-start benchmark')
+	parser.add_argument('-runs', '--runs', type=int, default=5, help='Enter runs per case (default = 5)')
+	parser.add_argument('-output', '--output', help='Enter file to append the results to (one JSON line per benchmark run)')
+	parser.add_argument('-max-seconds', '--max-seconds', type=float, help="Fail if the median of 'NERD_Modeler.py --help' is over this many seconds")
+	args = parser.parse_args()
+
+	results = []
+	print "{0:<28}{1:>10}{2:>10}   {3}".format("CASE", "MEDIAN(s)", "MIN(s)", "HEAVY MODULES LOADED")
+	for name, arguments in CASES:
+		seconds = _time_case(arguments, args.runs)
+		heavy 	= _heavy_modules(arguments)
+		results.append({"case": name, "median": round(_median(seconds), 4), "min": round(min(seconds), 4), "runs": args.runs, "heavy_modules": heavy})
+		print "{0:<28}{1:>10.3f}{2:>10.3f}   {3}".format(name, _median(seconds), min(seconds), ", ".join(heavy) or "-")
+
+	if args.output:
+		record = {"date": datetime.now().isoformat(), "python": platform.python_version(), "host": platform.node(), "results": results}
+		with open(args.output, "a") as f:
+			f.write(json.dumps(record) + "\n")
+
+	if args.max_seconds != None:
+		help_seconds = [result["median"] for result in results if result["case"] == "NERD_Modeler.py --help"][0]
+		if help_seconds > args.max_seconds:
+			print "---- FAIL: --help took {0:.3f}s (max {1:.3f}s) ----".format(help_seconds, args.max_seconds)
+			sys.exit(1)
+
+
+
+if __name__ == "__main__":
+	main()
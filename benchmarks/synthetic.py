@@ -0,0 +1,126 @@
+# FILE: 	benchmarks/synthetic.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Synthetic ASUP responses built from the hand-written fixtures in
+# 			benchmarks/fixtures: one payload per endpoint, in the shape restprd answers
+# 			with (plain element names, as the NERD parsers read them). Every synthetic
+# 			serial gets its own serial #, asup_id, system_id, host, cluster, site and
+# 			aggregate/volume names, so no two serials share a payload; nodes come in
+# 			HA pairs and 200 nodes share a site.
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import io
+import os.path
+import re
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+#endpoint name (as in the pages of NERD_Fetch) -> fixture file
+FIXTURES = [
+	("overview", 		"overview.xml"),
+	("sysconfigR", 		"sysconfig_r.xml"),
+	("DFA", 			"dfa.xml"),
+	("iops", 			"cvc.xml"),
+	("aggregate_info", 	"aggregate.xml"),
+	("volume_iops", 	"volume_csc.xml"),
+]
+
+#identifiers of the fixture serial, replaced for every synthetic serial
+FIXTURE_SERIAL_NUMBER 	= 700000000001
+FIXTURE_TOKENS 			= re.compile("700000000001|700000000002|2026100100000001|0537000001|node-00001|cluster-0001|site-01|n00001")
+
+
+
+def _fixtures():
+	"""Returns dictionary -> Key: endpoint name; Value: fixture payload (unicode, as a response body)"""
+	fixtures = {}
+	for name, file_name in FIXTURES:
+		with io.open(os.path.join(FIXTURE_DIR, file_name), encoding="utf-8") as f:
+			fixtures[name] = f.read()
+	return fixtures
+
+def _serial_number(index):
+	"""Returns serial # of synthetic serial 'index' (0 is the fixture serial)"""
+	return str(FIXTURE_SERIAL_NUMBER + index)
+
+def _tokens(index):
+	"""Returns dictionary -> Key: fixture identifier; Value: identifier of synthetic serial 'index'"""
+	return {
+		"700000000001": 	_serial_number(index),
+		"700000000002": 	_serial_number(index ^ 1), #HA partner
+		"2026100100000001": "20261001{0:08d}".format(index + 1),
+		"0537000001": 		"0537{0:06d}".format(index + 1),
+		"node-00001": 		"node-{0:05d}".format(index + 1),
+		"cluster-0001": 	"cluster-{0:04d}".format(index // 2 + 1),
+		"site-01": 			"site-{0:02d}".format(index // 200 + 1),
+		"n00001": 			"n{0:05d}".format(index + 1),
+	}
+
+def _index(serial_number):
+	"""Returns index of the synthetic serial with serial_number, or None if it is not one"""
+	try:
+		index = int(serial_number) - FIXTURE_SERIAL_NUMBER
+	except ValueError:
+		return None
+	if index < 0:
+		return None
+	return index
+
+def _asup_id_index(asup_id):
+	"""Returns index of the synthetic serial whose overview reports asup_id, or None if none does"""
+	if len(str(asup_id)) != 16 or not str(asup_id).startswith("20261001") or not str(asup_id).isdigit():
+		return None
+	return int(str(asup_id)[8:]) - 1
+
+def _payload(fixtures, index, name):
+	"""Returns payload of endpoint 'name' for synthetic serial 'index'"""
+	tokens = _tokens(index)
+	return FIXTURE_TOKENS.sub(lambda match: tokens[match.group(0)], fixtures[name])
+
+def _repeat(text, first, last, factor, rename=None):
+	"""Returns text with the run of elements from the first 'first' to the end of the last 'last' repeated 'factor' times.
+	rename(copy #, run) makes the copies distinct"""
+	start 	= text.index(first)
+	end 	= text.rindex(last) + len(last)
+	run 	= text[start:end]
+	copies 	= [run] + [rename(copy, run) if rename != None else run for copy in range(1, factor)]
+	return text[:start] + "\n".join(copies) + text[end:]
+
+def _scaled(fixtures, factor):
+	"""Returns fixtures with 'factor' times the DF-A weeks, cvc samples and volumes (payload scaling)"""
+	factor = max(1, int(factor))
+	if factor == 1:
+		return fixtures
+
+	scaled 					= dict(fixtures)
+	scaled["DFA"] 			= _repeat(fixtures["DFA"], "<section ", "</section>", factor)
+	scaled["iops"] 			= _repeat(fixtures["iops"], "<sample ", "</sample>", factor)
+	scaled["volume_iops"] 	= _repeat(fixtures["volume_iops"], "<row>", "</row>", factor,
+		lambda copy, run: run.replace("<instance_name>vol_", "<instance_name>vol{0}_".format(copy)))
+	return scaled
+
+def _pages(fixtures, index, volumes_info_active=True):
+	"""Returns pages (as NERD_Fetch returns them) of synthetic serial 'index'"""
+	pages = {"failed": []}
+	for name, file_name in FIXTURES:
+		if name == "volume_iops" and volumes_info_active != True:
+			continue
+		pages[name] = _payload(fixtures, index, name)
+	return pages
+
+def _serial_numbers(count):
+	"""Returns serial #s of the first 'count' synthetic serials"""
+	return [_serial_number(index) for index in range(0, count)]
+
+def _fetch(serial_numbers_list, volumes_info_active=True):
+	"""Yields (serial #, pages) of synthetic serials one at a time, like NERD_Fetcher.fetch"""
+	fixtures = _fixtures()
+	for serial_number in serial_numbers_list:
+		yield serial_number, _pages(fixtures, _index(serial_number), volumes_info_active)
@@ -0,0 +1,76 @@
+# FILE: 	tests/test_cache.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the ASUP response cache (NERD_Cache.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Cache import NERD_Cache, LOW_WATER
+
+
+
+class NERD_Cache_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.cache_dir 	= tempfile.mkdtemp()
+		self.cache 		= NERD_Cache(self.cache_dir)
+
+	def tearDown(self):
+		shutil.rmtree(self.cache_dir)
+
+	def test_body_not_cacheable_not_stored(self):
+		self.cache._put("http://asup.example/aggregate/1", "aggregate_info", "<html>Error</html>", cacheable=False)
+		self.assertEqual(self.cache._get("http://asup.example/aggregate/1", "aggregate_info"), None)
+
+	def test_error_text_in_cacheable_body_stored(self):
+		body = "<row><instance_name>vol_Error_logs</instance_name></row>"
+		self.cache._put("http://asup.example/volume/1", "volume_iops", body)
+		self.assertEqual(self.cache._get("http://asup.example/volume/1", "volume_iops"), body)
+
+	def test_hit_and_miss_counts(self):
+		self.cache._put("http://asup.example/volume/1", "volume_iops", "<row/>")
+		self.cache._get("http://asup.example/volume/1", "volume_iops")
+		self.cache._get("http://asup.example/volume/2", "volume_iops")
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+	def test_evicts_least_recently_used_to_low_water(self):
+		urls = ["http://asup.example/volume/{0}".format(i) for i in range(0, 10)]
+		for url in urls:
+			self.cache._put(url, "volume_iops", os.urandom(1000).encode("hex"))
+		self.cache.max_bytes = self.cache.total_bytes/2
+
+		#reading the oldest entry makes it the most recently used
+		self.cache._get(urls[0], "volume_iops")
+		self.cache._put(urls[0], "volume_iops", os.urandom(1000).encode("hex"))
+
+		self.assertTrue(self.cache.total_bytes <= self.cache.max_bytes*LOW_WATER)
+		self.assertNotEqual(self.cache._get(urls[0], "volume_iops"), None)
+		self.assertEqual(self.cache._get(urls[1], "volume_iops"), None)
+		self.assertEqual(self.cache.total_bytes, sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in os.listdir(self.cache_dir)))
+
+	def test_reopened_cache_orders_entries_by_last_use(self):
+		for i, url in enumerate(["http://asup.example/volume/1", "http://asup.example/volume/2"]):
+			self.cache._put(url, "volume_iops", "<row/>")
+			os.utime(self.cache._entry_path(url), (1000 - i, 1000 - i))
+		reopened = NERD_Cache(self.cache_dir)
+		self.assertEqual(reopened.entry_sizes.keys()[0], os.path.basename(self.cache._entry_path("http://asup.example/volume/2")))
+
+
+if __name__ == "__main__":
+	unittest.main()
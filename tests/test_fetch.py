@@ -0,0 +1,74 @@
+# FILE: 	tests/test_fetch.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the fetch engine (NERD_Fetch.py) against a stand-in transport
+# 			that answers every overview with the synthetic one (benchmarks/synthetic.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import date, timedelta
+import os.path
+import sys
+import threading
+import time
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import synthetic
+from NERD_Fetch import NERD_Fetcher
+
+
+
+class NERD_Counting_Transport():
+	"""Stands in for NERD_Transport: records the most requests it had in flight at once"""
+
+	def __init__(self, seconds=0.01):
+		self.seconds 	= seconds
+		self.lock 		= threading.Lock()
+		self.overview 	= synthetic._payload(synthetic._fixtures(), 0, "overview")
+		self.in_flight 	= 0
+		self.most 		= 0
+
+	def _get(self, url):
+		with self.lock:
+			self.in_flight 	+= 1
+			self.most 		= max(self.most, self.in_flight)
+		try:
+			time.sleep(self.seconds)
+			if url.rsplit("/", 2)[-2] == "sys_serial_no":
+				return self.overview
+			return "<results></results>"
+		finally:
+			with self.lock:
+				self.in_flight -= 1
+
+
+
+class NERD_Fetch_Test(unittest.TestCase):
+
+	def test_workers_bound_all_requests_in_flight(self):
+		transport 	= NERD_Counting_Transport()
+		end_date 	= date.today()
+		fetcher 	= NERD_Fetcher(end_date - timedelta(weeks=1), end_date, workers=3, transport=transport)
+
+		serial_numbers = synthetic._serial_numbers(12)
+		fetched = [serial_number for serial_number, pages in fetcher.fetch(serial_numbers)]
+
+		self.assertEqual(fetched, serial_numbers)
+		self.assertTrue(transport.most <= 3, transport.most)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,154 @@
+# FILE: 	tests/test_flight.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the single-flight registry (NERD_Flight.py): concurrent callers of
+# 			one key share a single call and its response (or its error), and recent
+# 			results stay shared until 'keep' newer ones push them out.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import date, timedelta
+import os.path
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Fetch import NERD_Fetcher
+from NERD_Flight import NERD_Single_Flight
+
+CALLERS = 8
+
+
+
+class NERD_Held_Call():
+	"""Stands in for a slow request: counts its calls and does not return until released"""
+
+	def __init__(self, result=None, error=None):
+		self.result 	= result
+		self.error 		= error
+		self.release 	= threading.Event()
+		self.lock 		= threading.Lock()
+		self.calls 		= 0
+
+	def __call__(self, *args):
+		with self.lock:
+			self.calls += 1
+		self.release.wait(10)
+		if self.error != None:
+			raise self.error
+		return self.result
+
+
+
+class NERD_Held_Transport():
+	"""Stands in for NERD_Transport: records the urls asked for and holds every response until released"""
+
+	def __init__(self):
+		self.call 	= NERD_Held_Call()
+		self.urls 	= []
+
+	def _get(self, url):
+		self.urls.append(url)
+		return self.call(url) or "<results>" + url + "</results>"
+
+
+
+class NERD_Flight_Test(unittest.TestCase):
+
+	def _call_together(self, flight, held, function, *args):
+		"""Returns list of (result or error) of CALLERS threads calling function(*args) at once.
+		The held call is released once every other caller waits on the one in flight"""
+		outcomes 	= [None]*CALLERS
+		threads 	= []
+
+		def _caller(i):
+			try:
+				outcomes[i] = function(*args)
+			except Exception as e:
+				outcomes[i] = e
+
+		for i in range(0, CALLERS):
+			threads.append(threading.Thread(target=_caller, args=(i,)))
+			threads[-1].start()
+
+		deadline = time.time() + 10
+		while flight.saved < CALLERS - 1 and time.time() < deadline:
+			time.sleep(0.01)
+		held.release.set()
+
+		for thread in threads:
+			thread.join(10)
+		return outcomes
+
+	def test_concurrent_callers_share_one_response(self):
+		flight 		= NERD_Single_Flight()
+		response 	= ["<results>shared</results>"]
+		call 		= NERD_Held_Call(response)
+		outcomes 	= self._call_together(flight, call, flight._do, "url", call)
+
+		self.assertEqual(call.calls, 1)
+		self.assertEqual((flight.calls, flight.saved), (1, CALLERS - 1))
+		#the very same object, not a copy
+		self.assertTrue(all([outcome is response for outcome in outcomes]), outcomes)
+
+	def test_concurrent_callers_share_the_error(self):
+		flight 		= NERD_Single_Flight()
+		error 		= IOError("connection reset")
+		call 		= NERD_Held_Call(error=error)
+		outcomes 	= self._call_together(flight, call, flight._do, "url", call)
+
+		self.assertEqual(call.calls, 1)
+		self.assertTrue(all([outcome is error for outcome in outcomes]), outcomes)
+
+		#a failed call is not kept, so the next caller tries again
+		self.assertEqual(flight._do("url", lambda: "retried"), "retried")
+		self.assertEqual(flight.calls, 2)
+
+	def test_other_keys_not_shared(self):
+		flight = NERD_Single_Flight()
+		self.assertEqual([flight._do(key, lambda key: key.upper(), key) for key in ["a", "b", "a"]], ["A", "B", "A"])
+		self.assertEqual((flight.calls, flight.saved), (2, 1))
+
+	def test_recent_results_kept_until_pushed_out(self):
+		flight = NERD_Single_Flight(keep=2)
+		for key in ["a", "b"]:
+			flight._do(key, lambda: key)
+
+		#using "a" makes "b" the oldest, so "c" pushes "b" out
+		self.assertEqual(flight._do("a", lambda: "new a"), "a")
+		flight._do("c", lambda: "c")
+		self.assertEqual(flight._do("b", lambda: "new b"), "new b")
+		self.assertEqual(flight._do("a", lambda: "newer a"), "newer a")
+
+	def test_nothing_kept_without_keep(self):
+		flight = NERD_Single_Flight(keep=0)
+		self.assertEqual([flight._do("a", lambda value: value, value) for value in [1, 2]], [1, 2])
+		self.assertEqual((flight.calls, flight.saved), (2, 0))
+
+	def test_fetcher_requests_shared_url_once(self):
+		#HA partners and nodes of a cluster ask for the same url at about the same time
+		transport 	= NERD_Held_Transport()
+		end_date 	= date.today()
+		fetcher 	= NERD_Fetcher(end_date - timedelta(weeks=1), end_date, workers=CALLERS, transport=transport)
+		endpoint 	= ("sysconfigR", fetcher.asup_url + "/sys_serial_no/700000000001/section_view/SYSCONFIG-R")
+		outcomes 	= self._call_together(fetcher.flight, transport.call, fetcher._get_endpoint, endpoint)
+
+		self.assertEqual(transport.urls, [endpoint[1]])
+		self.assertTrue(all([outcome is outcomes[0] for outcome in outcomes]), outcomes)
+		self.assertEqual(outcomes[0], "<results>" + endpoint[1] + "</results>")
+
+
+
+if __name__ == "__main__":
+	unittest.main()
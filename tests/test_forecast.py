@@ -0,0 +1,149 @@
+# FILE: 	tests/test_forecast.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the fleet-wide growth and forecast engine (NERD_Forecast.py): every
+# 			aggregate of a fleet must get the results the original per-aggregate methods
+# 			computed from its own history, and weeks it did not report must not count.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import os.path
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Forecast import NERD_Forecast, KB_PER_TB
+from NERD_Records import NERD_Aggregate
+
+TB = KB_PER_TB
+
+
+
+def _history(aggregates):
+	"""Returns DF-A capacity history (as NERD._dfa_capacity returns it) of dictionary -> Key: aggr name; Value: list of (week #, used KB, total KB), newest first"""
+	dfa_capacity = {"aggregates": sorted(aggregates), "total": {}, "used": {}, "week": {}, "weeks": 0}
+	for name, values in aggregates.items():
+		dfa_capacity["week"][name] 	= [value[0] for value in values]
+		dfa_capacity["used"][name] 	= [value[1] for value in values]
+		dfa_capacity["total"][name] = [value[2] for value in values]
+		dfa_capacity["weeks"] 		= max(dfa_capacity["weeks"], values[-1][0] + 1)
+	return dfa_capacity
+
+def _weekly(used, total=100*TB):
+	"""Returns (week #, used KB, total KB) of consecutive weeks from used KB, newest first"""
+	return [(week, used[week], total) for week in range(0, len(used))]
+
+def _per_aggregate(used, total):
+	"""Returns (growth TB/month, growth %/month, CAGR, forecast) of one aggregate computed as the original per-aggregate NERD methods did"""
+	n = len(used)
+
+	growth_rate_list 	= [(used[i] - used[i+1]) / used[i+1] * 100 for i in range(n - 1)]
+	average_growth_rate = sum(growth_rate_list) / len(growth_rate_list)
+	growth_tb 			= round(sum([used[i] - used[i+1] for i in range(n - 1)]) / (n - 1) / TB, 2) * 4
+	growth_cagr 		= round((pow(used[0] / used[n-1], 1 / float(n)) - 1) * 100, 2)
+
+	growth_rate = round(average_growth_rate, 2)
+	if growth_rate >= 100:
+		growth_rate = "Over 100%. Check ASUP for details."
+	else:
+		growth_rate = growth_rate * 4
+
+	ninty_percent_capacity 	= total[0] * 0.9 / TB
+	current_capacity 		= used[0] / TB
+	if average_growth_rate == 0:
+		return growth_tb, growth_rate, growth_cagr, "More than one year"
+
+	capacity_forecast = (ninty_percent_capacity - current_capacity) / average_growth_rate
+	if ninty_percent_capacity - current_capacity <= 0:
+		forecast = "Already > 90"
+	elif capacity_forecast < 0:
+		forecast = "On decreasing trend"
+	elif capacity_forecast <= 12:
+		forecast = "This year"
+	else:
+		forecast = "More than one year"
+	return growth_tb, growth_rate, growth_cagr, forecast
+
+
+
+class NERD_Forecast_Test(unittest.TestCase):
+
+	def _compute(self, dfa_capacity):
+		"""Returns dictionary -> Key: aggr name; Value: NERD_Aggregate with the growth of the whole fleet filled in"""
+		forecast 	= NERD_Forecast()
+		aggregates 	= dict([(name, NERD_Aggregate(name, "raid_dp", [], None, None, None, None)) for name in dfa_capacity["aggregates"]])
+		for name in dfa_capacity["aggregates"]:
+			forecast._add(aggregates[name], dfa_capacity)
+		forecast._compute()
+		return aggregates
+
+	def _assert_per_aggregate(self, aggregate, used, total):
+		"""Asserts the growth of aggregate is that of the original per-aggregate methods on its own history"""
+		growth_tb, growth_rate, growth_cagr, forecast = _per_aggregate(used, total)
+		self.assertAlmostEqual(aggregate.growth_tb, growth_tb, 6, aggregate.name)
+		self.assertAlmostEqual(aggregate.growth_cagr, growth_cagr, 6, aggregate.name)
+		if isinstance(growth_rate, str):
+			self.assertEqual(aggregate.growth_rate, growth_rate, aggregate.name)
+		else:
+			self.assertAlmostEqual(aggregate.growth_rate, growth_rate, 6, aggregate.name)
+		self.assertEqual(aggregate.capacity_forecast, forecast, aggregate.name)
+
+	def test_every_forecast_category(self):
+		used = {
+			"flat" 			: [50*TB]*6,
+			"over-ninty" 	: [95*TB, 94*TB, 93*TB, 92*TB, 91*TB, 90*TB],
+			"shrinking" 	: [40*TB, 41*TB, 42*TB, 43*TB, 44*TB, 45*TB],
+			"this-year" 	: [80*TB, 70*TB, 60*TB, 50*TB, 40*TB, 30*TB],
+			"slow" 			: [20.1*TB, 20.08*TB, 20.06*TB, 20.04*TB, 20.02*TB, 20*TB],
+			"doubling" 		: [64*TB, 32*TB, 16*TB, 8*TB, 4*TB, 2*TB],
+		}
+		aggregates = self._compute(_history(dict([(name, _weekly(values)) for name, values in used.items()])))
+
+		forecasts = dict([(name, aggregate.capacity_forecast) for name, aggregate in aggregates.items()])
+		self.assertEqual(forecasts, {"flat": "More than one year", "over-ninty": "Already > 90", "shrinking": "On decreasing trend",
+			"this-year": "This year", "slow": "More than one year", "doubling": "This year"})
+		self.assertEqual(aggregates["doubling"].growth_rate, "Over 100%. Check ASUP for details.")
+
+		for name, values in used.items():
+			self._assert_per_aggregate(aggregates[name], values, [100*TB]*len(values))
+
+	def test_histories_of_different_lengths(self):
+		#the short history is masked past its last week, so it does not change the long one and vice versa
+		long_used 	= [float(80 - week)*TB for week in range(0, 24)]
+		short_used 	= [30*TB, 28*TB, 27*TB]
+		aggregates 	= self._compute(_history({"long": _weekly(long_used), "short": _weekly(short_used, 50*TB)}))
+
+		self._assert_per_aggregate(aggregates["long"], long_used, [100*TB]*24)
+		self._assert_per_aggregate(aggregates["short"], short_used, [50*TB]*3)
+
+	def test_aggregate_missing_a_week(self):
+		#week 2 was not reported: only weeks 0-1 and 3-4 are compared, CAGR is over the 4 reported values
+		values 		= [(0, 48*TB, 100*TB), (1, 40*TB, 100*TB), (3, 30*TB, 100*TB), (4, 25*TB, 100*TB)]
+		aggregate 	= self._compute(_history({"gap": values}))["gap"]
+
+		growth_rate_weekly = ((48.0 - 40) / 40 * 100 + (30.0 - 25) / 25 * 100) / 2
+		self.assertAlmostEqual(aggregate.growth_rate, round(growth_rate_weekly, 2) * 4, 6)
+		self.assertAlmostEqual(aggregate.growth_tb, round((8.0 + 5) / 2, 2) * 4, 6)
+		self.assertAlmostEqual(aggregate.growth_cagr, round((pow(48.0 / 25, 1 / 4.0) - 1) * 100, 2), 6)
+		self.assertEqual(aggregate.capacity_forecast, "This year")
+
+	def test_aggregate_not_in_dfa_ignored(self):
+		forecast 	= NERD_Forecast()
+		aggregate 	= NERD_Aggregate("aggr_missing", "raid_dp", [], None, None, None, None)
+		forecast._add(aggregate, _history({"other": _weekly([2*TB, 1*TB])}))
+		forecast._compute()
+		self.assertEqual((aggregate.growth_tb, aggregate.growth_rate, aggregate.capacity_forecast), (None, None, None))
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,158 @@
+# FILE: 	tests/test_journal.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the checkpoint journal (NERD_Journal.py) and of resuming a report run
+# 			from it: serials the journal completed are not fetched again, skipped ones are,
+# 			and the resumed workbook is the one an uninterrupted run writes. Reports are
+# 			run against the local stand-in server (benchmarks/asup_server.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import date, timedelta
+import os.path
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from openpyxl import load_workbook
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import synthetic
+from asup_server import NERD_ASUP_Server, BASE_PATH
+from NERD_Journal import NERD_Journal
+from NERD_Pipeline import NERD_Pipeline, NERD_Report_Error
+
+#no ASUP for it on the stand-in server, so every run skips it
+UNKNOWN_SERIAL_NUMBER 	= "600000000001"
+OTHER_ENDPOINTS 		= ["sysconfigR", "DFA", "iops", "aggregate_info", "volume_iops"]
+
+
+
+def _cell_values(path):
+	"""Returns dictionary -> Key: sheet name; Value: list of row values of the workbook at path"""
+	workbook = load_workbook(path)
+	return dict([(sheet.title, [[cell.value for cell in row] for row in sheet.iter_rows()]) for sheet in workbook.worksheets])
+
+
+
+class NERD_Journal_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.directory 		= tempfile.mkdtemp()
+		self.journal 		= NERD_Journal(os.path.join(self.directory, "NERD.journal"))
+		self.server 		= NERD_ASUP_Server(port=0)
+		self.thread 		= threading.Thread(target=self.server.serve_forever)
+		self.thread.daemon 	= True
+		self.thread.start()
+		self.asup_url 		= "http://127.0.0.1:{0}{1}".format(self.server.server_address[1], BASE_PATH)
+		self.serial_numbers = synthetic._serial_numbers(4)
+
+	def tearDown(self):
+		self.journal._close()
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.directory)
+
+	def _report(self, serial_numbers_list, file_name, resume=False):
+		"""Returns (errors, requests per endpoint) of one report of serial_numbers_list saved as file_name, run by a new pipeline (nothing in memory)"""
+		before 		= self.server._stats()["requests"]
+		pipeline 	= NERD_Pipeline(workers=2, asup_url=self.asup_url)
+		try:
+			path, errors = pipeline._report(serial_numbers_list, os.path.join(self.directory, file_name), journal=self.journal, resume=resume)
+		finally:
+			pipeline.close()
+
+		after = self.server._stats()["requests"]
+		return errors, dict([(name, after[name] - before[name]) for name in after])
+
+	def test_load_without_journal(self):
+		self.assertEqual(self.journal._load(), (None, {}))
+
+	def test_load_completed_serials(self):
+		start_date, end_date = date(2026, 7, 9), date(2026, 10, 1)
+		self.journal._start(start_date, end_date, True)
+		self.journal._done("1", "system 1", {"weeks": 1})
+		self.journal._error("2", "no ASUP")
+		self.journal._done("3", "system 3", None)
+		self.journal._error("3", "parsed again and skipped")
+		self.journal._done("4", "system 4", None)
+		self.journal._close()
+
+		run, completed = self.journal._load()
+		self.assertEqual(run, {"start_date": start_date, "end_date": end_date, "volumes": True})
+		self.assertEqual(completed, {"1": ("system 1", {"weeks": 1}), "4": ("system 4", None)})
+
+	def test_load_stops_at_record_cut_short(self):
+		self.journal._start(date(2026, 7, 9), date(2026, 10, 1), False)
+		self.journal._done("1", "system 1", None)
+		self.journal._done("2", "system 2", None)
+		self.journal._close()
+
+		#the run was stopped while the last record was written
+		size = os.path.getsize(self.journal.path)
+		with open(self.journal.path, "r+b") as f:
+			f.truncate(size - 5)
+
+		run, completed = self.journal._load()
+		self.assertEqual(run["volumes"], False)
+		self.assertEqual(completed.keys(), ["1"])
+
+	def test_start_replaces_earlier_run(self):
+		self.journal._start(date(2026, 7, 9), date(2026, 10, 1), True)
+		self.journal._done("1", "system 1", None)
+		self.journal._start(date(2026, 7, 10), date(2026, 10, 2), True)
+		self.journal._close()
+
+		run, completed = self.journal._load()
+		self.assertEqual(run["end_date"], date(2026, 10, 2))
+		self.assertEqual(completed, {})
+
+	def test_resume_without_journal(self):
+		pipeline = NERD_Pipeline(workers=1, asup_url=self.asup_url)
+		try:
+			self.assertRaises(NERD_Report_Error, pipeline._report, self.serial_numbers, os.path.join(self.directory, "NERD.xlsx"), journal=self.journal, resume=True)
+		finally:
+			pipeline.close()
+
+	def test_resume_skips_completed_serials(self):
+		#the first run got through two serials before the unknown one
+		errors, requests = self._report(self.serial_numbers[:2] + [UNKNOWN_SERIAL_NUMBER], "first.xlsx")
+		self.assertEqual([serial_number for serial_number, reason in errors], [UNKNOWN_SERIAL_NUMBER])
+		self.assertTrue(os.path.exists(self.journal.path))
+
+		#only the skipped serial and the ones never reached are fetched again
+		serial_numbers_list 	= self.serial_numbers[:2] + [UNKNOWN_SERIAL_NUMBER] + self.serial_numbers[2:]
+		errors, requests 		= self._report(serial_numbers_list, "resumed.xlsx", True)
+		self.assertEqual([serial_number for serial_number, reason in errors], [UNKNOWN_SERIAL_NUMBER])
+		self.assertEqual(requests["overview"], 3)
+		self.assertEqual([requests[name] for name in OTHER_ENDPOINTS], [2]*5)
+		self.assertTrue(os.path.exists(self.journal.path))
+
+		#every serial is now in the journal, so nothing is fetched and the finished run removes it
+		errors, requests = self._report(self.serial_numbers, "done.xlsx", True)
+		self.assertEqual(errors, [])
+		self.assertEqual(sum(requests.values()), 0)
+		self.assertFalse(os.path.exists(self.journal.path))
+
+		#the same workbook as a run that was never stopped
+		errors, requests = self._report(self.serial_numbers, "uninterrupted.xlsx")
+		self.assertEqual(requests["overview"], 4)
+		self.assertEqual(_cell_values(os.path.join(self.directory, "done.xlsx")), _cell_values(os.path.join(self.directory, "uninterrupted.xlsx")))
+
+
+
+if __name__ == "__main__":
+	unittest.main()
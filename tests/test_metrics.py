@@ -0,0 +1,48 @@
+# FILE: 	tests/test_metrics.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the run timings and progress line (NERD_Metrics.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import os.path
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Metrics import NERD_Metrics
+
+
+
+class NERD_Metrics_Test(unittest.TestCase):
+
+	def test_progress_counts_every_serial(self):
+		metrics = NERD_Metrics(3)
+		self.assertTrue(metrics._progress().startswith("[1/3 |"))
+		self.assertTrue(metrics._progress().startswith("[2/3 |"))
+
+	def test_progress_keeps_serials_done_without_a_fetch(self):
+		#2 of 5 serials come from memory or the journal; the total stays 5
+		metrics = NERD_Metrics(5)
+		metrics._ready(2)
+		self.assertTrue(metrics._progress().startswith("[3/5 |"))
+		self.assertEqual(metrics._report()["serials"]["total"], 5)
+
+	def test_progress_past_total(self):
+		metrics = NERD_Metrics(1)
+		metrics._progress()
+		self.assertTrue(metrics._progress().startswith("[2/2 |"))
+
+
+
+if __name__ == "__main__":
+	unittest.main()
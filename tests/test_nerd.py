@@ -0,0 +1,162 @@
+# FILE: 	tests/test_nerd.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the ASUP payload parsers (NERD.py) on the synthetic fixtures
+# 			(benchmarks/fixtures). Expected values are what the parsers NERD shipped
+# 			with returned for the same payloads. Streamed payloads are given to the
+# 			parsers in chunks of several sizes and must parse as the whole body does.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import date
+import os.path
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import synthetic
+from NERD import NERD
+from NERD_Forecast import NERD_Forecast
+from NERD_Records import NERD_Aggregate
+
+CHUNK_SIZES = [1, 7, 64, 4096]
+
+#what the original parsers returned for the fixture overview
+OVERVIEW = {
+	"_asup_id" 				: "2026100100000001",
+	"_asup_received_date" 	: "2026-10-01",
+	"_biz_key" 				: "BK-700000000001",
+	"_cluster_name" 		: "cluster-0001",
+	"_host_name" 			: "node-00001",
+	"_location" 			: "site-01",
+	"_system_version" 		: "NetApp Release 9.1P5",
+	"_system_id" 			: "0537000001",
+	"_system_model" 		: "FAS8040",
+	"_serial_number" 		: "700000000001",
+	"_warranty_status" 		: date(2027, 5, 1),
+}
+
+#what the original parsers returned for the fixture AGGREGATE
+AGGREGATE = {
+	"_aggr_capacity" 	: {"aggr0_n00001_root": 0.82, "aggr1_n00001_sas": 39.23, "aggr2_n00001_sas": 29.42, "aggr3_n00001_ssd": 8.17, "aggr4_n00001_sata": 45.77, "aggr5_n00001_fp": 19.62},
+	"_aggr_util" 		: {"aggr0_n00001_root": 50, "aggr1_n00001_sas": 58, "aggr2_n00001_sas": 66, "aggr3_n00001_ssd": 74, "aggr4_n00001_sata": 82, "aggr5_n00001_fp": 90},
+	"_raid_type" 		: dict([(name, "raid_dp") for name in ["aggr0_n00001_root", "aggr1_n00001_sas", "aggr2_n00001_sas", "aggr3_n00001_ssd", "aggr4_n00001_sata", "aggr5_n00001_fp"]]),
+}
+
+#what the original _growth_rate_monthly (%/month) returned for the fixture DF-A; _capacity_forecast said "This year" for all of them
+DFA_GROWTH_RATE = {"aggr0_n00001_root": 2.4, "aggr1_n00001_sas": 5.16, "aggr2_n00001_sas": 8.52, "aggr3_n00001_ssd": 12.68, "aggr4_n00001_sata": 18.04, "aggr5_n00001_fp": 26.04}
+
+
+#what the original parsers returned for the fixture SYSCONFIG-R (the listing repeats itself after the spare disks)
+SYSCONFIG_R = {
+	"_aggr_name" 		: ["aggr0_n00001_root", "aggr1_n00001_sas", "aggr2_n00001_sas", "aggr3_n00001_ssd", "aggr4_n00001_sata", "aggr5_n00001_fp"],
+	"_disk_count" 		: {"aggr0_n00001_root": "1 disks", "aggr1_n00001_sas": "16 disks", "aggr2_n00001_sas": "18 disks", "aggr3_n00001_ssd": "10 disks", "aggr4_n00001_sata": "14 disks", "aggr5_n00001_fp": "12 disks"},
+	"_disk_type_count" 	: {"aggr0_n00001_root": "(1 SAS; 0 SSD)", "aggr1_n00001_sas": "(3 SAS; 0 SSD)", "aggr2_n00001_sas": "(2 SAS; 0 SSD)", "aggr3_n00001_ssd": "(0 SAS; 1 SSD)", "aggr4_n00001_sata": "(4 SAS; 0 SSD)", "aggr5_n00001_fp": "(1 SAS; 0 SSD)"},
+	"_raid_group_count" : {
+		"aggr0_n00001_root" : ["/aggr0_n00001_root/plex0/rg0"],
+		"aggr1_n00001_sas" 	: ["/aggr1_n00001_sas/plex0/rg0", "/aggr1_n00001_sas/plex0/rg1", "/aggr1_n00001_sas/plex0/rg2"],
+		"aggr2_n00001_sas" 	: ["/aggr2_n00001_sas/plex0/rg0", "/aggr2_n00001_sas/plex0/rg1"],
+		"aggr3_n00001_ssd" 	: ["/aggr3_n00001_ssd/plex0/rg0"],
+		"aggr4_n00001_sata" : ["/aggr4_n00001_sata/plex0/rg0", "/aggr4_n00001_sata/plex0/rg1", "/aggr4_n00001_sata/plex0/rg2", "/aggr4_n00001_sata/plex0/rg3"],
+		"aggr5_n00001_fp" 	: ["/aggr5_n00001_fp/plex0/rg0"],
+	}, #the original names kept the spaces around them; only their count is shown
+}
+
+
+
+def _chunks(text, size):
+	"""Returns text cut into chunks of 'size' characters, as a streamed body"""
+	return iter([text[i:i+size] for i in range(0, len(text), size)])
+
+
+
+class NERD_Parser_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.nerd 		= NERD()
+		self.fixtures 	= synthetic._fixtures()
+
+	def test_overview_fields(self):
+		for name, expected in OVERVIEW.items():
+			self.assertEqual(getattr(self.nerd, name)(self.fixtures["overview"]), expected, name)
+
+	def test_overview_of_empty_payload(self):
+		for name in OVERVIEW:
+			self.assertEqual(getattr(self.nerd, name)(""), None, name)
+
+	def test_aggregate_fields(self):
+		for name, expected in AGGREGATE.items():
+			self.assertEqual(getattr(self.nerd, name)(self.fixtures["aggregate_info"]), expected, name)
+
+	def test_aggregate_of_payload_without_aggregates(self):
+		self.assertEqual(self.nerd._aggregate_info("<results></results>"), {"capacity": None, "util": None, "raid_type": None})
+
+	def test_aggregate_chunked(self):
+		whole = self.nerd._aggregate_info(self.fixtures["aggregate_info"])
+		for size in CHUNK_SIZES:
+			self.assertEqual(self.nerd._aggregate_info(_chunks(self.fixtures["aggregate_info"], size)), whole, size)
+
+	def test_dfa_capacity_history(self):
+		dfa_capacity = self.nerd._dfa_capacity(self.fixtures["DFA"])
+		self.assertEqual(dfa_capacity["aggregates"], sorted(DFA_GROWTH_RATE))
+		self.assertEqual(dfa_capacity["weeks"], 24)
+		for name in dfa_capacity["aggregates"]:
+			self.assertEqual(dfa_capacity["week"][name], range(0, 24))
+			self.assertEqual(len(dfa_capacity["used"][name]), 24)
+			self.assertEqual(len(dfa_capacity["total"][name]), 24)
+
+		#newest week first
+		self.assertEqual(dfa_capacity["total"]["aggr0_n00001_root"][0], 877568000.0)
+		self.assertEqual(dfa_capacity["used"]["aggr0_n00001_root"][0], 631230565.0)
+
+	def test_dfa_growth_of_shared_history(self):
+		dfa_capacity 	= self.nerd._dfa_capacity(self.fixtures["DFA"])
+		forecast 		= NERD_Forecast()
+		aggregates 		= [NERD_Aggregate(name, "raid_dp", [], None, None, None, None) for name in dfa_capacity["aggregates"]]
+		for aggregate in aggregates:
+			forecast._add(aggregate, dfa_capacity)
+		forecast._compute()
+
+		for aggregate in aggregates:
+			self.assertAlmostEqual(aggregate.growth_rate, DFA_GROWTH_RATE[aggregate.name], 6, aggregate.name)
+			self.assertEqual(aggregate.capacity_forecast, "This year", aggregate.name)
+
+	def test_dfa_of_payload_without_weeks(self):
+		self.assertEqual(self.nerd._dfa_capacity("<results></results>"), None)
+
+	def test_dfa_chunked(self):
+		whole = self.nerd._dfa_capacity(self.fixtures["DFA"])
+		for size in CHUNK_SIZES:
+			self.assertEqual(self.nerd._dfa_capacity(_chunks(self.fixtures["DFA"], size)), whole, size)
+
+	def test_sysconfig_r_fields(self):
+		raid_tree = self.nerd._raid_tree(self.fixtures["sysconfigR"])
+		for name, expected in SYSCONFIG_R.items():
+			self.assertEqual(getattr(self.nerd, name)(raid_tree), expected, name)
+
+	def test_sysconfig_r_of_other_serial(self):
+		#synthetic serials only differ in names, so the counts stay those of the fixture
+		raid_tree = self.nerd._raid_tree(synthetic._payload(self.fixtures, 5, "sysconfigR"))
+		self.assertEqual(self.nerd._aggr_name(raid_tree), [name.replace("n00001", "n00006") for name in SYSCONFIG_R["_aggr_name"]])
+		self.assertEqual(sorted(self.nerd._disk_count(raid_tree).values()), sorted(SYSCONFIG_R["_disk_count"].values()))
+
+	def test_sysconfig_r_of_empty_payload(self):
+		raid_tree = self.nerd._raid_tree("")
+		for name in SYSCONFIG_R:
+			self.assertEqual(getattr(self.nerd, name)(raid_tree), None, name)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,90 @@
+# FILE: 	tests/test_pipeline.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the parse stage of NERD_Pipeline.py on the synthetic fixtures
+# 			(benchmarks/synthetic.py): a serial with a bad payload is skipped with a
+# 			NERD_Report_Error naming it, never an exception that ends the run.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import os.path
+import re
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import synthetic
+from NERD_Pipeline import NERD_Pipeline, NERD_Report_Error
+
+
+
+class NERD_Parse_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.pipeline 		= NERD_Pipeline(workers=1)
+		self.serial_number 	= synthetic._serial_number(0)
+		self.pages 			= synthetic._pages(synthetic._fixtures(), 0)
+
+	def tearDown(self):
+		self.pipeline.close()
+
+	def _skip_reason(self, pages, serial_number=None):
+		"""Returns message of the NERD_Report_Error the parse stage skips the serial with"""
+		outcome = self.pipeline._collect(serial_number or self.serial_number, pages, True)
+		self.assertTrue(isinstance(outcome, NERD_Report_Error), outcome)
+		return str(outcome)
+
+	def test_fixture_parses(self):
+		system, dfa_capacity = self.pipeline._collect(self.serial_number, self.pages, True)
+		self.assertEqual(system.serial_number, self.serial_number)
+		self.assertTrue(system.aggregates)
+
+	def test_empty_sysconfig_r_skips_serial(self):
+		self.pages["sysconfigR"] = ""
+		reason = self._skip_reason(self.pages)
+		self.assertIn("SYSCONFIG-R", reason)
+		self.assertIn("SN# " + self.serial_number, reason)
+
+	def test_aggregate_missing_from_aggregate_info_skips_serial(self):
+		#drop the first aggregate's rows from AGGREGATE; SYSCONFIG-R and DF-A still report it
+		name 		= self.pipeline.nerd._aggr_name(self.pipeline.nerd._raid_tree(self.pages["sysconfigR"]))[0]
+		aggregate 	= self.pages["aggregate_info"]
+		self.pages["aggregate_info"] = re.sub("<aggr><aggr_name>" + name + "<.*?</aggr>", "", aggregate)
+		self.assertNotEqual(self.pages["aggregate_info"], aggregate)
+
+		reason = self._skip_reason(self.pages)
+		self.assertIn(name + " of serial number", reason)
+		self.assertIn("SN# " + self.serial_number, reason)
+
+	def test_aggregate_info_without_capacity_skips_serial(self):
+		self.pages["aggregate_info"] = "<results></results>"
+		reason = self._skip_reason(self.pages)
+		self.assertIn("AGGREGATE", reason)
+
+	def test_empty_overview_names_requested_serial(self):
+		self.pages["overview"] = ""
+		reason = self._skip_reason(self.pages)
+		self.assertIn("SN# " + self.serial_number, reason)
+		self.assertNotIn("None", reason)
+
+	def test_unparsable_streamed_page_skips_serial(self):
+		self.pages["DFA"] = ValueError("garbled body")
+		reason = self._skip_reason(self.pages)
+		self.assertIn("DFA", reason)
+		self.assertIn("SN# " + self.serial_number, reason)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,158 @@
+# FILE: 	tests/test_render.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the workbook renderer (NERD_Render.py). Sheets are written to a
+# 			temporary workbook, saved and read back, in default, write-only and table mode.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import datetime
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+
+from openpyxl import Workbook, load_workbook
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from NERD_Pipeline import _performance_sheet_column_headers_1, _performance_sheet_column_headers_2, _raid_info_sheet_column_headers
+from NERD_Render import NERD_Renderer
+
+#cluster -> host name -> rows (Controller, Serial Number, OS Version, Aggr Name, RAID Type, RAID Layout, Data Disks, Capacity, Util)
+RAID_INFO = {
+	"cluster-a" : {
+		"node-a1" 	: [["FAS8040", "1", "9.1", "aggr0", "raid_dp", "1 groups", "12 disks", 10.0, 50], ["FAS8040", "1", "9.1", "aggr1", "raid_dp", "2 groups", "16 disks", 20.0, 95]],
+		"node-a2" 	: [["FAS8040", "2", "9.1", "aggr2", "raid_dp", "1 groups", "14 disks", 30.0, 85]],
+	},
+	"cluster-b" : {
+		"node-b1" 	: [["FAS8200", "3", "9.3", "aggr3", "raid_dp", "1 groups", "10 disks", 40.0, 10]],
+	},
+}
+
+#cluster -> host name -> row (Controller, Serial Number, CPU %, CIFS, FCP, iSCSI and NFS IOPS)
+PERFORMANCE = {
+	"cluster-a" : {"node-a1": ["FAS8040", "1", 60.0, 1.0, 2.0, 3.0, 4.0], "node-a2": ["FAS8040", "2", 20.0, 1.0, 2.0, 3.0, 4.0]},
+	"cluster-b" : {"node-b1": ["FAS8200", "3", "No Data Available", 1.0, 2.0, 3.0, 4.0]},
+}
+
+MODES = [("default", False), ("write-only", True)]
+
+
+
+def _color(cell):
+	"""Returns fill color of a cell (RRGGBB), or None if it has no fill"""
+	if not cell.fill.fill_type:
+		return None
+	return cell.fill.fgColor.rgb[-6:].lower()
+
+
+
+class NERD_Render_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def _render(self, write_only=False, tables=False, raid_info=RAID_INFO):
+		"""Returns the Raid Info and Performance sheets as read back from a saved workbook"""
+		workbook = Workbook(write_only=write_only)
+		renderer = NERD_Renderer(workbook, datetime(2027, 4, 30), tables)
+		renderer._raid_info_sheet(raid_info, _raid_info_sheet_column_headers())
+		renderer._performance_sheet(PERFORMANCE, _performance_sheet_column_headers_1(), _performance_sheet_column_headers_2())
+
+		path = os.path.join(self.directory, "NERD.xlsx")
+		workbook.save(path)
+		workbook = load_workbook(path)
+		return workbook["Raid Info"], workbook["Performance"]
+
+	def test_rows_in_sheet_order(self):
+		for mode, write_only in MODES:
+			raid_info, performance = self._render(write_only)
+			self.assertEqual([raid_info.cell(row=row, column=6).value for row in range(2, 6)], ["aggr0", "aggr1", "aggr2", "aggr3"], mode)
+			self.assertEqual([performance.cell(row=row, column=2).value for row in range(3, 6)], ["node-a1", "node-a2", "node-b1"], mode)
+
+	def test_bands_alternate_by_cluster(self):
+		for mode, write_only in MODES:
+			raid_info, performance = self._render(write_only)
+			for row, color in [(2, "add8e6"), (3, "add8e6"), (4, "add8e6"), (5, "ffffff")]:
+				self.assertEqual(_color(raid_info.cell(row=row, column=1)), color, (mode, row))
+			self.assertEqual(_color(raid_info["A1"]), "000080", mode)
+
+	def test_group_and_right_edges(self):
+		for mode, write_only in MODES:
+			raid_info, performance = self._render(write_only)
+			#last row of each cluster has a thick bottom edge
+			self.assertEqual([raid_info.cell(row=row, column=1).border.bottom.style for row in range(2, 6)], ["thin", "thin", "thick", "thick"], mode)
+			#last column has a thick right edge
+			self.assertEqual(raid_info["J2"].border.right.style, "thin", mode)
+			self.assertEqual(raid_info["K2"].border.right.style, "thick", mode)
+
+	def test_thresholds_highlighted(self):
+		for mode, write_only in MODES:
+			raid_info, performance = self._render(write_only)
+			self.assertEqual([_color(raid_info.cell(row=row, column=11)) for row in range(2, 6)], ["add8e6", "ff0000", "ffff00", "ffffff"], mode)
+			self.assertEqual([bool(performance.cell(row=row, column=5).font.b) for row in range(3, 6)], [True, False, False], mode)
+
+	def test_header_spans_merged(self):
+		raid_info, performance = self._render()
+		self.assertEqual(sorted(performance.merged_cell_ranges), ["A1:D1", "E1:I1"])
+
+	def test_header_spans_centered_on_write_only_sheets(self):
+		raid_info, performance = self._render(True)
+		self.assertEqual(performance.merged_cell_ranges, [])
+
+		#cells of a span are centered across it and only keep its outer edges
+		self.assertEqual([performance.cell(row=1, column=column).alignment.horizontal for column in range(1, 11)], ["centerContinuous"]*9 + ["center"])
+		self.assertEqual([performance.cell(row=1, column=column).border.left.style for column in range(1, 6)], ["thin", None, None, None, "thin"])
+		self.assertEqual([performance.cell(row=1, column=column).border.right.style for column in range(1, 6)], [None, None, None, "thin", None])
+
+	def test_tables_cover_header_and_data_rows(self):
+		raid_info, performance = self._render(tables=True)
+		self.assertEqual([(table.displayName, table.ref, table.tableStyleInfo.name, table.tableStyleInfo.showRowStripes) for table in raid_info._tables],
+			[("RaidInfo", "A1:K5", "TableStyleMedium2", True)])
+		#the table starts on the second header row; the first keeps its merged spans
+		self.assertEqual([(table.displayName, table.ref) for table in performance._tables], [("Performance", "A2:J5")])
+		self.assertEqual(sorted(performance.merged_cell_ranges), ["A1:D1", "E1:I1"])
+
+	def test_table_data_cells_unstyled(self):
+		raid_info, performance = self._render(tables=True)
+		self.assertEqual(_color(raid_info["A1"]), "000080")
+		for row in range(2, 6):
+			self.assertEqual(_color(raid_info.cell(row=row, column=11)), None, row)
+			self.assertEqual(raid_info.cell(row=row, column=1).border.bottom.style, None, row)
+		self.assertEqual(raid_info["K3"].value, 95)
+
+	def test_thresholds_as_conditional_formats(self):
+		raid_info, performance = self._render(tables=True)
+
+		rules = [(str(cells.sqref), [(rule.type, rule.operator, rule.formula, _color(rule.dxf), rule.stopIfTrue) for rule in cells.rules]) for cells in raid_info.conditional_formatting]
+		self.assertEqual(rules, [("K2:K5", [("cellIs", "greaterThanOrEqual", ["90"], "ff0000", True), ("cellIs", "greaterThanOrEqual", ["80"], "ffff00", True)])])
+
+		rules = [(str(cells.sqref), [(rule.type, rule.formula, rule.dxf.font.b, rule.dxf.font.color.rgb[-6:].lower()) for rule in cells.rules]) for cells in performance.conditional_formatting]
+		self.assertEqual(rules, [("E3:E5", [("expression", ['AND(E3<>"No Data Available",E3>=50)'], True, "ff0000")])])
+
+	def test_empty_sheet_has_no_table(self):
+		raid_info, performance = self._render(tables=True, raid_info={})
+		self.assertEqual(raid_info._tables, [])
+		self.assertEqual(list(raid_info.conditional_formatting), [])
+
+	def test_tables_not_with_write_only(self):
+		self.assertRaises(ValueError, NERD_Renderer, Workbook(write_only=True), datetime(2027, 4, 30), True)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,61 @@
+# FILE: 	tests/test_retry.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the retry policy and circuit breaker (NERD_Retry.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import os.path
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Retry import NERD_Retry_Policy
+
+URL = "http://asup.example/asup-rest-interface/ASUP_DATA/client_id/test/sys_serial_no/1"
+
+
+
+class NERD_Retry_Test(unittest.TestCase):
+
+	def _open_breaker(self, policy):
+		"""Returns the breaker of URL, opened with its cooldown already over (the next request is the probe)"""
+		breaker 			= policy._breaker(URL)
+		breaker.failures 	= breaker.failure_threshold
+		breaker.opened_at 	= time.time() - breaker.cooldown - 1
+		return breaker
+
+	def test_probe_raising_other_exception_releases_breaker(self):
+		policy 	= NERD_Retry_Policy(max_attempts=1)
+		breaker = self._open_breaker(policy)
+
+		def broken_parser(url):
+			raise ValueError("garbled body")
+
+		self.assertRaises(ValueError, policy._call, URL, broken_parser, False)
+		self.assertFalse(breaker.probing)
+
+		#the next request is let through as a new probe instead of waiting forever
+		results = []
+		thread 	= threading.Thread(target=lambda: results.append(policy._call(URL, lambda url: "ok", False)))
+		thread.daemon = True
+		thread.start()
+		thread.join(5)
+		self.assertEqual(results, ["ok"])
+		self.assertEqual(breaker.opened_at, None)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,117 @@
+# FILE: 	tests/test_service.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the report service request checks (NERD_Service.py). Bad bodies are
+# 			answered before any report runs, so no pipeline is needed.
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+import httplib
+import json
+import os.path
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NERD_Service import NERD_Service
+
+
+
+class NERD_Broken_Pipeline():
+	"""Stands in for NERD_Pipeline: records the report path asked for, then fails to save the workbook"""
+
+	def __init__(self):
+		self.paths = []
+
+	def _report(self, serial_numbers_list, path, *args):
+		self.paths.append(path)
+		raise IOError("No such file or directory: " + path)
+
+
+
+class NERD_Service_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.report_dir = tempfile.mkdtemp()
+		self.pipeline 	= NERD_Broken_Pipeline()
+		self.service 	= NERD_Service(self.pipeline, port=0, report_dir=self.report_dir)
+		self.thread 	= threading.Thread(target=self.service.serve_forever)
+		self.thread.daemon = True
+		self.thread.start()
+
+	def tearDown(self):
+		self.service.shutdown()
+		self.service.server_close()
+		shutil.rmtree(self.report_dir)
+
+	def _post(self, body):
+		"""Returns (status, decoded JSON answer) of POST /report with body"""
+		connection = httplib.HTTPConnection("127.0.0.1", self.service.server_address[1], timeout=10)
+		connection.request("POST", "/report", body, {"Content-Type": "application/json"})
+		response = connection.getresponse()
+		answer = (response.status, json.loads(response.read()))
+		connection.close()
+		return answer
+
+	def test_body_not_an_object(self):
+		for body in ('[]', '"x"', '1'):
+			status, answer = self._post(body)
+			self.assertEqual(status, 400)
+			self.assertIn("JSON object", answer["error"])
+
+	def test_serial_numbers_not_a_list(self):
+		for serial_numbers in (1, {"a": 1}, None):
+			status, answer = self._post(json.dumps({"serial_numbers": serial_numbers}))
+			self.assertEqual(status, 400)
+			self.assertIn("serial_numbers", answer["error"])
+
+	def test_serial_numbers_empty(self):
+		status, answer = self._post(json.dumps({"serial_numbers": []}))
+		self.assertEqual(status, 400)
+		self.assertIn("serial_numbers", answer["error"])
+
+	def test_weeks_not_an_integer(self):
+		for weeks in ("12", 1.5, True, [12], 0):
+			status, answer = self._post(json.dumps({"serial_numbers": ["1"], "weeks": weeks}))
+			self.assertEqual(status, 400)
+			self.assertIn("weeks", answer["error"])
+
+	def test_volumes_not_a_flag(self):
+		for volumes in ("maybe", 0, 1, None):
+			status, answer = self._post(json.dumps({"serial_numbers": ["1"], "volumes": volumes}))
+			self.assertEqual(status, 400)
+			self.assertIn("volumes", answer["error"])
+
+	def test_path_outside_report_dir(self):
+		for path in ("/nonexistent/x.xlsx", "../x.xlsx", "sub/x.xlsx", ".."):
+			status, answer = self._post(json.dumps({"serial_numbers": ["1"], "path": path}))
+			self.assertEqual(status, 400)
+			self.assertIn("path", answer["error"])
+		self.assertEqual(self.pipeline.paths, [])
+
+	def test_report_error_answers_500(self):
+		status, answer = self._post(json.dumps({"serial_numbers": ["1"], "path": "x.xlsx", "volumes": "n"}))
+		self.assertEqual(status, 500)
+		self.assertIn("IOError", answer["error"])
+		self.assertEqual(self.pipeline.paths, [os.path.join(os.path.abspath(self.report_dir), "x.xlsx")])
+
+	def test_bad_json(self):
+		status, answer = self._post("{")
+		self.assertEqual(status, 400)
+
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,165 @@
+# FILE: 	tests/test_snapshot.py
+#
+# PROGRAM:	NetApp Environment Review Document (NERD)
+#
+# AUTHOR: 	Kellen Bryan
+#
+# SUMMARY: 	Tests of the per-serial snapshots (NERD_Snapshot.py): a snapshot is only used
+# 			while the overview reports the asup_id it was built from, and then stands in
+# 			for every other ASUP call of its serial. Reports are run against the local
+# 			stand-in server (benchmarks/asup_server.py).
+#
+# USAGE:	python -m unittest discover tests
+#
+# Copyright (c) 2017 Network Appliance, Inc.
+# All rights reserved.
+
+########## MODULE IMPORT ##############################################
+
+from datetime import date, timedelta
+import os.path
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import synthetic
+from asup_server import NERD_ASUP_Server, BASE_PATH
+from NERD_Pipeline import NERD_Pipeline
+from NERD_Snapshot import NERD_Snapshots
+
+END_DATE 	= date(2026, 10, 1)
+START_DATE 	= END_DATE - timedelta(weeks=12)
+SPAN_DAYS 	= (END_DATE - START_DATE).days
+OTHER_ENDPOINTS = ["sysconfigR", "DFA", "iops", "aggregate_info", "volume_iops"]
+
+
+
+class NERD_Snapshot_Test(unittest.TestCase):
+
+	def setUp(self):
+		self.snapshot_dir 	= tempfile.mkdtemp()
+		self.server 		= NERD_ASUP_Server(port=0)
+		self.thread 		= threading.Thread(target=self.server.serve_forever)
+		self.thread.daemon 	= True
+		self.thread.start()
+		self.asup_url 		= "http://127.0.0.1:{0}{1}".format(self.server.server_address[1], BASE_PATH)
+		self.serial_numbers = synthetic._serial_numbers(4)
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+		shutil.rmtree(self.snapshot_dir)
+
+	def _systems(self, snapshots):
+		"""Returns (systems, requests per endpoint) of one report of the serials, run by a new pipeline (nothing in memory)"""
+		before 		= self.server._stats()["requests"]
+		pipeline 	= NERD_Pipeline(workers=2, snapshots=snapshots, asup_url=self.asup_url)
+		try:
+			systems, errors = pipeline._systems(self.serial_numbers, START_DATE, END_DATE)
+		finally:
+			pipeline.close()
+		self.assertEqual(errors, [])
+
+		after = self.server._stats()["requests"]
+		return systems, dict([(name, after[name] - before[name]) for name in after])
+
+	def _system(self):
+		"""Returns parsed NERD_System of the first synthetic serial"""
+		pipeline = NERD_Pipeline(workers=1)
+		try:
+			system, dfa_capacity = pipeline._collect(self.serial_numbers[0], synthetic._pages(synthetic._fixtures(), 0), True)
+		finally:
+			pipeline.close()
+		return system
+
+	def test_hit_of_same_asup_id(self):
+		snapshots 	= NERD_Snapshots(self.snapshot_dir)
+		system 		= self._system()
+		snapshots._put(self.serial_numbers[0], system, SPAN_DAYS, True)
+
+		snapshot = snapshots._get(self.serial_numbers[0], system.asup_id, SPAN_DAYS, True)
+		self.assertEqual((snapshot.serial_number, snapshot.asup_id), (system.serial_number, system.asup_id))
+		self.assertEqual([aggregate.name for aggregate in snapshot.aggregates], [aggregate.name for aggregate in system.aggregates])
+		self.assertEqual((snapshots.hits, snapshots.misses), (1, 0))
+
+	def test_miss_of_new_asup_id_or_other_run(self):
+		snapshots 	= NERD_Snapshots(self.snapshot_dir)
+		system 		= self._system()
+		snapshots._put(self.serial_numbers[0], system, SPAN_DAYS, True)
+
+		self.assertEqual(snapshots._get(self.serial_numbers[0], "2026100200000001", SPAN_DAYS, True), None)
+		self.assertEqual(snapshots._get(self.serial_numbers[0], system.asup_id, SPAN_DAYS + 7, True), None)
+		self.assertEqual(snapshots._get(self.serial_numbers[0], system.asup_id, SPAN_DAYS, False), None)
+		self.assertEqual(snapshots._get(self.serial_numbers[1], system.asup_id, SPAN_DAYS, True), None)
+		self.assertEqual(snapshots._get(self.serial_numbers[0], None, SPAN_DAYS, True), None)
+		self.assertEqual((snapshots.hits, snapshots.misses), (0, 5))
+
+	def test_unreadable_snapshot_is_a_miss(self):
+		snapshots = NERD_Snapshots(self.snapshot_dir)
+		with open(snapshots._snapshot_path(self.serial_numbers[0]), "wb") as f:
+			f.write("not a snapshot")
+		self.assertEqual(snapshots._get(self.serial_numbers[0], "2026100100000001", SPAN_DAYS, True), None)
+
+	def test_refresh_ignores_but_saves(self):
+		system = self._system()
+		NERD_Snapshots(self.snapshot_dir)._put(self.serial_numbers[0], system, SPAN_DAYS, True)
+
+		refresh = NERD_Snapshots(self.snapshot_dir, refresh=True)
+		self.assertEqual(refresh._get(self.serial_numbers[0], system.asup_id, SPAN_DAYS, True), None)
+
+		system.host_name = "node-refreshed"
+		refresh._put(self.serial_numbers[0], system, SPAN_DAYS, True)
+		self.assertEqual(NERD_Snapshots(self.snapshot_dir)._get(self.serial_numbers[0], system.asup_id, SPAN_DAYS, True).host_name, "node-refreshed")
+
+	def test_unchanged_serials_only_fetch_overview(self):
+		systems, requests = self._systems(NERD_Snapshots(self.snapshot_dir))
+		self.assertEqual([requests[name] for name in ["overview"] + OTHER_ENDPOINTS], [4]*6)
+
+		snapshots 					= NERD_Snapshots(self.snapshot_dir)
+		snapshot_systems, requests 	= self._systems(snapshots)
+		self.assertEqual(requests["overview"], 4)
+		self.assertEqual([requests[name] for name in OTHER_ENDPOINTS], [0]*5)
+		self.assertEqual((snapshots.hits, snapshots.misses), (4, 0))
+
+		#growth was saved with the system, so the report is the same
+		self.assertEqual([system.host_name for system in snapshot_systems], [system.host_name for system in systems])
+		self.assertEqual([[(aggregate.name, aggregate.growth_rate, aggregate.capacity_forecast) for aggregate in system.aggregates] for system in snapshot_systems],
+			[[(aggregate.name, aggregate.growth_rate, aggregate.capacity_forecast) for aggregate in system.aggregates] for system in systems])
+
+	def test_new_asup_refreshes_snapshot(self):
+		self._systems(NERD_Snapshots(self.snapshot_dir))
+
+		#the second serial's snapshot was built from an older ASUP than the one the overview now reports
+		snapshots 		= NERD_Snapshots(self.snapshot_dir)
+		system 			= snapshots._get(self.serial_numbers[1], "2026100100000002", SPAN_DAYS, True)
+		system.asup_id 	= "2026093000000002"
+		snapshots._put(self.serial_numbers[1], system, SPAN_DAYS, True)
+
+		snapshots 			= NERD_Snapshots(self.snapshot_dir)
+		systems, requests 	= self._systems(snapshots)
+		self.assertEqual(requests["overview"], 4)
+		self.assertEqual([requests[name] for name in OTHER_ENDPOINTS], [1]*5)
+		self.assertEqual((snapshots.hits, snapshots.misses), (3, 1))
+		self.assertEqual(systems[1].asup_id, "2026100100000002")
+
+		#saved again under the asup_id it now has
+		self.assertEqual(NERD_Snapshots(self.snapshot_dir)._get(self.serial_numbers[1], "2026100100000002", SPAN_DAYS, True).asup_id, "2026100100000002")
+
+	def test_refresh_fetches_every_serial(self):
+		self._systems(NERD_Snapshots(self.snapshot_dir))
+
+		snapshots 			= NERD_Snapshots(self.snapshot_dir, refresh=True)
+		systems, requests 	= self._systems(snapshots)
+		self.assertEqual([requests[name] for name in ["overview"] + OTHER_ENDPOINTS], [4]*6)
+		self.assertEqual((snapshots.hits, snapshots.misses), (0, 4))
+
+
+
+if __name__ == "__main__":
+	unittest.main()